@@ -1,33 +1,118 @@
 import streamlit as st
-import google.generativeai as genai
-from gtts import gTTS
 # from audio_recorder_streamlit import audio_recorder  # 자동 중지 문제로 제거
 import json
 import os
-import hashlib
-import re
 from dotenv import load_dotenv
+from silverlink.amounts import parse_amount
+from silverlink.audio_io import guess_audio_mime_type
+from silverlink.budget import BudgetExceeded
+from silverlink.engine import (
+    NO_MATCH_TTS_TEXT,
+    ConsultationEngine,
+    EngineConfig,
+    benefit_tts_text,
+    build_tts_sections,
+    build_tts_text,
+    create_client,
+    validate_benefits,
+)
+from silverlink.ratelimit import PRIORITY_AUDIO, PRIORITY_TEXT
+from silverlink.resilience import UpstreamUnavailable
+from silverlink.streaming import extract_json_text
+from silverlink.telemetry import (
+    METRICS,
+    finish_trace,
+    span,
+    start_metrics_server,
+    start_trace,
+    traced,
+)
 
 # 환경 변수 로드
 load_dotenv()
 
-# API 클라이언트 초기화
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
+# API 클라이언트 초기화 (SILVERLINK_FAKE_GEMINI=true면 API 키 없이 로컬 대역 사용)
+gemini_client = create_client()
+if gemini_client is None:
     st.error("⚠️ GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
     st.info("💡 Google AI Studio에서 API 키를 발급받으세요: https://aistudio.google.com/app/apikey")
     st.stop()
 
-genai.configure(api_key=api_key)
-gemini_model = genai.GenerativeModel('gemini-2.5-pro')
+# 상담 엔진 설정 (환경 변수, 기본값은 .env.example 참고)
+ENGINE_CONFIG = EngineConfig.from_env()
+GEMINI_MODEL_NAME = ENGINE_CONFIG.model_name
+
+# 상담 엔진 (데이터 저장소, Gemini 호출 경로, 캐시를 모든 세션이 공유)
+@st.cache_resource
+def get_engine():
+    return ConsultationEngine(ENGINE_CONFIG, gemini_client)
+
+# 현재 데이터 버전의 스냅샷 (한 요청 안에서는 같은 스냅샷을 계속 사용)
+def current_data():
+    return get_engine().current_data()
+
+# 복지 혜택 카탈로그 (이름/번호 색인, 최신 정보 병합, 표시용 문자열을 데이터 버전당 1회만 계산)
+def load_welfare_catalog():
+    return current_data().catalog
+
+# 규칙 기반 자격 판정 (신뢰도가 높으면 Gemini 호출 없이 바로 응답)
+RULE_FASTPATH = ENGINE_CONFIG.rule_fastpath
+RULE_MIN_CONFIDENCE = ENGINE_CONFIG.rule_min_confidence
+
+# 규칙 엔진 판정 (프로그램 DB로 명백히 자격이 없는 혜택을 뺀 후보만 평가)
+def evaluate_rules(user_text):
+    return get_engine().evaluate_rules(user_text)
+
+# 헤지 요청 (주 호출이 p95보다 늦으면 두 번째 호출을 보내 먼저 온 유효한 응답 사용)
+HEDGED_REQUESTS = ENGINE_CONFIG.hedged_requests
+
+# 스트리밍 응답 (첫 토큰부터 화면에 표시)
+# 헤지 요청은 전체 응답을 검증해 고르므로 함께 쓰지 않음
+STREAMING_RESPONSES = ENGINE_CONFIG.streaming_responses
+
+# 단계별 시간 제한 (초)
+STAGE_TIMEOUTS = ENGINE_CONFIG.stage_timeouts
+
+# 운영 통계/단계별 처리 시간 표시 (운영자용)
+SHOW_OPERATOR_STATS = os.getenv("SHOW_OPERATOR_STATS", "false") == "true"
+
+# 지표 내보내기 (METRICS_PORT를 지정하면 http://호스트:포트/metrics 에서 Prometheus 형식 제공)
+@st.cache_resource
+def start_metrics_export():
+    port = int(os.getenv("METRICS_PORT", "0"))
+    if not port:
+        return None
+    try:
+        return start_metrics_server(port)
+    except OSError:
+        # 포트 사용 중 (다른 프로세스가 이미 제공 중) - 상담에는 영향 없음
+        return None
+
+start_metrics_export()
+
+# Gemini 호출 입장 제어 (모든 세션 공유, 분당 할당량 안에서 순서대로)
+def get_gemini_gate():
+    return get_engine().gate
+
+# 헤지 요청 실행기 (지연 기록/통계는 모든 세션 공유)
+def get_hedged_caller():
+    return get_engine().hedged_caller
+
+# 응답 캐시 (모든 세션/프로세스가 같은 SQLite 파일 공유)
+def get_response_cache():
+    return get_engine().response_cache
+
+# 오디오 분석 캐시 (오디오 내용 주소 → 전사/추천 결과 + TTS 음성)
+def get_audio_cache():
+    return get_engine().audio_cache
 
-# 복지 데이터 로드
-@st.cache_data
-def load_welfare_data():
-    with open('welfare_data.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+# 텍스트 상담 캐시 키 (데이터/프롬프트/규칙 버전 포함)
+def response_cache_key(user_text):
+    return get_engine().text_cache_key(user_text)
 
-welfare_data = load_welfare_data()
+# 오디오 분석 캐시 키 (오디오 내용 해시 + 데이터/프롬프트 버전)
+def audio_cache_key(audio_bytes):
+    return get_engine().audio_cache_key(audio_bytes)
 
 # 금액 파싱 함수 (웹 검색 결과에서 금액 추출)
 def extract_amount_from_text(text):
@@ -36,154 +121,10 @@ def extract_amount_from_text(text):
     예: "34만 2,510원" → "342510원"
         "월 32만원" → "320000원"
     """
-    # 패턴 1: "34만 2,510원" 형식
-    pattern1 = r'(\d+)만\s*(\d{1},)?(\d{3})원'
-    match = re.search(pattern1, text)
-    if match:
-        man = int(match.group(1))  # 만 단위
-        cheon = match.group(3)  # 천 단위
-        return f"{man * 10000 + int(cheon)}원"
-
-    # 패턴 2: "32만원" 형식
-    pattern2 = r'(\d+)만\s*원'
-    match = re.search(pattern2, text)
-    if match:
-        man = int(match.group(1))
-        return f"{man * 10000}원"
-
-    # 패턴 3: "320000원", "32만" 등
-    pattern3 = r'(\d+)원'
-    match = re.search(pattern3, text)
-    if match:
-        return match.group(0)
-
-    return None
-
-# 최신 복지 정보 (2025년 기준)
-# 웹 검색 에이전트로 확인한 최신 금액 (2025.11.20 기준)
-# 커버리지: 20개 전체 (100%)
-LATEST_WELFARE_INFO_2025 = {
-    "기초연금": {
-        "amount": "월 최대 34만 2,510원 (단독가구)",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "2024년 33만 4,810원에서 2.3% 인상. 선정기준 단독가구 월 228만원 이하"
-    },
-    "노인 장기요양보험": {
-        "amount": "서비스 종류별 월 50~150만원 상당",
-        "source": "국민건강보험공단",
-        "date": "2025",
-        "note": "방문요양, 방문목욕, 주야간보호 등 서비스별 차등 지원"
-    },
-    "기초생활수급": {
-        "amount": "1인 월 76만 5,444원, 2인 125만 8,451원, 3인 160만 8,113원, 4인 195만 1,287원",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "생계급여 기준 중위소득 32%. 의료·주거·교육급여 별도"
-    },
-    "에너지바우처": {
-        "amount": "가구원 수에 따라 연 9만~36만원",
-        "source": "산업통상자원부",
-        "date": "2025",
-        "note": "전기·가스·난방비 등 에너지 비용 지원. 매년 5~6월 신청"
-    },
-    "치매 검진 지원": {
-        "amount": "검사 비용 전액 지원 (소득 기준 충족 시)",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "만 60세 이상 선별·진단·감별검사 무료"
-    },
-    "독거노인 돌봄 서비스": {
-        "amount": "무료",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "안전 확인, 생활 교육, 서비스 연계 등 제공"
-    },
-    "통신요금 감면": {
-        "amount": "월 최대 1만 1천원 (이동전화) + 인터넷 할인",
-        "source": "과학기술정보통신부",
-        "date": "2025",
-        "note": "만 65세 이상 기초연금 수급자 대상"
-    },
-    "노인 일자리 지원": {
-        "amount": "공익활동 월 27~60만원, 시장형 월 최대 71만원",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "2025년 총 109.8만개 일자리 제공 (공익활동 69.2만개)"
-    },
-    "임플란트 지원": {
-        "amount": "본인 부담금 30% (개당 약 50만원 수준)",
-        "source": "국민건강보험공단",
-        "date": "2025",
-        "note": "만 65세 이상, 평생 2개까지 건강보험 적용"
-    },
-    "노인 틀니 지원": {
-        "amount": "본인 부담금 30% (완전틀니 약 40만원, 부분틀니 약 30만원)",
-        "source": "국민건강보험공단",
-        "date": "2025",
-        "note": "만 65세 이상, 7년에 1회 건강보험 적용"
-    },
-    "주거급여": {
-        "amount": "1인가구 월 20만~35만원 (지역별 차등)",
-        "source": "국토교통부",
-        "date": "2025",
-        "note": "소득인정액 기준 중위소득 48% 이하. 1급지(서울) 35.2만원, 4급지 20.1만원"
-    },
-    "재가 노인 식사 배달 서비스": {
-        "amount": "무료 또는 식사당 1,000~3,000원",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "만 65세 이상 거동 불편 어르신 대상"
-    },
-    "긴급복지 지원": {
-        "amount": "생계비 1인 월 62만원, 의료비 300만원 한도",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "갑작스러운 위기상황 발생 시 신속 지원"
-    },
-    "노인 교통비 지원": {
-        "amount": "지하철 무료, 시내버스 무료 또는 할인 (지역별 상이)",
-        "source": "지자체",
-        "date": "2025",
-        "note": "만 65세 이상 자동 적용. 신분증 제시"
-    },
-    "저소득 노인 냉난방비 지원": {
-        "amount": "하절기 4만원, 동절기 6만원",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "기초생활수급자, 차상위계층 중 만 65세 이상. 자동 지급"
-    },
-    "노인 건강진단 지원": {
-        "amount": "일반검진 무료, 암 검진 본인부담 10% (약 1~3만원)",
-        "source": "국민건강보험공단",
-        "date": "2025",
-        "note": "만 66세 이상 건강보험 가입자, 2년에 1회"
-    },
-    "독감 예방접종 지원": {
-        "amount": "무료 (연 1회)",
-        "source": "질병관리청",
-        "date": "2025",
-        "note": "만 65세 이상, 매년 9~11월 접종 가능"
-    },
-    "치매치료 관리비 지원": {
-        "amount": "월 최대 3만원 (연 36만원)",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "치매 진단 만 60세 이상, 소득 기준 충족 시 치매약 처방 본인부담금 지원"
-    },
-    "안경 구입비 지원": {
-        "amount": "3년에 1회, 최대 5만원",
-        "source": "보건복지부",
-        "date": "2025",
-        "note": "기초생활수급자, 차상위계층 중 만 65세 이상"
-    },
-    "노인 안검하수 수술 지원": {
-        "amount": "본인 부담금 30~60% (약 30~50만원)",
-        "source": "국민건강보험공단",
-        "date": "2025",
-        "note": "만 60세 이상, 시야장애 시 건강보험 적용"
-    }
-}
+    # 금액 정규화는 silverlink.amounts (범위/주기/월 환산 포함)
+    amount = parse_amount(text)
+    return f"{amount.values[0]}원" if amount.values else None
+
 
 def get_latest_welfare_info():
     """
@@ -195,310 +136,193 @@ def get_latest_welfare_info():
     if not enable_latest_info:
         return {}
 
-    return LATEST_WELFARE_INFO_2025
+    return load_welfare_catalog().latest
+
 
 # Gemini 프롬프트 생성 (JSON 포맷) - AI 강화 버전
 def create_prompt(user_text):
-    welfare_info = json.dumps(welfare_data, ensure_ascii=False, indent=2)
-    valid_names = [b["name"] for b in welfare_data]
-
-    return f"""당신은 대한민국 복지 전문가 AI입니다.
-
-**절대 준수 사항** (위반 시 잘못된 응답):
-1. 오직 아래 제공된 {len(welfare_data)}개 복지 혜택만 추천하세요
-   허용된 혜택: {', '.join(valid_names)}
-   ⚠️ 위 목록에 없는 다른 혜택은 절대 언급 금지
-
-2. 금액과 대상 조건은 아래 데이터와 정확히 일치해야 합니다
-   ❌ 추측 금지 | ❌ 변경 금지 | ✅ 원본 그대로 복사
-
-3. 각 혜택의 적합도를 0-100점으로 평가하세요 (relevance_score)
-   - 90-100점: 완벽히 부합
-   - 75-89점: 대부분 부합
-   - 70-74점: 일부 부합
-   - 70점 미만: 추천하지 마세요
-
-4. 확실하지 않은 정보는 "가까운 주민센터(☎ 129)에 문의가 필요합니다"라고 명시
-
-**분석 방법 (단계별):**
-1단계: 사용자 정보 추출 (나이, 거주 형태, 건강 상태, 경제 상황)
-2단계: 각 복지 혜택의 대상 조건과 매칭
-3단계: 적합도 점수 산정 (조건 충족률 기반)
-4단계: 상위 3-5개 혜택 추천
-
-**좋은 추천 예시:**
-
-예시 1:
-입력: "72살 독거노인, 다리 불편, 소득 월 80만원"
-분석: 나이(72) → 노인복지 O, 독거 → 돌봄필요 O, 다리불편 → 장기요양 가능, 저소득 → 기초연금 O
-추천: 기초연금(95점), 독거노인 돌봄 서비스(92점), 노인 장기요양보험(85점)
-
-예시 2:
-입력: "68살, 치아 안 좋음, 건강검진 받고 싶어요"
-분석: 나이(68) → 노인건강 O, 치아 → 틀니/임플란트 O, 검진 → 무료검진 O
-추천: 노인 틀니 지원(98점), 노인 건강진단(95점), 임플란트 지원(90점)
-
-예시 3:
-입력: "75살, 일자리 찾습니다"
-분석: 나이(75) → 노인일자리 O, 일 의욕 O
-추천: 노인 일자리 지원(100점), 기초연금(80점 - 일자리 병행 가능)
-
-어르신 상황: {user_text}
-
-복지 혜택 데이터베이스 ({len(welfare_data)}개):
-{welfare_info}
-
-**응답 예시** (반드시 이 형식을 따르세요):
-{{
-  "greeting": "어르신 안녕하세요. 혼자 생활하시면서 거동이 불편하신 상황이 정말 힘드실 것 같습니다. 받으실 수 있는 복지 혜택을 찾아보겠습니다.",
-  "benefits": [
-    {{
-      "name": "독거노인 돌봄 서비스",
-      "relevance_score": 95,
-      "relevance_reason": "혼자 사시는 만 65세 이상 어르신을 위한 서비스",
-      "target": "만 65세 이상 독거노인",
-      "amount": "무료",
-      "description": "정기적으로 안전을 확인하고 필요한 서비스를 연계해드립니다",
-      "next_action": "주민센터를 방문하거나 국번없이 129에 전화하여 신청하세요",
-      "documents": ["신분증"],
-      "contact": "보건복지상담센터 129"
-    }}
-  ],
-  "encouragement": "어르신께서 받으실 수 있는 혜택이 많습니다. 주민센터에 방문하시면 자세히 안내받으실 수 있습니다."
-}}
-
-**JSON 형식** (다른 설명 없이 JSON만 출력):
-{{
-  "greeting": "string (2-3문장, 존댓말)",
-  "benefits": [
-    {{
-      "name": "string (위 {len(welfare_data)}개 중 정확히 하나)",
-      "relevance_score": number (70-100),
-      "relevance_reason": "string (왜 적합한지 구체적으로)",
-      "target": "string (원본 데이터 그대로)",
-      "amount": "string (원본 데이터 그대로)",
-      "description": "string (1-2문장)",
-      "next_action": "string (구체적 행동 지침)",
-      "documents": ["string"],
-      "contact": "string"
-    }}
-  ],
-  "encouragement": "string (2-3문장, 따뜻하게)"
-}}"""
+    """(프롬프트, 응답 스키마) 반환, 구조화 출력을 쓰지 않으면 스키마는 None"""
+    return get_engine().text_prompt(user_text)
 
 # Gemini 오디오 프롬프트 생성 (JSON 포맷) - AI 강화 버전
 def create_audio_prompt():
-    welfare_info = json.dumps(welfare_data, ensure_ascii=False, indent=2)
-    valid_names = [b["name"] for b in welfare_data]
-
-    return f"""이 오디오에서 어르신의 말씀을 듣고 다음을 수행해주세요:
-
-**절대 준수 사항** (위반 시 잘못된 응답):
-1. 먼저 어르신이 말씀하신 내용을 텍스트로 정확하게 정리하세요 (transcript 필드)
-
-2. 오직 아래 제공된 {len(welfare_data)}개 복지 혜택만 추천하세요
-   허용된 혜택: {', '.join(valid_names)}
-   ⚠️ 위 목록에 없는 다른 혜택은 절대 언급 금지
-
-3. 금액과 대상 조건은 아래 데이터와 정확히 일치해야 합니다
-   ❌ 추측 금지 | ❌ 변경 금지 | ✅ 원본 그대로 복사
-
-4. 각 혜택의 적합도를 0-100점으로 평가하세요 (relevance_score)
-   - 90-100점: 완벽히 부합
-   - 75-89점: 대부분 부합
-   - 70-74점: 일부 부합
-   - 70점 미만: 추천하지 마세요
-
-5. 확실하지 않은 정보는 "가까운 주민센터(☎ 129)에 문의가 필요합니다"라고 명시
-
-**분석 방법 (단계별):**
-1단계: 음성 텍스트 변환 (transcript)
-2단계: 사용자 정보 추출 (나이, 거주, 건강, 경제)
-3단계: 조건 매칭 및 적합도 점수 산정
-4단계: 상위 3-5개 혜택 추천
-
-**좋은 추천 예시:**
-
-예시 1:
-음성: "72살 독거노인, 다리 불편, 소득 월 80만원"
-분석: 나이(72) → 노인복지, 독거 → 돌봄, 다리불편 → 장기요양, 저소득 → 기초연금
-추천: 기초연금(95점), 독거노인 돌봄 서비스(92점), 노인 장기요양보험(85점)
-
-예시 2:
-음성: "68살, 치아 안 좋음, 건강검진 받고 싶어요"
-분석: 나이(68) → 노인건강, 치아 → 틀니/임플란트, 검진 → 무료검진
-추천: 노인 틀니 지원(98점), 노인 건강진단(95점), 임플란트 지원(90점)
-
-복지 혜택 데이터베이스 ({len(welfare_data)}개):
-{welfare_info}
-
-**JSON 형식** (다른 설명 없이 JSON만 출력):
-{{
-  "transcript": "string (어르신이 말씀하신 내용 텍스트로)",
-  "greeting": "string (2-3문장, 존댓말)",
-  "benefits": [
-    {{
-      "name": "string (위 {len(welfare_data)}개 중 정확히 하나)",
-      "relevance_score": number (70-100),
-      "relevance_reason": "string (왜 적합한지 구체적으로)",
-      "target": "string (원본 데이터 그대로)",
-      "amount": "string (원본 데이터 그대로)",
-      "description": "string (1-2문장)",
-      "next_action": "string (구체적 행동 지침)",
-      "documents": ["string"],
-      "contact": "string"
-    }}
-  ],
-  "encouragement": "string (2-3문장, 따뜻하게)"
-}}"""
+    """(프롬프트, 응답 스키마) 반환, 구조화 출력을 쓰지 않으면 스키마는 None"""
+    return get_engine().audio_prompt()
+
+def warn_unknown_benefit(benefit):
+    # 존재하지 않는 혜택 발견 (Hallucination)
+    st.warning(f"⚠️ '{benefit.get('name', '')}'는 데이터베이스에 없는 혜택입니다. AI가 잘못된 정보를 제공했으므로 제외합니다.")
 
 # 복지 혜택 검증 및 자동 수정 함수
 def validate_and_fix_benefits(data):
     """AI가 추천한 혜택이 실제 데이터에 있는지 검증하고 자동 보정"""
-    # 유효한 혜택명 딕셔너리 (이름 → 원본 데이터)
-    valid_benefits = {b["name"]: b for b in welfare_data}
-
-    if "benefits" not in data or not isinstance(data["benefits"], list):
+    dropped = validate_benefits(data, load_welfare_catalog())
+    if dropped is None:
         st.warning("⚠️ 복지 혜택 정보를 찾을 수 없습니다.")
-        data["benefits"] = []
         return data
 
-    validated = []
-    for benefit in data["benefits"]:
-        benefit_name = benefit.get("name", "")
-
-        # 혜택명이 실제 데이터에 있는지 확인
-        if benefit_name in valid_benefits:
-            original = valid_benefits[benefit_name]
+    for name in dropped:
+        warn_unknown_benefit({"name": name})
 
-            # 금액과 대상을 원본 데이터로 강제 보정 (AI가 변경했을 수 있음)
-            benefit["amount"] = original["amount"]
-            benefit["target"] = original["target"]
+    # 유효한 혜택이 하나도 없으면 안내
+    if len(data["benefits"]) == 0:
+        st.info("💡 정확히 매칭되는 혜택을 찾지 못했습니다. 가까운 주민센터(☎ 129)에 직접 문의해주세요.")
 
-            # documents와 contact도 원본으로 보정
-            if "documents" not in benefit or not benefit["documents"]:
-                benefit["documents"] = original["documents"]
-            if "contact" not in benefit or not benefit["contact"]:
-                benefit["contact"] = original["contact"]
+    return data
 
-            validated.append(benefit)
+# 인사말 표시
+def render_greeting(greeting):
+    st.markdown(f'<div class="ai-message">🤖 **AI 복지 도우미**\n\n{greeting}</div>', unsafe_allow_html=True)
+
+# 복지 혜택 하나 표시
+def render_benefit(idx, benefit, latest=None):
+    # 적합도 점수 표시 (색상 구분)
+    score = benefit.get("relevance_score", 0)
+    if score >= 80:
+        score_color = "🟢"  # 매우 적합
+    elif score >= 60:
+        score_color = "🟡"  # 적합
+    else:
+        score_color = "🟠"  # 참고용
+
+    with st.expander(f"**{idx}. {benefit.get('name', '복지 혜택')}** {score_color} (적합도 {score}점) - {benefit.get('amount', '')}"):
+        # 적합도 이유 표시
+        if "relevance_reason" in benefit:
+            st.info(f"**💡 추천 이유**: {benefit['relevance_reason']}")
+
+        st.markdown(f"**🎯 대상**: {benefit.get('target', '정보 없음')}")
+        st.markdown(f"**📝 설명**: {benefit.get('description', '')}")
+
+        # Next Action 강조 표시
+        if "next_action" in benefit:
+            st.markdown(f"**👉 다음 할 일**")
+            st.info(benefit["next_action"])
+
+        if "documents" in benefit and len(benefit["documents"]) > 0:
+            st.markdown(f"**📄 필요 서류**: {', '.join(benefit['documents'])}")
+
+        if "contact" in benefit:
+            st.markdown(f"**📞 문의처**: {benefit['contact']}")
+
+        # 2025년 최신 정보 표시
+        latest_info = latest if latest is not None else get_latest_welfare_info()
+        benefit_name = benefit.get('name', '')
+        if benefit_name in latest_info:
+            amount_line, note_line = load_welfare_catalog().latest_lines(benefit_name)
+            st.success(amount_line)
+            if note_line:
+                st.caption(note_line)
+
+# 격려 메시지 표시
+def render_encouragement(encouragement):
+    st.markdown(f'<div class="ai-message">💙 {encouragement}</div>', unsafe_allow_html=True)
+
+# 구조화된 UI 표시 함수
+def display_response(data, latest=None):
+    """검증된 응답 데이터를 화면에 표시하고 TTS용 전체 텍스트를 반환"""
+    # 인사말 표시
+    if "greeting" in data:
+        render_greeting(data["greeting"])
+
+    # 어르신 말씀 (음성 파일의 경우)
+    if "transcript" in data:
+        st.markdown(f'<div class="user-message">👵 **어르신 말씀**\n\n{data["transcript"]}</div>', unsafe_allow_html=True)
+
+    # 복지 혜택 표시 (적합도 순으로 정렬)
+    if "benefits" in data and len(data["benefits"]) > 0:
+        # 적합도 점수로 정렬 (높은 순)
+        sorted_benefits = sorted(
+            data["benefits"],
+            key=lambda x: x.get("relevance_score", 0),
+            reverse=True
+        )
+
+        st.markdown("### 📋 추천 복지 혜택")
+        for idx, benefit in enumerate(sorted_benefits, 1):
+            render_benefit(idx, benefit, latest=latest)
+
+    # 격려 메시지
+    if "encouragement" in data:
+        render_encouragement(data["encouragement"])
+
+    return build_tts_text(data)
+
+# 스트리밍 응답 표시 함수
+@traced("display")
+def stream_and_display_response(response_stream, cache=None, cache_key=None, speech=None, latest=None,
+                                model_name=None):
+    """
+    Gemini 스트리밍 응답을 받는 대로 표시하고 TTS용 전체 텍스트를 반환
+    조각 파싱/검증/캐시는 엔진(stream_events)이 하고, 여기서는 이벤트를 도착 순서대로 그립니다.
+    speech(SpeechPipeline)가 있으면 각 섹션의 음성 합성도 도착 즉시 시작합니다.
+    """
+    result = None
+    shown = 0
+    for kind, value in get_engine().stream_events(response_stream, model_name, cache=cache, cache_key=cache_key):
+        if kind == "greeting":
+            render_greeting(value)
+            if speech is not None:
+                speech.submit(value)
+        elif kind == "benefit":
+            if not shown:
+                st.markdown("### 📋 추천 복지 혜택")
+            shown += 1
+            render_benefit(shown, value, latest=latest)
+            if speech is not None:
+                speech.submit(benefit_tts_text(shown, value))
         else:
-            # 존재하지 않는 혜택 발견 (Hallucination)
-            st.warning(f"⚠️ '{benefit_name}'는 데이터베이스에 없는 혜택입니다. AI가 잘못된 정보를 제공했으므로 제외합니다.")
+            result = value
 
-    data["benefits"] = validated
+    for name in result.dropped:
+        warn_unknown_benefit({"name": name})
 
-    # 유효한 혜택이 하나도 없으면 안내
-    if len(validated) == 0:
+    if result.data is None:
+        # JSON 형식이 아니면 원본 텍스트 표시
+        st.warning("⚠️ 응답을 구조화된 형식으로 표시할 수 없어 원본 텍스트로 표시합니다.")
+        st.markdown(f'<div class="ai-message">{result.raw_text}</div>', unsafe_allow_html=True)
+        return result.raw_text
+
+    data = result.data
+    if not data["benefits"]:
         st.info("💡 정확히 매칭되는 혜택을 찾지 못했습니다. 가까운 주민센터(☎ 129)에 직접 문의해주세요.")
+        if speech is not None:
+            speech.submit(NO_MATCH_TTS_TEXT)
 
-    return data
+    if "encouragement" in data:
+        render_encouragement(data["encouragement"])
+        if speech is not None:
+            speech.submit(data["encouragement"])
+
+    return build_tts_text(data)
 
 # JSON 파싱 및 UI 표시 함수
-def parse_and_display_response(response_text):
-    """Gemini 응답을 JSON으로 파싱하고 구조화된 UI로 표시"""
+@traced("display")
+def parse_and_display_response(response_text, cache=None, cache_key=None, speech=None, latest=None):
+    """
+    Gemini 응답을 JSON으로 파싱하고 구조화된 UI로 표시 (cache_key가 있으면 결과 캐시)
+    speech(SpeechPipeline)가 있으면 혜택 검증 전에 인사말 음성 합성부터 시작합니다.
+    """
     try:
-        # JSON 추출 (```json ... ``` 형태로 올 수 있음)
-        response_text = response_text.strip()
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            response_text = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            response_text = response_text[start:end].strip()
-
-        data = json.loads(response_text)
+        data = json.loads(extract_json_text(response_text))
+
+        # 인사말은 검증과 무관하므로 먼저 음성 합성 시작
+        greeting_submitted = speech is not None and bool(data.get("greeting"))
+        if greeting_submitted:
+            speech.submit(data["greeting"])
 
         # ✅ AI 응답 검증 및 보정 (Hallucination 방지)
         data = validate_and_fix_benefits(data)
 
-        # 인사말 표시
-        if "greeting" in data:
-            st.markdown(f'<div class="ai-message">🤖 **AI 복지 도우미**\n\n{data["greeting"]}</div>', unsafe_allow_html=True)
-
-        # 어르신 말씀 (음성 파일의 경우)
-        if "transcript" in data:
-            st.markdown(f'<div class="user-message">👵 **어르신 말씀**\n\n{data["transcript"]}</div>', unsafe_allow_html=True)
-
-        # 복지 혜택 표시 (적합도 순으로 정렬)
-        if "benefits" in data and len(data["benefits"]) > 0:
-            # 적합도 점수로 정렬 (높은 순)
-            sorted_benefits = sorted(
-                data["benefits"],
-                key=lambda x: x.get("relevance_score", 0),
-                reverse=True
-            )
-
-            st.markdown("### 📋 추천 복지 혜택")
-            for idx, benefit in enumerate(sorted_benefits, 1):
-                # 적합도 점수 표시 (색상 구분)
-                score = benefit.get("relevance_score", 0)
-                if score >= 80:
-                    score_color = "🟢"  # 매우 적합
-                elif score >= 60:
-                    score_color = "🟡"  # 적합
-                else:
-                    score_color = "🟠"  # 참고용
-
-                with st.expander(f"**{idx}. {benefit.get('name', '복지 혜택')}** {score_color} (적합도 {score}점) - {benefit.get('amount', '')}"):
-                    # 적합도 이유 표시
-                    if "relevance_reason" in benefit:
-                        st.info(f"**💡 추천 이유**: {benefit['relevance_reason']}")
-
-                    st.markdown(f"**🎯 대상**: {benefit.get('target', '정보 없음')}")
-                    st.markdown(f"**📝 설명**: {benefit.get('description', '')}")
-
-                    # Next Action 강조 표시
-                    if "next_action" in benefit:
-                        st.markdown(f"**👉 다음 할 일**")
-                        st.info(benefit["next_action"])
-
-                    if "documents" in benefit and len(benefit["documents"]) > 0:
-                        st.markdown(f"**📄 필요 서류**: {', '.join(benefit['documents'])}")
-
-                    if "contact" in benefit:
-                        st.markdown(f"**📞 문의처**: {benefit['contact']}")
-
-                    # 2025년 최신 정보 표시
-                    latest_info = get_latest_welfare_info()
-                    benefit_name = benefit.get('name', '')
-                    if benefit_name in latest_info:
-                        latest = latest_info[benefit_name]
-                        st.success(f"✨ **2025년 최신 정보**: {latest['amount']}")
-                        if 'note' in latest:
-                            st.caption(f"📌 {latest['note']} (출처: {latest['source']})")
-
-        # 격려 메시지
-        if "encouragement" in data:
-            st.markdown(f'<div class="ai-message">💙 {data["encouragement"]}</div>', unsafe_allow_html=True)
-
-        # 전체 텍스트 생성 (TTS용)
-        full_text = ""
-        if "greeting" in data:
-            full_text += data["greeting"] + "\n\n"
-
-        if "benefits" in data and len(data["benefits"]) > 0:
-            for idx, benefit in enumerate(data["benefits"], 1):
-                full_text += f"{idx}번. {benefit.get('name', '')}. "
-                full_text += f"{benefit.get('description', '')} "
-                full_text += f"금액은 {benefit.get('amount', '')}입니다. "
-                if "next_action" in benefit:
-                    full_text += f"{benefit['next_action']} "
-                full_text += "\n\n"
-        else:
-            # 추천 혜택이 없을 경우 기본 메시지
-            full_text += "정확히 매칭되는 복지 혜택을 찾지 못했습니다. 가까운 주민센터 129번에 문의해주세요.\n\n"
-
-        if "encouragement" in data:
-            full_text += data["encouragement"]
+        # 추천 결과가 있는 응답만 캐시 (빈 결과가 TTL 동안 굳지 않도록)
+        if cache is not None and cache_key and data["benefits"]:
+            cache.set(cache_key, data)
 
-        # 빈 텍스트 방지: 최소 메시지 보장
-        if not full_text or len(full_text.strip()) < 10:
-            full_text = "복지 혜택 분석이 완료되었습니다. 자세한 내용은 주민센터에 문의해주세요."
+        # 나머지 섹션 음성 합성 (화면 표시와 동시에 진행)
+        if speech is not None:
+            for section in build_tts_sections(data)[1 if greeting_submitted else 0:]:
+                speech.submit(section)
 
-        return full_text.strip()
+        return display_response(data, latest=latest)
 
     except json.JSONDecodeError as e:
         # JSON 파싱 실패 시 원본 텍스트 표시
@@ -508,8 +332,152 @@ def parse_and_display_response(response_text):
     except Exception as e:
         st.error(f"응답 처리 중 오류 발생: {str(e)}")
         st.markdown(f'<div class="ai-message">{response_text}</div>', unsafe_allow_html=True)
+        if speech is not None:
+            speech.reset()
         return response_text
 
+# Gemini 호출 (입장 제어 → 시간 제한 → 재시도/대체 모델)
+def generate_gemini(contents, priority=PRIORITY_TEXT, coalesce_key=None, stream=False, schema=None):
+    """
+    대기열에서 차례를 기다린 뒤 Gemini 호출, 기다리는 동안 순번 표시
+    (응답, 실제 사용한 모델 이름)을 반환하고, 모두 실패하면 UpstreamUnavailable
+    """
+    status = st.empty()
+
+    def show_queue_position(position, eta):
+        status.info(f"⏳ 이용하시는 분이 많아 {position}번째로 기다리고 계십니다. (약 {eta:.0f}초)")
+
+    try:
+        return get_engine().generate(
+            contents,
+            priority=priority,
+            coalesce_key=coalesce_key,
+            stream=stream,
+            schema=schema,
+            on_wait=show_queue_position,
+        )
+    finally:
+        status.empty()
+
+# 대체 모델로 답변했음을 안내
+def render_fallback_notice(model_name):
+    st.caption(f"⚡ AI 서버가 혼잡해 빠른 모델({model_name})로 답변드립니다.")
+
+# 오디오 분석 함수 (녹음/업로드 탭 공용)
+def analyze_audio(audio_bytes, mime_type, suffix, cache=None, cache_key=None, speech=None, latest=None):
+    """업로드와 프롬프트 준비를 겹쳐 실행하고, 단계별 시간 제한을 두고 Gemini로 분석"""
+    engine = get_engine()
+
+    # Gemini에 오디오 업로드 (백그라운드, 메모리에서 바로 전송)
+    upload_future = engine.upload_audio(audio_bytes, mime_type=mime_type, suffix=suffix)
+
+    # 업로드하는 동안 프롬프트 준비
+    prompt, schema = create_audio_prompt()
+    audio_file = engine.orchestrator.wait("upload", upload_future)
+
+    # Gemini로 오디오 분석 (STT + 복지 매칭 한 번에!, 음성 요청 우선)
+    response, model_name = generate_gemini(
+        [prompt, audio_file], priority=PRIORITY_AUDIO, coalesce_key=cache_key, schema=schema
+    )
+    if model_name != GEMINI_MODEL_NAME:
+        # 대체 모델 응답은 캐시하지 않음
+        render_fallback_notice(model_name)
+        cache = None
+
+    # JSON 파싱 및 구조화된 UI 표시 (검증된 결과는 캐시에 저장, 인사말 음성 합성 먼저 시작)
+    return parse_and_display_response(
+        response.text, cache=cache, cache_key=cache_key, speech=speech, latest=latest
+    )
+
+# 음성 안내 생성 및 다운로드 버튼 표시
+def render_tts_downloads(ai_text, cache=None, cache_key=None, speech=None):
+    """
+    결과 텍스트를 섹션별로 나눠 병렬 TTS 변환 후 다운로드 버튼을 표시
+    - 캐시에 음성이 있으면 재사용
+    - 첫 섹션(인사말)이 준비되면 나머지를 기다리지 않고 먼저 들려드림
+    - speech: 스트리밍 중에 이미 섹션을 제출한 SpeechPipeline (없으면 새로 생성)
+    """
+    if not ai_text or len(ai_text.strip()) == 0:
+        st.warning("⚠️ 음성 변환할 텍스트가 없습니다.")
+        return
+
+    with st.spinner("🔊 음성으로 말씀드리고 있어요..."):
+        try:
+            mp3_bytes = cache.get_blob(cache_key) if cache is not None and cache_key else None
+
+            if mp3_bytes is None:
+                if speech is None or speech.chunk_count == 0:
+                    speech = get_engine().speech_pipeline()
+                    speech.submit(ai_text)
+
+                if speech.chunk_count == 0:
+                    raise ValueError("텍스트가 너무 짧습니다")
+
+                # 인사말 먼저 재생 (나머지 섹션은 계속 변환 중)
+                with span("speech"):
+                    if speech.chunk_count > 1:
+                        st.caption("🔊 인사말부터 먼저 들어보세요")
+                        st.audio(speech.first_chunk(timeout=STAGE_TIMEOUTS["tts"]), format="audio/mp3")
+
+                    mp3_bytes = speech.audio_bytes(timeout=STAGE_TIMEOUTS["tts"])
+
+                # 다음 요청은 TTS 없이 바로 음성 제공
+                if cache is not None and cache_key:
+                    cache.set_blob(cache_key, mp3_bytes)
+
+            st.success("✅ 응답 음성이 준비되었습니다!")
+            st.info("💡 아래 버튼을 눌러 음성 파일을 다운로드한 후 재생하세요")
+
+            # 다운로드 버튼
+            with span("download"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button(
+                        label="📄 결과 텍스트 다운로드",
+                        data=ai_text,
+                        file_name="복지혜택_추천결과.txt",
+                        mime="text/plain",
+                        use_container_width=True
+                    )
+                with col2:
+                    st.download_button(
+                        label="🔊 음성 파일 다운로드",
+                        data=mp3_bytes,
+                        file_name="복지혜택_음성안내.mp3",
+                        mime="audio/mp3",
+                        use_container_width=True
+                    )
+        except Exception as e:
+            error_type = type(e).__name__
+            st.error(f"⚠️ 음성 변환 중 오류가 발생했습니다 ({error_type})")
+            st.info(f"상세 정보: {str(e)}")
+            st.info("💡 결과는 위에서 확인하실 수 있습니다. 음성 파일은 생성되지 않았습니다.")
+
+# 요청별 단계 처리 시간 (SHOW_OPERATOR_STATS=true일 때만 표시)
+def render_timing_panel(trace):
+    if not SHOW_OPERATOR_STATS or trace is None:
+        return
+    with st.expander(f"⏱️ 단계별 처리 시간 (전체 {trace.duration * 1000:.0f}ms)"):
+        attributes = trace.attributes
+        if "prompt_tokens" in attributes:
+            cached = attributes.get("cached_tokens")
+            st.caption(
+                f"토큰: 입력 {attributes['prompt_tokens']} / 출력 {attributes['output_tokens']}"
+                f"{f' (캐시 {cached})' if cached else ''}"
+            )
+        if "trimmed_candidates" in attributes:
+            st.caption(
+                f"토큰 예산으로 프롬프트 축소: 후보 {attributes['trimmed_candidates']}개 제외"
+                f"{'' if attributes['examples'] else ', 추천 예시 생략'}"
+            )
+        if "audio_original_bytes" in attributes:
+            original, uploaded = attributes["audio_original_bytes"], attributes["audio_upload_bytes"]
+            saved = 1 - uploaded / original if original else 0
+            st.caption(f"음성 업로드: {original / 1024:.0f}KB → {uploaded / 1024:.0f}KB ({saved:.0%} 절약)")
+        if "queue_wait_ms" in attributes:
+            st.caption(f"대기열: {attributes['queue_wait_ms']:.0f}ms")
+        st.table(trace.spans())
+
 # Streamlit 페이지 설정
 st.set_page_config(
     page_title="SilverLink - AI 복지 도우미",
@@ -662,6 +630,28 @@ with st.expander("📖 사용 방법 보기"):
     - 결과를 다운로드하여 보관하세요
     """)
 
+# 운영 통계 (SHOW_OPERATOR_STATS=true일 때만 사이드바에 표시)
+if SHOW_OPERATOR_STATS:
+    with st.sidebar:
+        st.markdown("### 🛠️ 운영 통계")
+        st.caption("단계별 평균 처리 시간")
+        st.json(METRICS.stage_summary())
+        st.caption("Gemini 입장 제어")
+        st.json(get_gemini_gate().snapshot())
+        st.caption("오늘 토큰 사용량 (예산 0 = 제한 없음)")
+        st.json(get_engine().budget.snapshot())
+        st.caption("Gemini 컨텍스트 캐시 (정적 프롬프트 앞부분)")
+        st.json(get_engine().context_cache.snapshot())
+        if HEDGED_REQUESTS:
+            st.caption(f"헤지 요청 (기준 시간 {get_hedged_caller().tracker.threshold():.1f}초)")
+            st.json(get_hedged_caller().stats.snapshot())
+        # 최신 정보와 금액이 다른 혜택 (welfare_data.json 갱신 필요)
+        stale_amounts = load_welfare_catalog().amounts.stale()
+        if stale_amounts:
+            st.caption(f"금액 갱신 필요 ({len(stale_amounts)}건)")
+            for name, base, latest, ratio in stale_amounts:
+                st.markdown(f"- **{name}**: {base} → {latest} ({ratio:+.1%})")
+
 # 탭 생성
 tab1, tab2, tab3 = st.tabs(["📝 텍스트 입력", "🎙️ 실시간 녹음", "📁 음성 파일"])
 
@@ -677,75 +667,85 @@ with tab1:
 
     if st.button("🔍 복지 혜택 찾기", type="primary", use_container_width=True):
         if user_input.strip():
+            trace = start_trace("text")
             user_text = user_input.strip()
             st.markdown(f'<div class="user-message">👵 어르신 말씀: {user_text}</div>', unsafe_allow_html=True)
 
-            # Gemini AI 처리
-            with st.spinner("🤖 복지 혜택을 찾고 있어요..."):
-                try:
-                    response = gemini_model.generate_content(
-                        create_prompt(user_text),
-                        generation_config=genai.GenerationConfig(temperature=0.2)
-                    )
-                    ai_response = response.text
+            # 최신 복지 정보 (카탈로그에 병합된 사전이라 바로 조회)
+            latest = get_latest_welfare_info()
 
-                    # JSON 파싱 및 구조화된 UI 표시
-                    ai_text = parse_and_display_response(ai_response)
-                except Exception as e:
-                    error_msg = str(e)
-                    if "API key" in error_msg:
-                        st.error("⚠️ API 키 오류: Gemini API 키를 확인해주세요.")
-                    elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
-                        st.error("⚠️ API 할당량 초과: 잠시 후 다시 시도해주세요.")
-                    elif "network" in error_msg.lower() or "connection" in error_msg.lower():
-                        st.error("⚠️ 네트워크 오류: 인터넷 연결을 확인하고 다시 시도해주세요.")
-                    else:
-                        st.error(f"⚠️ AI 처리 중 오류가 발생했습니다: {error_msg}")
-                    st.info("💡 문제가 계속되면 페이지를 새로고침하거나 다시 시도해주세요.")
-                    st.stop()
+            # 같은 상황의 검증된 응답이 캐시에 있으면 바로 표시
+            speech = None
+            cache_key = response_cache_key(user_text)
+            response_cache = get_response_cache()
+            cached_data = response_cache.get(cache_key)
 
-            # TTS 처리
-            if ai_text and len(ai_text.strip()) > 0:
-                with st.spinner("🔊 음성으로 말씀드리고 있어요..."):
+            # 나이/독거/수급 등으로 바로 판정되는 경우 규칙 엔진 결과 사용
+            if cached_data is None and RULE_FASTPATH:
+                rule_data, rule_confidence = evaluate_rules(user_text)
+                if rule_confidence >= RULE_MIN_CONFIDENCE:
+                    response_cache.set(cache_key, rule_data)
+                    cached_data = rule_data
+
+            if cached_data is not None:
+                ai_text = display_response(cached_data, latest=latest)
+            else:
+                # Gemini AI 처리 (규칙만으로 판단하기 어려운 경우)
+                with st.spinner("🤖 복지 혜택을 찾고 있어요..."):
                     try:
-                        # TTS를 위한 텍스트 정리 (이모지 제거)
-                        clean_text = re.sub(r'[^\w\s가-힣.,!?。、\n]', '', ai_text)
-
-                        if len(clean_text.strip()) < 5:
-                            raise ValueError("텍스트가 너무 짧습니다")
-
-                        tts = gTTS(text=clean_text, lang='ko', slow=False)
-                        tts.save("response.mp3")
-
-                        st.success("✅ 응답 음성이 준비되었습니다!")
-                        st.info("💡 아래 버튼을 눌러 음성 파일을 다운로드한 후 재생하세요")
-
-                        # 다운로드 버튼
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.download_button(
-                                label="📄 결과 텍스트 다운로드",
-                                data=ai_text,
-                                file_name="복지혜택_추천결과.txt",
-                                mime="text/plain",
-                                use_container_width=True
+                        speech = get_engine().speech_pipeline()
+
+                        prompt, schema = create_prompt(user_text)
+                        response, model_name = generate_gemini(
+                            prompt, coalesce_key=cache_key, stream=STREAMING_RESPONSES, schema=schema
+                        )
+                        if model_name != GEMINI_MODEL_NAME:
+                            # 대체 모델 응답은 캐시하지 않음
+                            render_fallback_notice(model_name)
+                            response_cache = None
+
+                        if STREAMING_RESPONSES:
+                            # 인사말/혜택을 도착하는 대로 표시하고 음성 합성도 바로 시작
+                            ai_text = stream_and_display_response(
+                                response, cache=response_cache, cache_key=cache_key, speech=speech, latest=latest,
+                                model_name=model_name,
                             )
-                        with col2:
-                            with open("response.mp3", "rb") as f:
-                                st.download_button(
-                                    label="🔊 음성 파일 다운로드",
-                                    data=f,
-                                    file_name="복지혜택_음성안내.mp3",
-                                    mime="audio/mp3",
-                                    use_container_width=True
-                                )
+                        else:
+                            ai_response = response.text
+
+                            # JSON 파싱 및 구조화된 UI 표시 (검증된 결과는 캐시에 저장)
+                            ai_text = parse_and_display_response(
+                                ai_response, cache=response_cache, cache_key=cache_key, speech=speech, latest=latest
+                            )
+                    except UpstreamUnavailable as e:
+                        # Gemini를 쓸 수 없으면 규칙 기반 결과로 대신 안내 (캐시하지 않음)
+                        if isinstance(e, BudgetExceeded):
+                            st.warning("⚠️ AI 상담 사용 한도를 넘어 기본 조건으로 찾은 결과를 안내드립니다.")
+                        else:
+                            st.warning("⚠️ AI 서버가 일시적으로 불안정해 기본 조건으로 찾은 결과를 먼저 안내드립니다.")
+                        speech.reset()
+                        response_cache = None
+                        ai_text = display_response(evaluate_rules(user_text)[0], latest=latest)
                     except Exception as e:
-                        error_type = type(e).__name__
-                        st.error(f"⚠️ 음성 변환 중 오류가 발생했습니다 ({error_type})")
-                        st.info(f"상세 정보: {str(e)}")
-                        st.info("💡 결과는 위에서 확인하실 수 있습니다. 음성 파일은 생성되지 않았습니다.")
-            else:
-                st.warning("⚠️ 음성 변환할 텍스트가 없습니다.")
+                        error_msg = str(e)
+                        if isinstance(e, TimeoutError):
+                            st.error("⚠️ 응답 시간 초과: AI 응답이 너무 오래 걸려 중단했습니다. 잠시 후 다시 시도해주세요.")
+                        elif "API key" in error_msg:
+                            st.error("⚠️ API 키 오류: Gemini API 키를 확인해주세요.")
+                        elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
+                            # 다른 세션도 잠시 새 호출을 멈춰 429 오류가 연달아 나지 않도록 함
+                            get_gemini_gate().pause(60)
+                            st.error("⚠️ API 할당량 초과: 잠시 후 다시 시도해주세요.")
+                        elif "network" in error_msg.lower() or "connection" in error_msg.lower():
+                            st.error("⚠️ 네트워크 오류: 인터넷 연결을 확인하고 다시 시도해주세요.")
+                        else:
+                            st.error(f"⚠️ AI 처리 중 오류가 발생했습니다: {error_msg}")
+                        st.info("💡 문제가 계속되면 페이지를 새로고침하거나 다시 시도해주세요.")
+                        st.stop()
+
+            # TTS 처리 (분석 중에 시작한 음성 합성 결과를 이어서 사용)
+            render_tts_downloads(ai_text, cache=response_cache, cache_key=cache_key, speech=speech)
+            render_timing_panel(finish_trace(trace))
         else:
             st.warning("상황을 입력해주세요!")
 
@@ -767,44 +767,55 @@ with tab2:
     audio_bytes = audio_file.getvalue() if audio_file is not None else None
 
     if audio_bytes:
-        # 오디오 해시 생성 (중복 처리 방지)
-        audio_hash = hashlib.md5(audio_bytes).hexdigest()
-
-        # 이미 처리한 오디오인지 확인
-        if audio_hash != st.session_state.processed_audio_hash:
+        # 오디오 내용 주소 캐시 확인 (다른 세션/새로고침 후에도 같은 녹음이면 재사용)
+        audio_cache = get_audio_cache()
+        cache_key = audio_cache_key(audio_bytes)
+        cached_data = audio_cache.get(cache_key)
+
+    if audio_bytes and cached_data is None and cache_key == st.session_state.processed_audio_hash:
+        # 이 세션에서 이미 분석한 녹음 (대체 모델/빈 결과처럼 캐시하지 않은 결과 포함)
+        # 버튼 클릭 등으로 다시 실행될 때마다 업로드/Gemini 호출을 반복하지 않음
+        st.info("✅ 이미 분석이 완료되었습니다. 새로운 녹음을 하려면 다시 녹음 버튼을 눌러주세요.")
+        if st.session_state.recording_result:
+            st.markdown(f'<div class="ai-message">{st.session_state.recording_result}</div>', unsafe_allow_html=True)
+    elif audio_bytes:
+        trace = start_trace("recording")
+
+        speech = None
+        latest = get_latest_welfare_info()
+
+        if cached_data is not None:
+            st.info("✅ 이미 분석한 녹음입니다. 저장된 결과를 보여드릴게요.")
+            ai_text = display_response(cached_data, latest=latest)
+        else:
             st.success("✅ 녹음이 완료되었습니다!")
 
             # Gemini로 오디오 처리
             with st.spinner("🎧 어르신 말씀을 듣고 복지 혜택을 찾고 있어요..."):
                 try:
-                    # 임시 파일로 저장
-                    temp_path = "temp_recorded_audio.wav"
-                    with open(temp_path, "wb") as f:
-                        f.write(audio_bytes)
-
-                    # Gemini에 오디오 파일 업로드
-                    audio_file = genai.upload_file(path=temp_path)
-
-                    # Gemini로 오디오 분석
-                    response = gemini_model.generate_content(
-                        [create_audio_prompt(), audio_file],
-                        generation_config=genai.GenerationConfig(temperature=0.2)
+                    speech = get_engine().speech_pipeline()
+                    ai_text = analyze_audio(
+                        audio_bytes, mime_type="audio/wav", suffix=".wav",
+                        cache=audio_cache, cache_key=cache_key, speech=speech, latest=latest
                     )
 
-                    ai_response = response.text
-
-                    # JSON 파싱 및 구조화된 UI 표시
-                    ai_text = parse_and_display_response(ai_response)
-
                     # 처리 완료 표시 및 해시 저장
-                    st.session_state.processed_audio_hash = audio_hash
+                    st.session_state.processed_audio_hash = cache_key
                     st.session_state.recording_result = ai_text
 
                 except Exception as e:
                     error_msg = str(e)
-                    if "API key" in error_msg:
+                    if isinstance(e, BudgetExceeded):
+                        st.error("⚠️ AI 상담 사용 한도를 넘어 음성 분석을 할 수 없습니다. 텍스트 입력을 이용해주세요.")
+                    elif isinstance(e, UpstreamUnavailable):
+                        st.error("⚠️ AI 서버가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.")
+                    elif isinstance(e, TimeoutError):
+                        st.error("⚠️ 응답 시간 초과: 녹음 분석이 너무 오래 걸려 중단했습니다. 잠시 후 다시 시도해주세요.")
+                    elif "API key" in error_msg:
                         st.error("⚠️ API 키 오류: Gemini API 키를 확인해주세요.")
                     elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
+                        # 다른 세션도 잠시 새 호출을 멈춰 429 오류가 연달아 나지 않도록 함
+                        get_gemini_gate().pause(60)
                         st.error("⚠️ API 할당량 초과: 잠시 후 다시 시도해주세요.")
                         st.info("💡 Gemini API 무료 할당량은 분당 15회입니다. 1분 정도 기다렸다가 다시 시도해주세요.")
                     elif "audio" in error_msg.lower() or "file" in error_msg.lower():
@@ -817,52 +828,9 @@ with tab2:
                     st.session_state.processed_audio_hash = None  # 에러 시 해시 초기화
                     st.stop()
 
-            # TTS 처리
-            if st.session_state.recording_result and len(st.session_state.recording_result.strip()) > 0:
-                with st.spinner("🔊 음성으로 말씀드리고 있어요..."):
-                    try:
-                        # TTS를 위한 텍스트 정리 (이모지 제거)
-                        clean_text = re.sub(r'[^\w\s가-힣.,!?。、\n]', '', st.session_state.recording_result)
-
-                        if len(clean_text.strip()) < 5:
-                            raise ValueError("텍스트가 너무 짧습니다")
-
-                        tts = gTTS(text=clean_text, lang='ko', slow=False)
-                        tts.save("response.mp3")
-
-                        st.success("✅ 응답 음성이 준비되었습니다!")
-                        st.info("💡 아래 버튼을 눌러 음성 파일을 다운로드한 후 재생하세요")
-
-                        # 다운로드 버튼
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.download_button(
-                                label="📄 결과 텍스트 다운로드",
-                                data=st.session_state.recording_result,
-                                file_name="복지혜택_추천결과.txt",
-                                mime="text/plain",
-                                use_container_width=True
-                            )
-                        with col2:
-                            with open("response.mp3", "rb") as f:
-                                st.download_button(
-                                    label="🔊 음성 파일 다운로드",
-                                    data=f,
-                                    file_name="복지혜택_음성안내.mp3",
-                                    mime="audio/mp3",
-                                    use_container_width=True
-                                )
-
-                    except Exception as e:
-                        error_type = type(e).__name__
-                        st.error(f"⚠️ 음성 변환 중 오류가 발생했습니다 ({error_type})")
-                        st.info(f"상세 정보: {str(e)}")
-                        st.info("💡 결과는 위에서 확인하실 수 있습니다. 음성 파일은 생성되지 않았습니다.")
-        else:
-            # 이미 처리된 오디오 - 이전 결과 표시
-            if st.session_state.recording_result:
-                st.info("✅ 이미 분석이 완료되었습니다. 새로운 녹음을 하려면 다시 녹음 버튼을 눌러주세요.")
-                # 이전 결과를 다시 표시할 수도 있음 (선택사항)
+        # TTS 처리 (캐시에 음성이 있으면 재사용, 분석 중 시작한 음성 합성을 이어서 사용)
+        render_tts_downloads(ai_text, cache=audio_cache, cache_key=cache_key, speech=speech)
+        render_timing_panel(finish_trace(trace))
 
 # 푸터
 st.markdown("---")
@@ -890,45 +858,57 @@ with tab3:
     )
 
     if uploaded_file is not None:
-        # 파일 해시 생성 (중복 처리 방지)
-        file_hash = hashlib.md5(uploaded_file.getvalue()).hexdigest()
-
-        # 이미 처리한 파일인지 확인
-        if file_hash != st.session_state.processed_file_hash:
-            # 오디오 파일 표시
-            st.audio(uploaded_file, format=f'audio/{uploaded_file.type.split("/")[1]}')
-
+        # 오디오 파일 표시
+        st.audio(uploaded_file, format=f'audio/{uploaded_file.type.split("/")[1]}')
+
+        # 오디오 내용 주소 캐시 확인 (같은 파일이면 업로드/분석 생략)
+        audio_cache = get_audio_cache()
+        cache_key = audio_cache_key(uploaded_file.getvalue())
+        cached_data = audio_cache.get(cache_key)
+
+    if uploaded_file is not None and cached_data is None and cache_key == st.session_state.processed_file_hash:
+        # 이 세션에서 이미 분석한 파일 (캐시하지 않은 결과 포함) - 다시 업로드/분석하지 않음
+        st.info("✅ 이미 분석이 완료되었습니다. 다른 파일을 분석하려면 새 파일을 올려주세요.")
+        if st.session_state.upload_result:
+            st.markdown(f'<div class="ai-message">{st.session_state.upload_result}</div>', unsafe_allow_html=True)
+    elif uploaded_file is not None:
+        trace = start_trace("upload")
+
+        speech = None
+        latest = get_latest_welfare_info()
+
+        if cached_data is not None:
+            st.info("✅ 이미 분석한 음성 파일입니다. 저장된 결과를 보여드릴게요.")
+            ai_text = display_response(cached_data, latest=latest)
+        else:
             # Gemini로 오디오 처리 (STT + AI 분석 한 번에!)
             with st.spinner("🎧 어르신 말씀을 듣고 복지 혜택을 찾고 있어요..."):
                 try:
-                    # 임시 파일로 저장
-                    temp_path = "temp_audio.mp3"
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-
-                    # Gemini에 오디오 파일 업로드
-                    audio_file = genai.upload_file(path=temp_path)
-
-                    # Gemini로 오디오 분석 (STT + 복지 매칭 한 번에!)
-                    response = gemini_model.generate_content(
-                        [create_audio_prompt(), audio_file],
-                        generation_config=genai.GenerationConfig(temperature=0.2)
+                    speech = get_engine().speech_pipeline()
+                    ai_text = analyze_audio(
+                        uploaded_file.getvalue(),
+                        mime_type=uploaded_file.type or guess_audio_mime_type(uploaded_file.name),
+                        suffix=os.path.splitext(uploaded_file.name)[1].lower() or ".mp3",
+                        cache=audio_cache, cache_key=cache_key, speech=speech, latest=latest
                     )
 
-                    ai_response = response.text
-
-                    # JSON 파싱 및 구조화된 UI 표시
-                    ai_text = parse_and_display_response(ai_response)
-
                     # 처리 완료 표시 및 해시 저장
-                    st.session_state.processed_file_hash = file_hash
+                    st.session_state.processed_file_hash = cache_key
                     st.session_state.upload_result = ai_text
 
                 except Exception as e:
                     error_msg = str(e)
-                    if "API key" in error_msg:
+                    if isinstance(e, BudgetExceeded):
+                        st.error("⚠️ AI 상담 사용 한도를 넘어 음성 분석을 할 수 없습니다. 텍스트 입력을 이용해주세요.")
+                    elif isinstance(e, UpstreamUnavailable):
+                        st.error("⚠️ AI 서버가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.")
+                    elif isinstance(e, TimeoutError):
+                        st.error("⚠️ 응답 시간 초과: 음성 파일 분석이 너무 오래 걸려 중단했습니다. 잠시 후 다시 시도해주세요.")
+                    elif "API key" in error_msg:
                         st.error("⚠️ API 키 오류: Gemini API 키를 확인해주세요.")
                     elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
+                        # 다른 세션도 잠시 새 호출을 멈춰 429 오류가 연달아 나지 않도록 함
+                        get_gemini_gate().pause(60)
                         st.error("⚠️ API 할당량 초과: 잠시 후 다시 시도해주세요.")
                         st.info("💡 Gemini API 무료 할당량은 분당 15회입니다. 1분 정도 기다렸다가 다시 시도해주세요.")
                     elif "audio" in error_msg.lower() or "file" in error_msg.lower():
@@ -941,48 +921,6 @@ with tab3:
                     st.session_state.processed_file_hash = None  # 에러 시 해시 초기화
                     st.stop()
 
-            # TTS 처리
-            if st.session_state.upload_result and len(st.session_state.upload_result.strip()) > 0:
-                with st.spinner("🔊 음성으로 말씀드리고 있어요..."):
-                    try:
-                        # TTS를 위한 텍스트 정리 (이모지 제거)
-                        clean_text = re.sub(r'[^\w\s가-힣.,!?。、\n]', '', st.session_state.upload_result)
-
-                        if len(clean_text.strip()) < 5:
-                            raise ValueError("텍스트가 너무 짧습니다")
-
-                        tts = gTTS(text=clean_text, lang='ko', slow=False)
-                        tts.save("response.mp3")
-
-                        st.success("✅ 응답 음성이 준비되었습니다!")
-                        st.info("💡 아래 버튼을 눌러 음성 파일을 다운로드한 후 재생하세요")
-
-                        # 다운로드 버튼
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.download_button(
-                                label="📄 결과 텍스트 다운로드",
-                                data=st.session_state.upload_result,
-                                file_name="복지혜택_추천결과.txt",
-                                mime="text/plain",
-                                use_container_width=True
-                            )
-                        with col2:
-                            with open("response.mp3", "rb") as f:
-                                st.download_button(
-                                    label="🔊 음성 파일 다운로드",
-                                    data=f,
-                                    file_name="복지혜택_음성안내.mp3",
-                                    mime="audio/mp3",
-                                    use_container_width=True
-                                )
-
-                    except Exception as e:
-                        error_type = type(e).__name__
-                        st.error(f"⚠️ 음성 변환 중 오류가 발생했습니다 ({error_type})")
-                        st.info(f"상세 정보: {str(e)}")
-                        st.info("💡 결과는 위에서 확인하실 수 있습니다. 음성 파일은 생성되지 않았습니다.")
-        else:
-            # 이미 처리된 파일
-            st.info("✅ 이미 분석이 완료되었습니다. 다른 파일을 업로드하거나 페이지를 새로고침해주세요.")
-
+        # TTS 처리 (캐시에 음성이 있으면 재사용, 분석 중 시작한 음성 합성을 이어서 사용)
+        render_tts_downloads(ai_text, cache=audio_cache, cache_key=cache_key, speech=speech)
+        render_timing_panel(finish_trace(trace))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+상담 일괄 처리 (CSV/JSONL 입력 → JSON 결과)
+
+사용법:
+    python scripts/batch_consult.py 입력.csv 결과.json [--workers 4] [--rpm 15] [--stub]
+
+입력 (CSV 헤더 또는 JSONL 키):
+    id     상담 번호 (없으면 행 번호)
+    text   상담 내용 (텍스트 상담)
+    audio  음성 파일 경로 (음성 상담, text가 비어 있을 때)
+
+- 화면과 같은 상담 엔진 사용: 응답 캐시 → 규칙 판정 → Gemini (GEMINI_RPM 입장 제어)
+- 처리한 건은 바로 <결과>.checkpoint.jsonl에 기록하고, 다시 실행하면 성공한 건은 건너뜀
+- 모든 건을 처리하면 입력 순서대로 결과 JSON 배열 저장
+- --stub: Gemini 대신 로컬 대역 사용 (API 키 없이 동작 확인)
+"""
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# 저장소 루트에서 silverlink 패키지를 찾도록
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from silverlink.audio_io import guess_audio_mime_type  # noqa: E402
+from silverlink.engine import ConsultationEngine, EngineConfig, create_client  # noqa: E402
+from silverlink.resilience import UpstreamUnavailable  # noqa: E402
+
+# .env 파일 로드
+load_dotenv()
+
+
+def read_rows(input_file):
+    """입력 파일 → [{"id", "text", "audio"}] (id는 문자열, 없으면 행 번호)"""
+    with open(input_file, "r", encoding="utf-8-sig") as f:
+        if input_file.suffix.lower() == ".jsonl":
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+
+    rows = []
+    for number, record in enumerate(records, start=1):
+        rows.append({
+            "id": str(record.get("id") or number),
+            "text": (record.get("text") or "").strip(),
+            "audio": (record.get("audio") or "").strip(),
+        })
+    return rows
+
+
+def read_checkpoint(checkpoint_file):
+    """이미 처리한 결과 {id: 결과} (마지막 기록 우선, 잘린 줄은 무시)"""
+    done = {}
+    if not checkpoint_file.exists():
+        return done
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[result["id"]] = result
+    return done
+
+
+def consult(engine, row, use_cache):
+    """한 건 상담 → 결과 레코드 (실패도 레코드로 기록)"""
+    start = time.perf_counter()
+    record = {"id": row["id"], "input": "text" if row["text"] else "audio"}
+    try:
+        if row["text"]:
+            result = engine.consult_text(row["text"], use_cache=use_cache)
+        elif row["audio"]:
+            audio_path = Path(row["audio"])
+            result = engine.consult_audio(
+                audio_path.read_bytes(),
+                mime_type=guess_audio_mime_type(audio_path.name),
+                suffix=audio_path.suffix or ".wav",
+                use_cache=use_cache,
+            )
+        else:
+            raise ValueError("text/audio가 모두 비어 있습니다")
+    except (UpstreamUnavailable, TimeoutError, OSError, ValueError) as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    else:
+        record.update(
+            status="ok" if result.data is not None else "error",
+            source=result.source,
+            model=result.model_name,
+            benefits=[b.get("name") for b in (result.data or {}).get("benefits", [])],
+            dropped=result.dropped,
+            data=result.data,
+        )
+        if result.data is None:
+            record["error"] = "응답을 JSON으로 해석하지 못했습니다"
+            record["raw_text"] = result.raw_text
+    record["elapsed"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SilverLink 상담 일괄 처리")
+    parser.add_argument("input", help="입력 CSV 또는 JSONL")
+    parser.add_argument("output", help="결과 JSON")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 상담 수")
+    parser.add_argument("--rpm", type=float, help="분당 Gemini 요청 수 (기본: GEMINI_RPM)")
+    parser.add_argument("--stub", action="store_true", help="Gemini 대신 로컬 대역 사용")
+    parser.add_argument("--no-cache", action="store_true", help="응답 캐시를 읽거나 쓰지 않음")
+    parser.add_argument("--restart", action="store_true", help="체크포인트를 지우고 처음부터")
+    args = parser.parse_args()
+
+    input_file = Path(args.input)
+    output_file = Path(args.output)
+    checkpoint_file = output_file.with_name(output_file.name + ".checkpoint.jsonl")
+
+    if not input_file.exists():
+        print(f"❌ {input_file} 파일이 없습니다.")
+        return
+
+    client = create_client(args.stub)
+    if client is None:
+        print("❌ 에러: GEMINI_API_KEY가 .env 파일에 설정되지 않았습니다. (--stub으로 대역 사용 가능)")
+        return
+
+    overrides = {}
+    if args.rpm:
+        overrides["requests_per_minute"] = args.rpm
+    config = EngineConfig.from_env(**overrides)
+
+    rows = read_rows(input_file)
+    if args.restart and checkpoint_file.exists():
+        checkpoint_file.unlink()
+    done = read_checkpoint(checkpoint_file)
+    pending = [row for row in rows if done.get(row["id"], {}).get("status") != "ok"]
+
+    print("=" * 60)
+    print("📋 SilverLink 상담 일괄 처리")
+    print("=" * 60)
+    print(f"입력: {input_file} ({len(rows)}건, 남은 건 {len(pending)})")
+    print(f"모델: {'로컬 대역' if args.stub else config.model_name} / 분당 {config.requests_per_minute:g}건 / 동시 {args.workers}건")
+    print("=" * 60)
+
+    engine = ConsultationEngine(config, client)
+    lock = threading.Lock()
+    start = time.perf_counter()
+    try:
+        with open(checkpoint_file, "a", encoding="utf-8") as checkpoint, \
+                ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = [executor.submit(consult, engine, row, not args.no_cache) for row in pending]
+            for count, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                with lock:
+                    checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                done[record["id"]] = record
+                mark = "✅" if record["status"] == "ok" else "❌"
+                print(f"{mark} [{count}/{len(pending)}] {record['id']} "
+                      f"({record.get('source') or record.get('error')}, {record['elapsed']:.2f}s)")
+    finally:
+        engine.shutdown()
+    elapsed = time.perf_counter() - start
+
+    results = [done[row["id"]] for row in rows if row["id"] in done]
+    failed = [r for r in results if r["status"] != "ok"]
+    sources = {}
+    for r in results:
+        if r["status"] == "ok":
+            sources[r["source"]] = sources.get(r["source"], 0) + 1
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print("=" * 60)
+    print(f"완료: 성공 {len(results) - len(failed)} / 실패 {len(failed)} ({elapsed:.1f}s)")
+    print(f"출처: {', '.join(f'{k} {v}' for k, v in sorted(sources.items())) or '-'}")
+    print(f"결과: {output_file}")
+    if failed:
+        print(f"⚠️  실패한 건은 다시 실행하면 이어서 처리합니다 (체크포인트: {checkpoint_file})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+후보 검색(top_k) 성능 확인 (합성 대규모 카탈로그, API 키 불필요)
+
+사용법:
+    python scripts/bench_retrieval.py [--programs 10000] [--queries 200] [--repeats 5] [--tolerance 0.2]
+
+welfare_data.json을 여러 지역/나이 기준으로 복제해 수천~수만 건 카탈로그를 만들고
+프로그램 DB로 거른 후보(allowed) 유무에 따른 top_k 지연을 비교합니다.
+두 경로를 번갈아 --repeats번 재고 각각 가장 빠른 값을 비교합니다. (한 번 재면 GC/스케줄링 잡음이 큼)
+거른 경로가 거르지 않은 경로보다 --tolerance 이상 느리면 종료 코드 1 (배포 전 확인용)
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# 저장소 루트에서 silverlink 패키지를 찾도록
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from silverlink.catalog import WelfareCatalog  # noqa: E402
+from silverlink.datastore import DataSnapshot  # noqa: E402
+from silverlink.eligibility import REGIONS, extract_facts  # noqa: E402
+from silverlink.program_db import ProgramDatabase  # noqa: E402
+from silverlink.retrieval import CatalogRetriever  # noqa: E402
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "welfare_data.json"
+
+QUERIES = [
+    "저는 72살이고 혼자 살고 있어요. 다리가 아파서 거동이 불편합니다.",
+    "부산에 사는 75세인데 치매 검사를 받아보고 싶어요.",
+    "68세 할아버지인데 기초생활수급자예요. 생활비가 부족해요.",
+    "혼자 사는데 겨울에 난방비가 너무 많이 나와요.",
+]
+
+
+def synthetic_catalog(programs):
+    """원본 혜택을 지역/나이 기준을 바꿔 복제한 목록 (이름은 모두 다름)"""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    rows = []
+    while len(rows) < programs:
+        for benefit in base:
+            n = len(rows)
+            region = REGIONS[n % len(REGIONS)]
+            rows.append({
+                **benefit,
+                "name": f"{region} {benefit['name']} {n}",
+                "target": f"{region} 거주 만 {60 + n % 20}세 이상 " + benefit.get("target", ""),
+            })
+            if len(rows) >= programs:
+                break
+    return rows
+
+
+def measure(fn, queries):
+    """질의당 평균 지연 (ms)"""
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SilverLink 후보 검색 성능 확인")
+    parser.add_argument("--programs", type=int, default=10000, help="합성 카탈로그 크기")
+    parser.add_argument("--queries", type=int, default=200, help="측정할 질의 수")
+    parser.add_argument("--top-k", type=int, default=12, help="고를 후보 수")
+    parser.add_argument("--repeats", type=int, default=5, help="경로별 측정 반복 수 (가장 빠른 값 사용)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 지연 증가율")
+    args = parser.parse_args()
+
+    welfare_data = synthetic_catalog(args.programs)
+    retriever = CatalogRetriever(welfare_data)
+    program_db = ProgramDatabase(":memory:")
+    program_db.sync(welfare_data)
+    snapshot = DataSnapshot(
+        version="bench", welfare_data=welfare_data, latest_info={},
+        catalog=WelfareCatalog(welfare_data), prompt_catalog=None, retriever=retriever,
+        engine=None, program_db=program_db, loaded_at=time.time(),
+    )
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+    # 사실 추출은 검색과 무관하므로 미리 (DB 조회는 스냅샷의 후보 집합 캐시를 그대로 거침)
+    facts = {query: extract_facts(query) for query in QUERIES}
+
+    def filtered(query):
+        allowed = snapshot.eligible_positions(facts[query])
+        return retriever.top_k(query, args.top_k, allowed=allowed)
+
+    # 후보 집합은 조건 조합별로 캐시되므로 한 번씩 채운 뒤 측정 (운영 중 상태)
+    for query in QUERIES:
+        filtered(query)
+
+    unfiltered_runs, filtered_runs = [], []
+    for _ in range(max(1, args.repeats)):
+        unfiltered_runs.append(measure(lambda query: retriever.top_k(query, args.top_k), queries))
+        filtered_runs.append(measure(filtered, queries))
+    unfiltered_ms, filtered_ms = min(unfiltered_runs), min(filtered_runs)
+
+    print(f"카탈로그 {len(welfare_data)}건, 질의 {len(queries)}개, top_k={args.top_k}")
+    print(f"  거르지 않음: {unfiltered_ms:.3f}ms/질의")
+    print(f"  DB로 거름:   {filtered_ms:.3f}ms/질의")
+    if filtered_ms > unfiltered_ms * (1 + args.tolerance):
+        print(f"❌ 거른 경로가 {filtered_ms / unfiltered_ms - 1:.0%} 느립니다 (허용 {args.tolerance:.0%})")
+        return 1
+    print("✅ 거른 경로가 거르지 않은 경로보다 느리지 않습니다")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+상담 엔진 부하 테스트 (로컬 Gemini/gTTS 대역, API 키 불필요)
+
+사용법:
+    python scripts/benchmark.py [--requests 200] [--concurrency 8] [--flows text,recording,upload]
+                                [--latency 0.5] [--tokens-per-second 200] [--error-rate 0.02]
+                                [--output bench.json] [--baseline bench_main.json]
+
+화면의 세 가지 흐름을 같은 엔진 코드로 재현합니다.
+    text       텍스트 상담 (스트리밍 설정이면 이벤트를 끝까지 소비) + 음성 안내 합성
+    recording  녹음(WAV) 업로드 → 전사/분석 + 음성 안내 합성
+    upload     음성 파일 업로드 (파일 이름으로 MIME 타입 결정) → 전사/분석 + 음성 안내 합성
+
+결과: 흐름별 p50/p95/p99 지연, 처리량, 요청당 토큰(컨텍스트 캐시 포함), 업로드 크기, 결과 출처(규칙/Gemini/캐시), 최대 메모리
+--baseline을 주면 p95 지연/처리량이 --tolerance 이상 나빠졌을 때 종료 코드 1 (배포 전 확인용)
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 저장소 루트에서 silverlink 패키지를 찾도록
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from silverlink.audio_io import guess_audio_mime_type  # noqa: E402
+from silverlink.engine import ConsultationEngine, EngineConfig  # noqa: E402
+from silverlink.fake_gemini import FakeGenAI  # noqa: E402
+from silverlink.resilience import UpstreamUnavailable  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FLOWS = ("text", "recording", "upload")
+
+# 데모 시나리오 기반 상담 문장 (규칙으로 바로 판정되는 문장과 Gemini가 필요한 문장이 섞임)
+SAMPLE_TEXTS = [
+    "저는 72살이고 혼자 살고 있어요. 다리가 아파서 거동이 불편합니다.",
+    "68세 할아버지인데 기초생활수급자예요. 생활비가 부족해요.",
+    "70살인데 요즘 눈이 침침하고 이가 안 좋아서 밥을 잘 못 먹어요.",
+    "손자가 걱정이에요. 제가 아프면 돌봐줄 사람이 없어요.",
+    "혼자 사는데 겨울에 난방비가 너무 많이 나와요.",
+    "부산에 사는 75세인데 치매 검사를 받아보고 싶어요.",
+    "일을 하고 싶은데 나이가 많아서 써주는 데가 없어요.",
+    "병원비가 너무 많이 나와서 걱정이에요. 무릎 수술을 해야 한대요.",
+]
+
+# 녹음 길이 (초), 16kHz 16bit 모노 WAV
+RECORDING_SECONDS = 8
+RECORDING_RATE = 16000
+
+# upload 흐름에서 올리는 파일 이름
+UPLOAD_FILENAME = "upload.wav"
+
+
+def make_wav(seconds, seed):
+    """잡음 섞인 WAV 바이트 (요청마다 내용이 달라 오디오 캐시에 걸리지 않음)"""
+    rng = random.Random(seed)
+    frames = bytes(rng.getrandbits(8) for _ in range(64)) * (seconds * RECORDING_RATE * 2 // 64)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RECORDING_RATE)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    """nearest-rank 백분위수 (q: 0~100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_flow(engine, flow, index, unique):
+    """흐름 하나 실행 → 결과 출처"""
+    if flow == "text":
+        text = SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]
+        if unique:
+            text = f"{text} (상담 {index})"
+        if engine.config.streaming_responses:
+            result = None
+            for kind, value in engine.stream_text(text):
+                if kind == "result":
+                    result = value
+        else:
+            result = engine.consult_text(text)
+    else:
+        audio = make_wav(RECORDING_SECONDS, index if unique else 0)
+        if flow == "recording":
+            result = engine.consult_audio(audio, mime_type="audio/wav", suffix=".wav")
+        else:
+            # 인코더 없이 만들 수 있는 WAV 파일을 올림 (MIME 타입은 앱처럼 파일 이름으로)
+            result = engine.consult_audio(audio, mime_type=guess_audio_mime_type(UPLOAD_FILENAME), suffix=".wav")
+
+    if result.data is not None:
+        engine.synthesize_speech(result.data)
+    return result.source
+
+
+def run_benchmark(engine, flows, requests, concurrency, unique, warmup):
+    """요청을 흐름별로 번갈아 보내고 [(흐름, 지연 초, 출처 또는 오류 이름)] 반환"""
+    records = []
+    lock = threading.Lock()
+
+    def one(index):
+        flow = flows[index % len(flows)]
+        start = time.perf_counter()
+        try:
+            outcome = run_flow(engine, flow, index, unique)
+        except (UpstreamUnavailable, TimeoutError) as e:
+            outcome = f"error:{type(e).__name__}"
+        elapsed = time.perf_counter() - start
+        if index >= warmup:
+            with lock:
+                records.append((flow, elapsed, outcome))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests + warmup)))
+    return records
+
+
+def summarize(records, wall_seconds, client_stats):
+    """흐름별/전체 지연 통계"""
+    def stats(rows):
+        latencies = [elapsed for _, elapsed, _ in rows]
+        outcomes = {}
+        for _, _, outcome in rows:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        return {
+            "requests": len(rows),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+            "throughput": len(rows) / wall_seconds if wall_seconds else None,
+            "outcomes": outcomes,
+        }
+
+    report = {"all": stats(records)}
+    for flow in sorted({flow for flow, _, _ in records}):
+        report[flow] = stats([r for r in records if r[0] == flow])
+
+    gemini_calls = sum(client_stats["calls"].values())
+    total = len(records) or 1
+    report["tokens"] = {
+        "prompt_per_request": client_stats["prompt_tokens"] / total,
+        "output_per_request": client_stats["output_tokens"] / total,
+        "cached_per_request": client_stats["cached_tokens"] / total,
+        "prompt_per_gemini_call": client_stats["prompt_tokens"] / gemini_calls if gemini_calls else 0,
+        "gemini_calls": gemini_calls,
+        "injected_errors": client_stats["errors"],
+    }
+    uploads = client_stats["uploads"]
+    report["uploads"] = {
+        "count": uploads,
+        "bytes_per_upload": client_stats["upload_bytes"] / uploads if uploads else 0,
+    }
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """기준 결과 대비 나빠진 항목 목록"""
+    regressions = []
+    for flow, current in report.items():
+        before = baseline.get(flow)
+        if not before or "p95" not in current or not before.get("p95"):
+            continue
+        if current["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(f"{flow} p95 {before['p95']:.3f}s → {current['p95']:.3f}s")
+        if before.get("throughput") and current["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{flow} 처리량 {before['throughput']:.2f} → {current['throughput']:.2f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SilverLink 상담 엔진 부하 테스트")
+    parser.add_argument("--requests", type=int, default=120, help="측정할 요청 수")
+    parser.add_argument("--warmup", type=int, default=6, help="측정에서 뺄 첫 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="text,recording,upload 중 선택")
+    parser.add_argument("--latency", type=float, default=0.5, help="Gemini 첫 토큰까지 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="지연 흔들림 (± 초)")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="출력 토큰 속도 (0이면 즉시)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Gemini 오류 주입 비율 (0~1)")
+    parser.add_argument("--error", default="server", choices=["server", "quota", "timeout"], help="주입할 오류 종류")
+    parser.add_argument("--upload-latency", type=float, default=0.2, help="파일 업로드 지연 (초)")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="음성 합성 조각당 지연 (초)")
+    parser.add_argument("--rpm", type=float, default=100000, help="분당 Gemini 요청 수 (기본: 제한 없음)")
+    parser.add_argument("--cache", action="store_true", help="같은 문장 반복 (응답 캐시 적중 경로 측정)")
+    parser.add_argument("--no-context-cache", action="store_true", help="정적 프롬프트 앞부분 컨텍스트 캐시 끄기")
+    parser.add_argument("--no-audio-preprocess", action="store_true", help="업로드 전 음성 전처리(ffmpeg) 끄기")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 악화 비율")
+    args = parser.parse_args()
+
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if not flows or unknown:
+        print(f"❌ 알 수 없는 흐름: {', '.join(sorted(unknown)) or '(없음)'}")
+        return 2
+
+    client = FakeGenAI(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error=args.error,
+        upload_latency=args.upload_latency,
+        tts_latency=args.tts_latency,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # 캐시/DB는 임시 폴더에 (실행마다 같은 조건, 실제 .cache를 건드리지 않음)
+        config = EngineConfig.from_env(
+            data_path=str(ROOT / "welfare_data.json"),
+            latest_path=str(ROOT / "welfare_latest_2025.json"),
+            program_db_path=str(Path(workdir) / "programs.sqlite3"),
+            cache_path=str(Path(workdir) / "cache.sqlite3"),
+            requests_per_minute=args.rpm,
+            burst=max(1, args.concurrency),
+            context_cache=not args.no_context_cache,
+            audio_preprocess=not args.no_audio_preprocess,
+        )
+
+        print("=" * 60)
+        print("⏱️  SilverLink 부하 테스트 (로컬 대역)")
+        print("=" * 60)
+        print(f"흐름: {', '.join(flows)} / 요청 {args.requests}건 (+워밍업 {args.warmup}) / 동시 {args.concurrency}")
+        print(f"대역: 지연 {args.latency}s±{args.jitter}, {args.tokens_per_second:g} tok/s, "
+              f"오류 {args.error_rate:.0%} ({args.error})")
+        print("=" * 60)
+
+        tracemalloc.start()
+        engine = ConsultationEngine(config, client)
+        try:
+            start = time.perf_counter()
+            records = run_benchmark(engine, flows, args.requests, args.concurrency, not args.cache, args.warmup)
+            wall = time.perf_counter() - start
+        finally:
+            engine.shutdown()
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    report = summarize(records, wall, client.stats())
+    report["memory"] = {
+        "python_heap_peak_mb": heap_peak / 1024 / 1024,
+        # 리눅스 ru_maxrss 단위는 KB
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+    }
+    report["settings"] = {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+
+    for flow in ["all"] + [f for f in FLOWS if f in report]:
+        s = report[flow]
+        print(f"[{flow:9}] {s['requests']:4}건  p50 {s['p50']:.3f}s  p95 {s['p95']:.3f}s  "
+              f"p99 {s['p99']:.3f}s  {s['throughput']:.2f} req/s")
+        print(f"            출처: {', '.join(f'{k} {v}' for k, v in sorted(s['outcomes'].items()))}")
+    tokens = report["tokens"]
+    print(f"토큰: 요청당 입력 {tokens['prompt_per_request']:.0f} (캐시 {tokens['cached_per_request']:.0f}) "
+          f"/ 출력 {tokens['output_per_request']:.0f} (Gemini 호출 {tokens['gemini_calls']}회, 주입 오류 {tokens['injected_errors']}회)")
+    if report["uploads"]["count"]:
+        print(f"업로드: {report['uploads']['count']}건, 평균 {report['uploads']['bytes_per_upload'] / 1024:.1f}KB")
+    memory = report["memory"]
+    rss = f", 최대 RSS {memory['max_rss_mb']:.1f}MB" if memory["max_rss_mb"] else ""
+    print(f"메모리: Python 힙 최대 {memory['python_heap_peak_mb']:.1f}MB{rss}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ 기준 대비 {args.tolerance:.0%} 이상 나빠짐:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print("✅ 기준 결과 대비 회귀 없음")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
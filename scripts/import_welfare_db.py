@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+복지 데이터 JSON을 프로그램 DB(SQLite)로 가져오기
+
+사용법:
+    python scripts/import_welfare_db.py [입력 JSON] [출력 DB]
+
+기본값:
+    입력: welfare_data.json
+    출력: welfare_programs.sqlite3
+
+바뀐 사업만 다시 쓰므로 같은 DB에 여러 번 실행해도 됩니다.
+앱에서 DB를 원본으로 쓰려면 .env에 WELFARE_DATA_PATH=welfare_programs.sqlite3
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+# 저장소 루트에서 silverlink 패키지를 찾도록
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from silverlink.program_db import ProgramDatabase  # noqa: E402
+
+
+def main():
+    input_file = Path(sys.argv[1] if len(sys.argv) > 1 else "welfare_data.json")
+    output_file = Path(sys.argv[2] if len(sys.argv) > 2 else "welfare_programs.sqlite3")
+
+    if not input_file.exists():
+        print(f"❌ {input_file} 파일이 없습니다.")
+        return
+
+    with open(input_file, "r", encoding="utf-8") as f:
+        welfare_data = json.load(f)
+
+    db = ProgramDatabase(str(output_file))
+    start = time.perf_counter()
+    added, updated, removed = db.sync(welfare_data)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print("🗄️  복지 프로그램 DB 가져오기")
+    print("=" * 60)
+    print(f"입력: {input_file} ({len(welfare_data)}개)")
+    print(f"출력: {output_file}")
+    print(f"추가 {added} / 수정 {updated} / 삭제 {removed} ({elapsed * 1000:.1f}ms)")
+    print(f"저장된 사업 수: {db.count()}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+SilverLink 핵심 모듈
+
+Streamlit 화면(app.py)과 분리된, 어디서나 import 가능한 로직을 모아둡니다.
+"""
@@ -0,0 +1,147 @@
+"""
+복지 혜택 금액 정규화 (문자열 → 최소/최대 금액, 지급 주기)
+
+welfare_data.json과 2025년 최신 정보의 amount는 "월 최대 34만 2,510원",
+"가구원 수에 따라 연 9만~36만원", "무료 또는 식사당 1,000~3,000원"처럼 사람이 읽는
+문장입니다. 데이터 로드 시 한 번씩 숫자로 바꿔두고 비교/정렬에 사용합니다.
+
+- 금액: "34만 2,510원", "1만 1천원", "3,000원", 범위 "50~150만원"(앞 숫자는 뒤 단위를 따름)
+- 주기: 금액 앞의 "월"/"연" (다음 주기 표시가 나올 때까지 유지), 없으면 일회성/불명
+- 월 환산: 월 금액은 그대로, 연 금액은 12로 나눔 (주기를 모르면 비교하지 않음)
+- 같은 문자열은 다시 파싱하지 않음 (데이터 갱신 때도 바뀐 문자열만 계산)
+
+AmountTable은 카탈로그 전체 최대 금액을 열(array) 단위로 보관해
+원본 데이터와 최신 정보의 금액 불일치(갱신 누락) 확인을 열 한 번 훑기로 처리합니다.
+"""
+
+import math
+import re
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+
+# 금액 항목
+# - start: 범위의 앞 숫자 ("50~150만원"의 50, 단위는 뒤 금액을 따름)
+# - man/rest: "34만 2,510원", "1만 1천원", "32만원", "9만" (범위 앞쪽은 원 생략)
+# - won: "3,000원", "5천원"
+_TERM = re.compile(
+    r"(?P<period>(?<![가-힣])(?:월|연))\s*(?:최대|약)?\s*(?=\d)"
+    r"|(?P<start>\d[\d,]*)\s*[~∼]\s*(?=(?:최대\s*|약\s*)?\d)"
+    r"|(?P<man>\d[\d,]*)\s*만\s*(?:(?P<rest>\d[\d,]*)\s*(?:(?P<rest_cheon>천)\s*원?|원))?\s*원?"
+    r"|(?P<won>\d[\d,]*)\s*(?P<cheon>천)?\s*원"
+)
+_FREE = re.compile(r"무료|전액")
+
+# 주기 → 월 환산 배수
+PERIOD_MONTHS = {"월": 1.0, "연": 12.0}
+
+# 최신 정보와 원본 금액이 이 비율 이상 다르면 갱신 누락으로 봄
+STALE_TOLERANCE = 0.01
+
+_MISSING = float("nan")
+
+
+@dataclass(frozen=True)
+class Amount:
+    """정규화된 금액 (원 단위, 알 수 없으면 None)"""
+    text: str
+    values: tuple = ()            # 등장 순서대로의 금액 (원)
+    min_won: int = None
+    max_won: int = None
+    period: str = None            # 첫 금액의 주기 ("월"/"연", 일회성·불명이면 None)
+    monthly_min: float = None     # 주기를 아는 금액만 월 환산
+    monthly_max: float = None
+    free: bool = False            # "무료", "전액 지원" 포함
+
+    def __str__(self):
+        return self.text
+
+
+def _number(text):
+    return int(text.replace(",", "")) if text else 0
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(text):
+    """금액 문자열 → Amount (같은 문자열은 캐시)"""
+    text = text or ""
+    values, monthly = [], []
+    first_period = None
+    period = None
+    pending_start = None
+
+    for match in _TERM.finditer(text):
+        if match.group("period"):
+            period = match.group("period")
+            continue
+        if match.group("start"):
+            pending_start = _number(match.group("start"))
+            continue
+
+        if match.group("man"):
+            unit = 10000
+            value = _number(match.group("man")) * unit
+            rest = _number(match.group("rest"))
+            value += rest * 1000 if match.group("rest_cheon") else rest
+        else:
+            unit = 1000 if match.group("cheon") else 1
+            value = _number(match.group("won")) * unit
+
+        found = [value] if pending_start is None else [pending_start * unit, value]
+        pending_start = None
+        if first_period is None and not values:
+            first_period = period
+        values.extend(found)
+        if period:
+            monthly.extend(v / PERIOD_MONTHS[period] for v in found)
+
+    return Amount(
+        text=text,
+        values=tuple(values),
+        min_won=min(values) if values else None,
+        max_won=max(values) if values else None,
+        period=first_period,
+        monthly_min=min(monthly) if monthly else None,
+        monthly_max=max(monthly) if monthly else None,
+        free=bool(_FREE.search(text)),
+    )
+
+
+def _column(values):
+    """None은 NaN으로 채운 실수 열"""
+    return array("d", (_MISSING if v is None else float(v) for v in values))
+
+
+class AmountTable:
+    """카탈로그 전체 금액 열 (원본 데이터 / 최신 정보, 데이터 버전당 1회 생성)"""
+
+    def __init__(self, welfare_data, latest_info=None):
+        latest_info = latest_info or {}
+        self.names = tuple(b["name"] for b in welfare_data)
+        self.base = tuple(parse_amount(b.get("amount", "")) for b in welfare_data)
+        self.latest = tuple(
+            parse_amount(latest_info[name]["amount"])
+            if name in latest_info and "amount" in latest_info[name] else None
+            for name in self.names
+        )
+
+        self.base_max = _column(a.max_won for a in self.base)
+        self.latest_max = _column(a.max_won if a else None for a in self.latest)
+
+    def __len__(self):
+        return len(self.names)
+
+    def stale(self, tolerance=STALE_TOLERANCE):
+        """
+        최신 정보와 원본 데이터의 최대 금액이 다른 혜택
+        [(이름, 원본 금액 문자열, 최신 금액 문자열, 변화율)], 변화율이 큰 순
+        """
+        changed = []
+        for i, (base, latest) in enumerate(zip(self.base_max, self.latest_max)):
+            if math.isnan(base) or math.isnan(latest) or base == 0:
+                continue
+            ratio = (latest - base) / base
+            if abs(ratio) > tolerance:
+                changed.append((self.names[i], self.base[i].text, self.latest[i].text, round(ratio, 4)))
+        changed.sort(key=lambda item: -abs(item[3]))
+        return changed
@@ -0,0 +1,235 @@
+"""
+SilverLink HTTP API (콜센터 IVR, 키오스크 등 외부 연동용)
+
+Streamlit 화면과 같은 상담 엔진(ConsultationEngine)을 비동기 HTTP 서비스로 제공합니다.
+엔진은 워커 프로세스당 하나를 시작할 때 만들어 모든 요청이 공유하므로
+(Gemini 클라이언트 연결, 데이터 스냅샷, 응답 캐시, 입장 제어) 요청마다 초기화 비용이 없습니다.
+
+실행:
+    pip install -r requirements-api.txt
+    python -m silverlink.api                  # API_HOST/API_PORT/API_WORKERS 사용
+    uvicorn silverlink.api:app --workers 4    # 직접 실행
+
+엔드포인트:
+    GET  /health                       데이터 버전, Gemini 서킷 상태, 대기열
+    POST /v1/consult/text              {"text": "..."} → 상담 결과 JSON
+    POST /v1/consult/text/stream       같은 요청, 인사말/혜택을 도착하는 대로 NDJSON 한 줄씩
+    POST /v1/consult/audio             본문 = 음성 파일 (Content-Type: audio/wav 등)
+    POST /v1/speech                    {"data": 상담 결과} 또는 {"text": "..."} → MP3
+    GET  /metrics                      단계별 시간/캐시/토큰 지표 (Prometheus 텍스트 형식)
+
+엔진 호출은 블로킹이므로 스레드 풀에서 실행해 이벤트 루프를 막지 않습니다.
+"""
+
+import contextvars
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from silverlink.audio_io import AUDIO_MIME_TYPES
+from silverlink.budget import BudgetExceeded
+from silverlink.engine import SOURCE_UNPARSED, ConsultationEngine, EngineConfig, create_client
+from silverlink.orchestrator import StageTimeout
+from silverlink.resilience import UpstreamUnavailable
+from silverlink.telemetry import METRICS, finish_trace, start_trace
+
+# .env 파일 로드
+load_dotenv()
+
+# 음성 요청 본문 최대 크기 (녹음 몇 분 분량)
+MAX_AUDIO_BYTES = int(os.getenv("API_MAX_AUDIO_BYTES", str(20 * 1024 * 1024)))
+
+# MIME 타입 → 업로드 파일 확장자
+AUDIO_SUFFIXES = {mime: suffix for suffix, mime in reversed(list(AUDIO_MIME_TYPES.items()))}
+
+
+class ConsultRequest(BaseModel):
+    text: str
+    use_cache: bool = True
+
+
+class SpeechRequest(BaseModel):
+    data: Optional[dict] = None    # 상담 결과 (인사말 → 혜택 → 격려 순서로 읽음)
+    text: Optional[str] = None     # 또는 읽을 문장
+
+
+def consultation_json(result):
+    """Consultation → 응답 JSON"""
+    return {
+        "source": result.source,
+        "model": result.model_name,
+        "data": result.data,
+        "dropped": result.dropped,
+    }
+
+
+def _raise_for(result):
+    if result.source == SOURCE_UNPARSED:
+        raise HTTPException(502, detail="AI 응답을 JSON으로 해석하지 못했습니다")
+
+
+def _traced_call(flow, fn, *args, **kwargs):
+    """작업 스레드 안에서 요청 기록을 시작/종료 (단계 시간이 같은 요청에 모이도록)"""
+    trace = start_trace(flow)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        finish_trace(trace)
+
+
+def _in_context(context, iterator):
+    """
+    반복 한 단계씩을 같은 컨텍스트에서 실행
+    StreamingResponse는 단계마다 다른 스레드(새 컨텍스트 복사본)에서 next()를 부르므로
+    그대로 두면 요청 기록이 첫 단계 뒤에 사라집니다.
+    """
+    while True:
+        try:
+            yield context.run(next, iterator)
+        except StopIteration:
+            return
+
+
+async def _run(flow, fn, *args, **kwargs):
+    """엔진 호출을 스레드 풀에서 실행하고 장애를 HTTP 상태로 변환"""
+    try:
+        return await run_in_threadpool(_traced_call, flow, fn, *args, **kwargs)
+    except BudgetExceeded as e:
+        raise HTTPException(429, detail=str(e))
+    except UpstreamUnavailable:
+        raise HTTPException(503, detail="AI 서버가 일시적으로 불안정합니다")
+    except StageTimeout as e:
+        raise HTTPException(504, detail=f"시간 초과: {e}")
+
+
+def create_app(engine=None):
+    """API 앱 생성 (engine이 없으면 시작할 때 환경 변수 설정으로 만듦)"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        owned = engine is None
+        if owned:
+            client = create_client()
+            if client is None:
+                raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+            app.state.engine = ConsultationEngine(EngineConfig.from_env(), client)
+        else:
+            app.state.engine = engine
+        try:
+            yield
+        finally:
+            if owned:
+                app.state.engine.shutdown()
+
+    app = FastAPI(title="SilverLink API", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health(request: Request):
+        return await run_in_threadpool(request.app.state.engine.status)
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/v1/consult/text")
+    async def consult_text(body: ConsultRequest, request: Request):
+        if not body.text.strip():
+            raise HTTPException(422, detail="상담 내용이 비어 있습니다")
+        result = await _run("text", request.app.state.engine.consult_text, body.text, use_cache=body.use_cache)
+        _raise_for(result)
+        return consultation_json(result)
+
+    @app.post("/v1/consult/text/stream")
+    async def consult_text_stream(body: ConsultRequest, request: Request):
+        if not body.text.strip():
+            raise HTTPException(422, detail="상담 내용이 비어 있습니다")
+        events = request.app.state.engine.stream_text(body.text, use_cache=body.use_cache)
+
+        def lines():
+            # StreamingResponse가 동기 반복자를 스레드 풀에서 돌림 (요청 기록은 /v1/consult/text와 같은 "text")
+            context = contextvars.copy_context()
+            trace = context.run(start_trace, "text")
+            try:
+                for kind, value in _in_context(context, events):
+                    if kind == "result":
+                        value = consultation_json(value)
+                    yield json.dumps({"event": kind, "data": value}, ensure_ascii=False) + "\n"
+            except (UpstreamUnavailable, StageTimeout) as e:
+                yield json.dumps({"event": "error", "data": str(e)}, ensure_ascii=False) + "\n"
+            except Exception:
+                # 응답 헤더(200)는 이미 보냈으므로 상태 코드 대신 마지막 줄로 알림
+                yield json.dumps({"event": "error", "data": "상담 처리 중 오류가 발생했습니다"}, ensure_ascii=False) + "\n"
+            finally:
+                context.run(events.close)
+                context.run(finish_trace, trace)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/v1/consult/audio")
+    async def consult_audio(request: Request, use_cache: bool = True):
+        audio_bytes = await request.body()
+        if not audio_bytes:
+            raise HTTPException(422, detail="음성 파일이 비어 있습니다")
+        if len(audio_bytes) > MAX_AUDIO_BYTES:
+            raise HTTPException(413, detail="음성 파일이 너무 큽니다")
+        mime_type = request.headers.get("content-type", "audio/wav").split(";")[0].strip()
+        if mime_type not in AUDIO_SUFFIXES:
+            raise HTTPException(415, detail=f"지원하지 않는 형식입니다: {mime_type}")
+
+        result = await _run(
+            "audio",
+            request.app.state.engine.consult_audio,
+            audio_bytes,
+            mime_type=mime_type,
+            suffix=AUDIO_SUFFIXES[mime_type],
+            use_cache=use_cache,
+        )
+        _raise_for(result)
+        return consultation_json(result)
+
+    @app.post("/v1/speech")
+    async def speech(body: SpeechRequest, request: Request):
+        engine = request.app.state.engine
+        if body.data is not None:
+            audio = await _run("speech", engine.synthesize_speech, body.data)
+        elif body.text and body.text.strip():
+            pipeline = engine.speech_pipeline()
+            pipeline.submit(body.text)
+            audio = await _run("speech", pipeline.audio_bytes, timeout=engine.config.stage_timeouts["tts"])
+        else:
+            raise HTTPException(422, detail="data 또는 text가 필요합니다")
+        if not audio:
+            # 이모지/기호만 있어 TTS 정리 후 읽을 조각이 없음
+            raise HTTPException(422, detail="읽을 수 있는 문장이 없습니다")
+        return Response(audio, media_type="audio/mpeg")
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    import uvicorn
+
+    workers = int(os.getenv("API_WORKERS", "1"))
+    uvicorn.run(
+        "silverlink.api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=workers,
+        # 연동 서버가 연결을 재사용하도록 유휴 연결을 잠시 유지
+        timeout_keep_alive=int(os.getenv("API_KEEPALIVE", "30")),
+        limit_concurrency=int(os.getenv("API_MAX_CONNECTIONS", "0")) or None,
+    )
+
+
+if __name__ == "__main__":
+    main()
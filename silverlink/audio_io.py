@@ -0,0 +1,56 @@
+"""
+오디오 업로드 입출력 (세션별 충돌 없는 처리)
+
+모든 세션이 같은 temp_audio.mp3 / temp_recorded_audio.wav 경로에 쓰면
+동시 사용자끼리 파일을 덮어쓸 수 있습니다.
+- 가능하면 메모리(BytesIO)에서 바로 genai.upload_file로 전송
+- SDK가 파일 객체를 지원하지 않으면 요청마다 고유한 임시 파일을 만들고
+  업로드가 끝나면 바로 삭제
+"""
+
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+# 업로드 파일 확장자 → MIME 타입
+AUDIO_MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+}
+
+
+def guess_audio_mime_type(filename, default="audio/wav"):
+    extension = os.path.splitext(filename or "")[1].lower()
+    return AUDIO_MIME_TYPES.get(extension, default)
+
+
+@contextmanager
+def temporary_audio_file(audio_bytes, suffix=".wav"):
+    """고유한 임시 파일에 오디오를 쓰고, 블록이 끝나면 삭제"""
+    fd, path = tempfile.mkstemp(prefix="silverlink_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio_bytes)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def upload_audio(genai_module, audio_bytes, mime_type, suffix=".wav"):
+    """
+    오디오 바이트를 Gemini File API에 업로드
+    메모리 스트림 업로드를 먼저 시도하고, 지원하지 않는 SDK 버전이면 임시 파일 경유
+    """
+    try:
+        return genai_module.upload_file(io.BytesIO(audio_bytes), mime_type=mime_type)
+    except (TypeError, AttributeError):
+        # 구버전 SDK: 경로만 지원
+        with temporary_audio_file(audio_bytes, suffix=suffix) as path:
+            return genai_module.upload_file(path=path, mime_type=mime_type)
@@ -0,0 +1,109 @@
+"""
+업로드 전 음성 전처리 (ffmpeg)
+
+st.audio_input 녹음은 44.1/48kHz WAV 그대로 올라가고, 어르신 말씀에는 앞뒤 침묵과
+긴 멈춤이 많아 업로드 시간과 오디오 토큰(초당 과금)이 불필요하게 늘어납니다.
+업로드 직전에 ffmpeg로 한 번 변환합니다. (scripts/age_voice.py와 같은 방식으로 호출)
+
+- 침묵 제거: silenceremove로 앞뒤 침묵을 자르고, 중간의 긴 멈춤은 짧게 줄임 (음량 기준 음성 구간 검출)
+- 모노 다운믹스 + 16kHz 리샘플링 (음성 인식에는 충분한 음질)
+- Opus 저비트레이트 인코딩 (OGG, 기본 24kbps, 음성 통화용 설정)
+- ffmpeg가 없거나 변환이 실패/무의미하면(더 커지거나 거의 비면) 원본 그대로 업로드
+
+캐시 키는 원본 바이트로 만들므로 같은 녹음은 변환 없이 캐시에서 바로 응답합니다.
+"""
+
+import subprocess
+from dataclasses import dataclass
+
+from silverlink.audio_io import temporary_audio_file
+
+# 변환 결과가 이보다 작으면 (침묵만 남은 경우 등) 원본 사용
+MIN_OUTPUT_BYTES = 2000
+
+OUTPUT_MIME_TYPE = "audio/ogg"
+OUTPUT_SUFFIX = ".ogg"
+
+
+def check_ffmpeg():
+    """ffmpeg 설치 확인"""
+    try:
+        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+
+def silence_filter(threshold_db=-45, keep_pause=0.3, max_pause=0.7):
+    """
+    침묵 제거 필터
+    앞부분 침묵은 모두 자르고, max_pause초보다 긴 멈춤(끝부분 포함)은 keep_pause초만 남김
+    """
+    return (
+        "highpass=f=80,"
+        f"silenceremove=start_periods=1:start_threshold={threshold_db}dB:start_silence=0.1:"
+        f"stop_periods=-1:stop_threshold={threshold_db}dB:stop_duration={max_pause}:stop_silence={keep_pause}"
+    )
+
+
+@dataclass(frozen=True)
+class PreparedAudio:
+    """업로드할 오디오 (전처리하지 않았으면 원본)"""
+    data: bytes
+    mime_type: str
+    suffix: str
+    original_bytes: int
+    processed: bool
+
+    @property
+    def saved_bytes(self):
+        return self.original_bytes - len(self.data)
+
+
+class AudioPreprocessor:
+    """업로드 전 침묵 제거/모노/16kHz/Opus 변환 (ffmpeg가 없으면 원본 그대로)"""
+
+    def __init__(self, enabled=True, sample_rate=16000, bitrate="24k", silence_db=-45, timeout=20.0):
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.silence_db = silence_db
+        self.timeout = timeout
+        self.available = enabled and check_ffmpeg()
+        self.last_error = None
+
+    def command(self, input_path):
+        return [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-i', str(input_path),
+            '-af', silence_filter(self.silence_db),
+            '-ac', '1',
+            '-ar', str(self.sample_rate),
+            '-c:a', 'libopus',
+            '-b:a', self.bitrate,
+            '-application', 'voip',
+            '-f', 'ogg',
+            'pipe:1',
+        ]
+
+    def prepare(self, audio_bytes, mime_type, suffix=".wav"):
+        """원본 오디오 → PreparedAudio (변환 실패 시 원본)"""
+        original = PreparedAudio(audio_bytes, mime_type, suffix, len(audio_bytes), False)
+        if not self.available:
+            return original
+
+        try:
+            with temporary_audio_file(audio_bytes, suffix=suffix) as path:
+                result = subprocess.run(
+                    self.command(path), capture_output=True, check=True, timeout=self.timeout
+                )
+        except subprocess.CalledProcessError as e:
+            self.last_error = e.stderr.decode("utf-8", "replace").strip()[-500:]
+            return original
+        except (subprocess.TimeoutExpired, OSError) as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return original
+
+        converted = result.stdout
+        if len(converted) < MIN_OUTPUT_BYTES or len(converted) >= len(audio_bytes):
+            return original
+        return PreparedAudio(converted, OUTPUT_MIME_TYPE, OUTPUT_SUFFIX, len(audio_bytes), True)
@@ -0,0 +1,262 @@
+"""
+토큰/비용 계정과 예산
+
+프롬프트는 대부분 카탈로그 표와 지시문(추천 예시 포함)이 차지하는데,
+요청마다 입력/출력 토큰이 얼마인지, 하루에 얼마나 쓰는지 알 수 없었습니다.
+
+- TokenCounter: 보내기 전 프롬프트 토큰 수 (로컬 추정, 선택적으로 count_tokens 결과를 캐시해 사용)
+- fit_prompt(): 요청당 예산을 넘으면 추천 예시 → 순위가 낮은 후보 순서로 빼서 프롬프트를 줄임
+- TokenLedger: 날짜·모델별 실제 사용량(usage_metadata)과 추정 비용 (SQLite, 여러 프로세스 공유)
+- TokenBudget: 요청당/하루 예산 확인, 넘으면 BudgetExceeded
+  (UpstreamUnavailable의 하위 클래스라 기존 장애 처리처럼 규칙 결과로 대신 안내)
+
+예산 0은 제한 없음입니다. 장부 오류는 상담을 막지 않도록 "사용량 0"으로 처리합니다.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from silverlink.prompts import estimate_tokens
+from silverlink.resilience import UpstreamUnavailable
+from silverlink.response_cache import DEFAULT_CACHE_PATH, content_digest
+from silverlink.telemetry import count_cache
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력) - 추정 비용 표시용
+MODEL_PRICES = {
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+
+# 컨텍스트 캐시에서 읽은 입력 토큰의 가격 비율 (입력 가격 대비)
+CACHED_INPUT_RATIO = 0.25
+
+# count_tokens 결과 캐시 크기 (프롬프트 수)
+COUNT_CACHE_ENTRIES = 1024
+
+
+# 예산 범위 (scope) → 표시 이름
+BUDGET_SCOPES = {"request": "요청당", "day": "하루"}
+
+
+class BudgetExceeded(UpstreamUnavailable):
+    """토큰 예산 초과 (Gemini를 호출하지 않고 규칙 기반 답변으로 대체)"""
+
+    def __init__(self, scope, tokens, limit):
+        super().__init__(f"{BUDGET_SCOPES[scope]} 토큰 예산 초과 ({tokens} > {limit})")
+        self.scope = scope
+        self.tokens = tokens
+        self.limit = limit
+
+
+def estimate_cost(model_name, prompt_tokens, output_tokens, cached_tokens=0):
+    """추정 비용 (USD), 가격을 모르는 모델은 0 (cached_tokens는 prompt_tokens 중 캐시에서 읽은 양)"""
+    input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    input_cost = (prompt_tokens - cached_tokens) * input_price + cached_tokens * input_price * CACHED_INPUT_RATIO
+    return (input_cost + output_tokens * output_price) / 1_000_000
+
+
+def _text_parts(contents):
+    """프롬프트에서 문자열 부분만 (업로드한 오디오 파일 등은 제외)"""
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(part for part in contents if isinstance(part, str))
+    return contents if isinstance(contents, str) else ""
+
+
+class TokenCounter:
+    """
+    프롬프트 토큰 수 세기
+    exact=True이고 모델이 count_tokens를 제공하면 정확한 값을 받아 내용 해시로 캐시합니다.
+    (같은 카탈로그의 음성 프롬프트, 같은 질문 등은 다시 묻지 않음) 실패하면 로컬 추정을 씁니다.
+    """
+
+    def __init__(self, model=None, exact=False, max_entries=COUNT_CACHE_ENTRIES):
+        self.model = model
+        self.exact = exact and hasattr(model, "count_tokens")
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, contents):
+        text = _text_parts(contents)
+        if not self.exact:
+            return estimate_tokens(text)
+
+        key = content_digest(text.encode("utf-8"))
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+        count_cache("count_tokens", tokens is not None)
+        if tokens is not None:
+            return tokens
+
+        try:
+            tokens = self.model.count_tokens(text).total_tokens
+        except Exception:
+            return estimate_tokens(text)  # 계산 실패 시 로컬 추정 (캐시하지 않음)
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+@dataclass(frozen=True)
+class PromptFit:
+    """예산에 맞춘 프롬프트"""
+    prompt: str
+    catalog: object     # 실제로 프롬프트에 들어간 카탈로그 (응답 스키마도 이것으로)
+    tokens: int         # 프롬프트 토큰 수 (줄였으면 보정한 추정치)
+    examples: bool      # 추천 예시 포함 여부
+    trimmed: int        # 뺀 후보 수
+
+
+def fit_prompt(render, catalog, counter, max_tokens=0, min_rows=None):
+    """
+    render(catalog, examples)로 만든 프롬프트(문자열 또는 [앞부분, 뒷부분])를 max_tokens 안에 맞춤
+    먼저 추천 예시를 빼고, 그래도 넘으면 catalog 뒤쪽(순위가 낮은) 후보부터 min_rows개까지 뺍니다.
+    첫 프롬프트만 counter로 세고, 이후는 그 값으로 보정한 로컬 추정치로 계산합니다. (count_tokens 반복 호출 방지)
+    """
+    prompt = render(catalog, True)
+    tokens = counter.count(prompt)
+    if not max_tokens or tokens <= max_tokens:
+        return PromptFit(prompt, catalog, tokens, True, 0)
+
+    scale = tokens / max(1, estimate_tokens(_text_parts(prompt)))
+    floor = catalog.count if min_rows is None else min(min_rows, catalog.count)
+    fitted, rows, examples = catalog, catalog.count, True
+    while tokens > max_tokens:
+        if examples:
+            examples = False
+        elif rows > floor:
+            rows -= 1
+            fitted = catalog.subset(range(rows))
+        else:
+            break  # 더 줄일 수 없음 (호출한 쪽에서 예산 초과 처리)
+        prompt = render(fitted, examples)
+        tokens = math.ceil(estimate_tokens(_text_parts(prompt)) * scale)
+    return PromptFit(prompt, fitted, tokens, examples, catalog.count - rows)
+
+
+def _today():
+    return time.strftime("%Y-%m-%d")
+
+
+class TokenLedger:
+    """날짜·모델별 토큰 사용량 장부 (SQLite, 응답 캐시와 같은 파일 사용 가능)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS token_usage (
+                   day TEXT NOT NULL,
+                   model TEXT NOT NULL,
+                   requests INTEGER NOT NULL,
+                   prompt_tokens INTEGER NOT NULL,
+                   output_tokens INTEGER NOT NULL,
+                   cached_tokens INTEGER NOT NULL DEFAULT 0,
+                   PRIMARY KEY (day, model)
+               )"""
+        )
+        try:
+            # 캐시 토큰 열이 없던 장부 파일
+            self._conn.execute("ALTER TABLE token_usage ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass  # 이미 있음
+        self._conn.commit()
+
+    def record(self, model_name, prompt_tokens, output_tokens, cached_tokens=0, day=None):
+        try:
+            with self._lock:
+                self._conn.execute(
+                    """INSERT INTO token_usage (day, model, requests, prompt_tokens, output_tokens, cached_tokens)
+                       VALUES (?, ?, 1, ?, ?, ?)
+                       ON CONFLICT(day, model) DO UPDATE SET
+                           requests = requests + 1,
+                           prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                           output_tokens = output_tokens + excluded.output_tokens,
+                           cached_tokens = cached_tokens + excluded.cached_tokens""",
+                    (day or _today(), model_name or "", prompt_tokens, output_tokens, cached_tokens),
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            pass  # 장부 기록 실패는 무시
+
+    def usage(self, day=None):
+        """{모델: {"requests", "prompt_tokens", "output_tokens", "cached_tokens", "cost_usd"}}"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT model, requests, prompt_tokens, output_tokens, cached_tokens FROM token_usage WHERE day = ?",
+                    (day or _today(),),
+                ).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {
+            model: {
+                "requests": requests,
+                "prompt_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "cached_tokens": cached_tokens,
+                "cost_usd": round(estimate_cost(model, prompt_tokens, output_tokens, cached_tokens), 4),
+            }
+            for model, requests, prompt_tokens, output_tokens, cached_tokens in rows
+        }
+
+    def total_tokens(self, day=None):
+        return sum(row["prompt_tokens"] + row["output_tokens"] for row in self.usage(day).values())
+
+
+class TokenBudget:
+    """요청당/하루 토큰 예산 (0이면 제한 없음)"""
+
+    def __init__(self, ledger, per_request=0, per_day=0):
+        self.ledger = ledger
+        self.per_request = per_request
+        self.per_day = per_day
+
+    def check(self, prompt_tokens):
+        """보내기 전 확인: 줄인 프롬프트도 요청당 예산을 넘거나 오늘 남은 예산이 없으면 BudgetExceeded"""
+        if self.per_request and prompt_tokens > self.per_request:
+            raise BudgetExceeded("request", prompt_tokens, self.per_request)
+        if self.per_day:
+            used = self.ledger.total_tokens()
+            if used + prompt_tokens > self.per_day:
+                raise BudgetExceeded("day", used + prompt_tokens, self.per_day)
+
+    def record(self, usage_metadata, model_name):
+        """응답의 실제 사용량 기록 (없으면 무시)"""
+        if usage_metadata is None:
+            return
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage_metadata, "candidates_token_count", 0) or 0
+        cached_tokens = getattr(usage_metadata, "cached_content_token_count", 0) or 0
+        if prompt_tokens or output_tokens:
+            self.ledger.record(model_name, prompt_tokens, output_tokens, cached_tokens)
+
+    def snapshot(self):
+        """오늘 사용량과 예산 (운영 상태 표시용)"""
+        usage = self.ledger.usage()
+        used = sum(row["prompt_tokens"] + row["output_tokens"] for row in usage.values())
+        return {
+            "day": _today(),
+            "used_tokens": used,
+            "per_day": self.per_day,
+            "per_request": self.per_request,
+            "cost_usd": round(sum(row["cost_usd"] for row in usage.values()), 4),
+            "models": usage,
+        }
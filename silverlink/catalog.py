@@ -0,0 +1,110 @@
+"""
+복지 혜택 카탈로그 (데이터 버전당 한 번 만드는 색인)
+
+응답을 처리할 때마다 {이름: 혜택} 딕셔너리를 다시 만들고, 최신 정보와
+유효한 이름 목록을 따로 찾던 것을 한 객체로 모았습니다.
+
+- 이름 색인: O(1) 조회
+- 이름 정규화: LLM이 띄어쓰기·문장부호·괄호 설명을 바꿔 써도 같은 혜택으로 인식
+  예: "노인 틀니지원", "노인-틀니 지원", "기초연금(월 최대 32만원)"
+- 그래도 없으면 자모 편집 거리로 근사 매칭 (신뢰도가 충분할 때만, silverlink.fuzzy)
+- 금액 열(silverlink.amounts): 최신 정보와 금액이 다른 혜택
+- 화면에 쓰는 최신 정보 안내 문자열을 미리 만들어 둠
+"""
+
+import re
+import unicodedata
+
+from silverlink.amounts import AmountTable
+from silverlink.fuzzy import FuzzyNameMatcher
+from silverlink.response_cache import data_hash
+
+_NAME_NOISE = re.compile(r"[\W_]+")
+_PARENTHETICAL = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+
+def normalize_name(name):
+    """비교용 이름 (공백·문장부호 제거, 전각/반각 통일)"""
+    return _NAME_NOISE.sub("", unicodedata.normalize("NFKC", str(name or ""))).lower()
+
+
+class WelfareCatalog:
+    """복지 혜택 데이터의 이름 색인, 최신 정보 안내 문자열"""
+
+    def __init__(self, welfare_data, latest_info=None, fuzzy_min_confidence=0.8):
+        self.items = tuple(welfare_data)
+        self.version = data_hash(self.items)
+        self.names = tuple(b["name"] for b in self.items)
+        self.name_set = frozenset(self.names)
+
+        self._by_name = {b["name"]: b for b in self.items}
+        self._position = {}
+        for i, name in enumerate(self.names):
+            self._position.setdefault(name, i)
+        self._by_normalized = {}
+        for name in self.names:
+            self._by_normalized.setdefault(normalize_name(name), name)
+        self._fuzzy = FuzzyNameMatcher(self._by_normalized, min_confidence=fuzzy_min_confidence)
+
+        # 최신 정보는 카탈로그에 있는 혜택만 (이름이 다른 항목은 무시)
+        self.latest = {
+            name: info for name, info in (latest_info or {}).items() if name in self._by_name
+        }
+        self.amounts = AmountTable(self.items, self.latest)
+        self._latest_lines = {name: self._latest_display(info) for name, info in self.latest.items()}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, name):
+        return self.resolve_name(name) is not None
+
+    # ---- 조회 ----
+
+    def match_name(self, name):
+        """
+        LLM이 쓴 혜택 이름 → (카탈로그 이름 또는 None, 신뢰도 0~1)
+        정확/정규화 일치는 1.0, 근사 매칭은 자모 편집 거리 기반 신뢰도
+        """
+        if name in self._by_name:
+            return name, 1.0
+        key = normalize_name(name)
+        if key in self._by_normalized:
+            return self._by_normalized[key], 1.0
+        # 괄호 안 설명을 붙인 경우: "기초연금(월 최대 32만원)"
+        stripped = normalize_name(_PARENTHETICAL.sub("", str(name or "")))
+        if stripped in self._by_normalized:
+            return self._by_normalized[stripped], 1.0
+        return self._fuzzy.match(stripped or key)
+
+    def resolve_name(self, name):
+        """LLM이 쓴 혜택 이름을 카탈로그의 정확한 이름으로 (없으면 None)"""
+        if name in self._by_name:
+            return name
+        return self.match_name(name)[0]
+
+    def get(self, name):
+        """이름으로 원본 혜택 조회 (정규화 포함)"""
+        resolved = self.resolve_name(name)
+        return self._by_name[resolved] if resolved is not None else None
+
+    def positions(self, names):
+        """이름 집합 → 데이터 순서의 번호 목록 (카탈로그에 없는 이름은 무시)"""
+        return sorted(self._position[name] for name in names if name in self._position)
+
+    # ---- 표시용 문자열 ----
+
+    def latest_lines(self, name):
+        """(최신 금액 안내, 출처/비고 안내 또는 None), 최신 정보가 없으면 None"""
+        return self._latest_lines.get(self.resolve_name(name))
+
+    # ---- 내부 ----
+
+    @staticmethod
+    def _latest_display(info):
+        amount_line = f"✨ **2025년 최신 정보**: {info['amount']}"
+        note_line = f"📌 {info['note']} (출처: {info['source']})" if "note" in info else None
+        return amount_line, note_line
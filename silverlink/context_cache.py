@@ -0,0 +1,186 @@
+"""
+Gemini 컨텍스트 캐시 (정적 프롬프트 앞부분)
+
+지시문, 추천 예시, 응답 형식은 모든 요청에서 같은 바이트인데도
+요청마다 다시 보내고 모델이 다시 처리(prefill)합니다. 이 앞부분(StaticPrefix)을
+Gemini의 캐시 콘텐츠(cachedContents)로 한 번 등록하고, 이후 요청은 캐시를 참조하며
+요청별 부분만 보냅니다. → 입력 토큰 비용과 첫 토큰까지의 시간 감소
+
+- 텍스트: 앞부분은 지시문만, 로컬 검색으로 고른 후보 표와 어르신 상황은 요청별 부분
+  (카탈로그가 커져도 캐시 크기와 요청 크기가 늘지 않음, 대신 후보 표는 캐시 할인을 받지 못함)
+- 음성: 전사 전이라 후보를 고를 수 없어 데이터 표까지 앞부분에 넣고 오디오 파일만 보냄
+
+- 캐시 키: 앞부분 내용 해시 (응답 형식/예시 포함 여부, 음성은 데이터 버전이 바뀌면 다른 캐시)
+- 데이터 버전이 바뀌면 이전 캐시를 모두 지우고 새로 등록 (sync)
+- TTL이 끝나기 전에 다시 등록, 등록이 실패하면(최소 토큰 수 미달 등) 한동안 다시 시도하지 않음
+- SDK에 caching이 없거나(로컬 대역) 꺼져 있으면 아무것도 하지 않음 → 전체 프롬프트 전송
+
+캐시 등록이 실패하거나 서버에서 캐시가 사라졌으면 상담은 전체 프롬프트로 계속 진행합니다.
+"""
+
+import datetime
+import threading
+import time
+
+from silverlink.prompts import StaticPrefix
+from silverlink.response_cache import content_digest
+from silverlink.telemetry import count_cache, span
+
+# 만료 이 시간(초) 전부터는 새로 등록 (요청 도중 만료 방지)
+REFRESH_MARGIN = 60
+
+
+def is_cache_missing(error):
+    """서버에 캐시가 없음(만료/삭제) 오류인지 (404 NotFound, "CachedContent not found" 등)"""
+    if any(cls.__name__ == "NotFound" for cls in type(error).__mro__) or getattr(error, "code", None) == 404:
+        return True
+    message = str(error).lower()
+    return ("cachedcontent" in message or "cached content" in message) and (
+        "not found" in message or "expired" in message
+    )
+
+
+def split_prefix(contents):
+    """contents 첫 항목이 StaticPrefix면 (앞부분, 나머지 목록), 아니면 (None, contents)"""
+    if isinstance(contents, (list, tuple)) and contents and isinstance(contents[0], StaticPrefix):
+        return contents[0], list(contents[1:])
+    return None, contents
+
+
+class _Entry:
+    def __init__(self, cached_content, model, expires_at):
+        self.cached_content = cached_content
+        self.model = model
+        self.expires_at = expires_at
+
+
+class ContextCache:
+    """정적 앞부분 → 캐시 콘텐츠를 참조하는 GenerativeModel (프로세스당 하나, 스레드 안전)"""
+
+    def __init__(self, client, model_name, ttl_seconds=3600, enabled=True, retry_after=600, clock=time.time):
+        self.client = client
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self.retry_after = retry_after
+        self.available = enabled and hasattr(client, "caching")
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}      # 앞부분 해시 → _Entry
+        self._creating = set()  # 등록 중인 해시 (다른 요청은 기다리지 않고 전체 프롬프트 사용)
+        self._failed = {}       # 해시 → 다시 시도할 시각
+        self._version = None
+        self.last_error = None
+
+    def sync(self, data_version):
+        """데이터 버전이 바뀌면 이전 캐시를 지움 (다음 요청에서 새 앞부분으로 등록)"""
+        if not self.available or data_version == self._version:
+            return
+        with self._lock:
+            if data_version == self._version:
+                return
+            stale = list(self._entries.values())
+            self._entries.clear()
+            self._failed.clear()
+            self._version = data_version
+        for entry in stale:
+            self._delete(entry)
+
+    def model_for(self, prefix):
+        """앞부분을 캐시한 GenerativeModel (쓸 수 없으면 None, 필요하면 이 자리에서 등록)"""
+        if not self.available:
+            return None
+        key = content_digest(prefix.encode("utf-8"))
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at - REFRESH_MARGIN > now:
+                count_cache("context_cache", True)
+                return entry.model
+            if key in self._creating or self._failed.get(key, 0) > now:
+                count_cache("context_cache", False)
+                return None
+            self._creating.add(key)
+        count_cache("context_cache", False)
+
+        try:
+            with span("context_cache"):
+                created = self._create(key, prefix, now)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self._failed[key] = now + self.retry_after
+            created = None
+        finally:
+            with self._lock:
+                self._creating.discard(key)
+        if created is None:
+            return None
+
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = created
+        if previous is not None:
+            self._delete(previous)
+        return created.model
+
+    def _create(self, key, prefix, now):
+        cached_content = self.client.caching.CachedContent.create(
+            model=self.model_name,
+            display_name=f"silverlink-{key[:12]}",
+            contents=[str(prefix)],
+            ttl=datetime.timedelta(seconds=self.ttl_seconds),
+        )
+        model = self.client.GenerativeModel.from_cached_content(cached_content=cached_content)
+        return _Entry(cached_content, model, now + self.ttl_seconds)
+
+    def invalidate(self, prefix):
+        """서버에서 캐시를 찾지 못한 경우 등: 다음 요청에서 다시 등록"""
+        key = content_digest(prefix.encode("utf-8"))
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._delete(entry)
+
+    @staticmethod
+    def _delete(entry):
+        try:
+            entry.cached_content.delete()
+        except Exception:
+            pass  # 만료되어 이미 없어도 무시
+
+    def snapshot(self):
+        """운영 상태 (등록된 캐시 수, 마지막 오류)"""
+        with self._lock:
+            return {
+                "available": self.available,
+                "entries": len(self._entries),
+                "failed": len(self._failed),
+                "last_error": self.last_error,
+            }
+
+
+class PrefixCachedModel:
+    """
+    GenerativeModel 대역: contents 첫 항목이 StaticPrefix이고 캐시가 있으면
+    캐시를 참조하는 모델로 나머지 부분만 보냄 (없으면 원래 모델로 전체 전송)
+    """
+
+    def __init__(self, model, context_cache):
+        self.model = model
+        self.context_cache = context_cache
+
+    def generate_content(self, contents, **kwargs):
+        prefix, rest = split_prefix(contents)
+        cached_model = self.context_cache.model_for(prefix) if prefix is not None else None
+        if cached_model is None:
+            return self.model.generate_content(contents, **kwargs)
+        try:
+            return cached_model.generate_content(rest, **kwargs)
+        except Exception as e:
+            # 잘못된 요청/안전 차단 등은 전체 프롬프트로 다시 보내도 같은 결과 (토큰만 두 번 씀)
+            # 일시적 오류의 재시도/대체 모델은 ResilientModel이 처리
+            if not is_cache_missing(e):
+                raise
+            # 캐시 만료/삭제: 캐시를 버리고 전체 프롬프트로 다시 보냄
+            self.context_cache.invalidate(prefix)
+            return self.model.generate_content(contents, **kwargs)
@@ -0,0 +1,211 @@
+"""
+버전 관리되는 복지 데이터 저장소 (재시작 없는 핫 리로드)
+
+welfare_data.json이나 2025년 최신 정보(welfare_latest_2025.json)를 고칠 때마다
+재배포하면 모든 워커가 처음부터 다시 시작합니다. 이 저장소는
+- 파일 변경(수정 시각/크기)을 주기적으로 확인하고
+- 바뀌면 새 스냅샷(데이터 + 카탈로그 + 프롬프트 표 + 검색 색인 + 규칙 엔진)을
+  만든 뒤 참조 하나만 바꿔 끼웁니다. (요청 처리 중인 코드는 이전 스냅샷을 그대로 사용)
+- 바뀌지 않은 혜택의 프롬프트 줄/조건 술어는 다시 계산하지 않고,
+  최신 정보만 바뀌면 카탈로그만 다시 만듭니다.
+- 응답 캐시 키에는 스냅샷의 데이터 버전(해시)이 들어가므로 데이터가 바뀌면
+  이전 응답은 자동으로 쓰이지 않습니다.
+
+파일을 읽다가 실패하면(JSON 오류, 쓰는 중 등) 이전 스냅샷을 계속 사용합니다.
+
+조건별 후보 조회용 프로그램 DB(silverlink.program_db)도 데이터가 바뀔 때 함께
+동기화합니다. data_path가 SQLite 파일(.sqlite3/.sqlite/.db)이면 그 DB를 원본으로 읽습니다.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from silverlink.catalog import WelfareCatalog
+from silverlink.eligibility import EligibilityEngine
+from silverlink.program_db import ProgramDatabase
+from silverlink.prompts import PromptCatalog, compile_catalog
+from silverlink.response_cache import benefit_fingerprint, data_hash
+from silverlink.retrieval import CatalogRetriever
+
+
+# 스냅샷당 보관할 후보 목록 수 (나이 기준 × 독거 × 지역 조합이라 보통 훨씬 적음)
+_ELIGIBLE_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """한 데이터 버전에서 파생된 모든 것 (읽기 전용)"""
+    version: str          # 데이터 + 최신 정보 해시
+    welfare_data: list
+    latest_info: dict
+    catalog: WelfareCatalog
+    prompt_catalog: PromptCatalog
+    retriever: CatalogRetriever
+    engine: EligibilityEngine
+    program_db: ProgramDatabase   # None이면 DB 없이 전체 데이터 사용
+    loaded_at: float
+    # (DB 세대, 필터 키) → 후보 번호 집합 (같은 조건의 사용자는 DB를 다시 조회하지 않음)
+    _eligible: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def data_version(self):
+        """복지 데이터 해시 (응답 캐시 키에 사용, 최신 정보는 표시 시점에만 쓰이므로 제외)"""
+        return self.catalog.version
+
+    def eligible_positions(self, facts):
+        """
+        사용자 사실로 명백히 자격이 없는 혜택을 뺀 번호 집합(frozenset), 거를 수 없으면 None
+        DB는 스냅샷 사이에 공유되므로 교체 직후에는 이 스냅샷에 없는 이름이 섞일 수 있어
+        카탈로그에 있는 이름만 사용합니다.
+        """
+        if self.program_db is None:
+            return None
+        try:
+            key = (self.program_db.generation, self.program_db.filter_key(facts))
+        except sqlite3.Error:
+            return None
+        positions = self._eligible.get(key)
+        if positions is None:
+            names = self.program_db.eligible_names(facts)
+            if names is None:
+                return None
+            if len(self._eligible) >= _ELIGIBLE_CACHE_SIZE:
+                self._eligible.clear()
+            # 검색/규칙 평가에서 문서마다 포함 여부를 확인하므로 집합으로 보관
+            positions = self._eligible[key] = frozenset(self.catalog.positions(names))
+        return positions
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_database_path(path):
+    return str(path).endswith((".sqlite3", ".sqlite", ".db"))
+
+
+def _file_signature(path):
+    """파일 변경 감지용 (수정 시각, 크기), 파일이 없으면 None"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WelfareDataStore:
+    """복지 데이터 파일을 감시하고, 바뀌면 파생 색인까지 원자적으로 교체"""
+
+    def __init__(self, data_path, latest_path=None, check_interval=2.0,
+                 fuzzy_min_confidence=0.8, program_db_path=None, clock=time.monotonic):
+        """program_db_path를 주면 JSON 데이터를 그 SQLite 파일에 동기화해 조건 조회에 사용"""
+        self.data_path = data_path
+        self.latest_path = latest_path
+        self.check_interval = check_interval
+        self.fuzzy_min_confidence = fuzzy_min_confidence
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._row_cache = {}
+        self._predicate_cache = {}
+        self._signatures = None
+        self._checked_at = None
+        self.reload_count = 0
+        self.last_error = None
+        self._snapshot = None
+        # DB 파일이 원본이면 그대로 조회에도 사용 (동기화 불필요)
+        self._source_db = ProgramDatabase(data_path) if is_database_path(data_path) else None
+        if self._source_db is not None:
+            self.program_db = self._source_db
+        else:
+            self.program_db = ProgramDatabase(program_db_path) if program_db_path else None
+        self.reload(force=True)
+
+    def current(self):
+        """현재 스냅샷 (check_interval마다 파일 변경 확인)"""
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload()
+        return self._snapshot
+
+    def reload(self, force=False):
+        """파일이 바뀌었으면 다시 읽어 교체, 교체했으면 True"""
+        with self._lock:
+            signatures = (self._data_signature(), _file_signature(self.latest_path))
+            if not force and signatures == self._signatures:
+                return False
+            try:
+                welfare_data = self._read_data()
+                latest_info = _read_json(self.latest_path) if signatures[1] else {}
+                snapshot = self._build(welfare_data, latest_info, self._snapshot)
+            except (OSError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                # 처음 로드가 실패하면 앱을 시작할 수 없으므로 그대로 올려보냄
+                if self._snapshot is None:
+                    raise
+                self.last_error = e
+                return False
+
+            previous = self._snapshot
+            self._signatures = signatures
+            if previous is not None and snapshot.version == previous.version:
+                return False
+            self._snapshot = snapshot
+            self.last_error = None
+            self.reload_count += 1
+        return True
+
+    def _data_signature(self):
+        if self._source_db is None:
+            return _file_signature(self.data_path)
+        # WAL 모드에서는 체크포인트 전까지 변경이 -wal 파일에만 기록됨
+        return _file_signature(self.data_path), _file_signature(self.data_path + "-wal")
+
+    def _read_data(self):
+        if self._source_db is not None:
+            return self._source_db.load_all()
+        return _read_json(self.data_path)
+
+    def _build(self, welfare_data, latest_info, previous):
+        catalog = WelfareCatalog(
+            welfare_data, latest_info=latest_info, fuzzy_min_confidence=self.fuzzy_min_confidence
+        )
+        version = data_hash({"data": catalog.version, "latest": latest_info})
+
+        if previous is not None and previous.data_version == catalog.version:
+            # 최신 정보만 바뀜: 프롬프트 표/검색 색인/규칙 엔진은 그대로 사용
+            prompt_catalog, retriever, engine = previous.prompt_catalog, previous.retriever, previous.engine
+        else:
+            prompt_catalog = compile_catalog(welfare_data, row_cache=self._row_cache)
+            # BM25 통계(문서 길이/IDF)는 전체 데이터에 의존하므로 다시 계산 (수 ms)
+            retriever = CatalogRetriever(welfare_data)
+            engine = EligibilityEngine(welfare_data, predicate_cache=self._predicate_cache)
+            if self.program_db is not None and self._source_db is None:
+                # 바뀐 행만 다시 씀
+                self.program_db.sync(welfare_data)
+            self._prune_caches(welfare_data)
+
+        return DataSnapshot(
+            version=version,
+            welfare_data=welfare_data,
+            latest_info=latest_info,
+            catalog=catalog,
+            prompt_catalog=prompt_catalog,
+            retriever=retriever,
+            engine=engine,
+            program_db=self.program_db,
+            loaded_at=time.time(),
+        )
+
+    def _prune_caches(self, welfare_data):
+        """사라진 혜택의 계산 결과는 버림"""
+        live = {benefit_fingerprint(b) for b in welfare_data}
+        for cache in (self._row_cache, self._predicate_cache):
+            for key in [k for k in cache if k not in live]:
+                del cache[key]
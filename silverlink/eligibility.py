@@ -0,0 +1,329 @@
+"""
+규칙 기반 자격 판정 엔진 (LLM 없이 빠르게 답하는 경로)
+
+나이("72살", "68세"), 독거 여부, 수급자/저소득 여부처럼 텍스트에서 바로 읽히는
+사실만으로 결정되는 질문이 많습니다. welfare_data.json의 target 문자열에도
+같은 조건이 들어 있으므로, 데이터 로드 시 조건을 술어로 한 번 변환해두고
+사용자 텍스트에서 추출한 사실과 비교해 수 ms 안에 추천 결과를 만듭니다.
+
+- 신뢰도가 충분히 높을 때만 이 결과를 그대로 사용하고,
+  낮으면 기존처럼 Gemini가 분석합니다. (app.py에서 결정)
+- 결과는 Gemini 응답과 같은 JSON 구조라서 화면 표시/캐시/TTS를 그대로 재사용
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from silverlink.response_cache import benefit_fingerprint
+
+# 규칙이 바뀌면 버전을 올려 이전 캐시를 무효화합니다
+RULES_VERSION = "2025-11-30"
+
+# 추천 기준 점수 (Gemini 프롬프트와 동일하게 70점 이상만 추천)
+MIN_RECOMMEND_SCORE = 70
+MAX_RECOMMENDATIONS = 5
+
+# 필요(관심사) 개념 사전
+# 같은 패턴을 사용자 텍스트와 혜택 텍스트(이름/대상/내용) 양쪽에 적용해
+# "치아" ↔ "틀니/임플란트"처럼 일상어와 행정 용어를 연결합니다.
+NEED_PATTERNS = {
+    "치아": r"치아|이가|이빨|잇몸|틀니|임플란트",
+    "일자리": r"일자리|일하고|일을 하|일하고 싶|취업|소일거리",
+    "돌봄": r"혼자|홀로|독거|외로|돌봄|안부|말벗",
+    "거동": r"거동|다리|허리|무릎|걷기|걷는|휠체어|몸이 불편|방문요양|방문간호",
+    "식사": r"식사|밥|끼니|도시락|반찬",
+    "치매": r"치매|기억력|깜빡|건망",
+    "눈": r"눈이|눈꺼풀|시력|안경|시야|안검|침침",
+    "검진": r"건강검진|건강진단|검진",
+    "독감": r"독감|예방접종|인플루엔자",
+    "교통": r"교통비|교통|버스|지하철|전철",
+    "난방": r"난방|냉방|추워|춥|더워|더위|보일러|가스비|전기세|전기요금|에너지",
+    "통신": r"통신|휴대폰|핸드폰|전화요금|전화비|인터넷",
+    "주거": r"집세|월세|전세|임차료|주거|수선|집이 낡",
+    "생활비": r"생활비|생계|기초연금|연금|먹고 살|돈이 없|형편",
+    "위기": r"갑자기|갑작스|위기|화재|불이 나|실직|쫓겨",
+}
+_NEEDS = {tag: re.compile(pattern) for tag, pattern in NEED_PATTERNS.items()}
+
+# 사용자 사실 추출 패턴
+_AGE = re.compile(r"(\d{2,3})\s*(?:살|세)")
+# 가족·지인 (이들의 나이는 사용자 나이가 아님: "아버지가 80세", "45살 아들이")
+_RELATIVE = (
+    r"아들|딸|자식|자녀|남편|아내|부인|영감|할멈|아버지|어머니|아버님|어머님|엄마|아빠|부모님?"
+    r"|손자|손녀|며느리|사위|오빠|언니|누나|형님|동생|친구|이웃"
+)
+_RELATIVE_SUBJECT = re.compile(rf"(?<![가-힣])(?:{_RELATIVE})(?:께서|이|가|은|는|도)(?![가-힣])")
+_RELATIVE_AFTER_AGE = re.compile(rf"^\s*(?:된|되신|되는|이신|인|짜리)?\s*(?:{_RELATIVE})")
+_FIRST_PERSON = re.compile(r"(?<![가-힣])(?:저는|제가|저도|나는|내가|나도|제\s*나이|내\s*나이|본인)")
+_CLAUSE_END = re.compile(r"[.!?\n]")
+_ALONE = re.compile(r"혼자|홀로|독거|혼자서")
+_NOT_ALONE = re.compile(r"(?:가족|아들|딸|자식|자녀|남편|아내|부부|영감|할멈)(?:과|와|이랑|하고)?\s*(?:같이|함께)\s*살")
+_RECIPIENT = re.compile(r"기초생활\s*수급|수급자|차상위")
+_LOW_INCOME = re.compile(r"저소득|소득이\s*(?:적|없|낮)|수입이\s*(?:적|없|낮)|형편이\s*어렵|돈이\s*없|생활이\s*어렵|가난")
+_INCOME_AMOUNT = re.compile(r"(?:소득|수입)[^\d]{0,6}(\d+)\s*만")
+
+# 광역 지자체 (지자체 사업의 지역 조건, 사용자가 사는 지역)
+REGIONS = (
+    "서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기",
+    "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주",
+)
+NATIONWIDE = "전국"
+_REGION_NAME = "|".join(REGIONS)
+_REGION_SUFFIX = r"(?:특별시|광역시|특별자치시|특별자치도|시|도)?"
+_USER_REGION = re.compile(rf"({_REGION_NAME}){_REGION_SUFFIX}\s*(?:에서|에)?\s*(?:살|사는|삽니|거주)")
+
+# 혜택 대상(target) 조건 패턴
+_MIN_AGE = re.compile(r"(\d+)세\s*이상")
+_AGE_ALTERNATIVE = re.compile(r"또는")
+_REQUIRES_ALONE = re.compile(r"독거")
+_REQUIRES_RECIPIENT = re.compile(r"기초생활수급자|차상위")
+_REQUIRES_LOW_INCOME = re.compile(r"소득\s*하위|중위소득|저소득|소득\s*기준|기초연금\s*수급")
+# 지자체 사업: "서울시 거주 만 65세 이상", 이름이 "부산광역시 ..."로 시작
+_TARGET_REGION = re.compile(rf"({_REGION_NAME}){_REGION_SUFFIX}\s*(?:거주|주민|소재)")
+_NAME_REGION = re.compile(rf"^({_REGION_NAME}){_REGION_SUFFIX}\s")
+
+# 기초연금 선정기준 (단독가구 월 소득인정액, 만원)
+LOW_INCOME_THRESHOLD_MAN = 228
+
+
+@dataclass
+class Predicates:
+    """혜택 하나의 대상 조건 (target 문자열에서 변환)"""
+    min_age: int = None
+    age_required: bool = True
+    requires_alone: bool = False
+    requires_recipient: bool = False
+    requires_low_income: bool = False
+    region: str = None            # None = 전국
+    conditions: frozenset = frozenset()
+    tags: frozenset = frozenset()
+
+
+@dataclass
+class Facts:
+    """사용자 텍스트에서 추출한 사실 (None = 알 수 없음)"""
+    age: int = None
+    alone: bool = None
+    recipient: bool = None
+    low_income: bool = None
+    region: str = None
+    needs: set = field(default_factory=set)
+
+
+def find_needs(text):
+    """텍스트에 등장하는 필요(관심사) 태그 집합"""
+    return {tag for tag, pattern in _NEEDS.items() if pattern.search(text)}
+
+
+def parse_region(benefit):
+    """지자체 사업이면 광역 지자체 이름, 전국 사업이면 None (region 필드가 있으면 우선)"""
+    region = benefit.get("region")
+    if region:
+        return None if region == NATIONWIDE else region
+    match = _TARGET_REGION.search(benefit.get("target", "")) or _NAME_REGION.search(benefit.get("name", ""))
+    return match.group(1) if match else None
+
+
+def parse_target(benefit):
+    """혜택 데이터의 target(및 이름/내용)을 조건 술어로 변환"""
+    target = benefit.get("target", "")
+    ages = [int(a) for a in _MIN_AGE.findall(target)]
+    return Predicates(
+        min_age=min(ages) if ages else None,
+        age_required=not _AGE_ALTERNATIVE.search(target),
+        requires_alone=bool(_REQUIRES_ALONE.search(target)),
+        requires_recipient=bool(_REQUIRES_RECIPIENT.search(target)),
+        requires_low_income=bool(_REQUIRES_LOW_INCOME.search(target)),
+        region=parse_region(benefit),
+        # 대상 조건에 들어 있는 건강/상황 조건 (예: "치매 진단을 받은", "거동 불편")
+        conditions=frozenset(find_needs(target) - {"돌봄", "생활비"}),
+        tags=frozenset(find_needs(" ".join(
+            [benefit.get("name", ""), target, benefit.get("benefits", "")]
+        ))),
+    )
+
+
+def _is_own_age(text, match):
+    """나이 표현이 사용자 본인의 나이로 보이는지 (같은 문장에서 가족·지인이 주어이면 아님)"""
+    if _RELATIVE_AFTER_AGE.search(text[match.end():]):
+        return False
+    before = _CLAUSE_END.split(text[:match.start()])[-1]
+    relatives = [m.end() for m in _RELATIVE_SUBJECT.finditer(before)]
+    if not relatives:
+        return True
+    # "아들이 45살이고 저는 72살" → 가족 뒤에 다시 "저는"이 나오면 본인
+    return any(m.start() > relatives[-1] for m in _FIRST_PERSON.finditer(before))
+
+
+def find_age(text):
+    """
+    사용자 본인의 나이 (알 수 없으면 None)
+    가족·지인의 나이는 빼고, 본인 나이로 보이는 값이 여러 개면 판단하지 않음 (Gemini가 분석)
+    """
+    ages = {
+        int(match.group(1)) for match in _AGE.finditer(text)
+        if 40 <= int(match.group(1)) <= 120 and _is_own_age(text, match)
+    }
+    return ages.pop() if len(ages) == 1 else None
+
+
+def extract_facts(text):
+    """사용자 상황 텍스트에서 나이/독거/수급/저소득/지역/필요 추출"""
+    facts = Facts(needs=find_needs(text))
+
+    facts.age = find_age(text)
+
+    if _NOT_ALONE.search(text):
+        facts.alone = False
+    elif _ALONE.search(text):
+        facts.alone = True
+
+    region = _USER_REGION.search(text)
+    if region:
+        facts.region = region.group(1)
+
+    if _RECIPIENT.search(text):
+        facts.recipient = True
+        facts.low_income = True
+
+    if _LOW_INCOME.search(text):
+        facts.low_income = True
+    else:
+        income = _INCOME_AMOUNT.search(text)
+        if income:
+            facts.low_income = int(income.group(1)) <= LOW_INCOME_THRESHOLD_MAN
+
+    return facts
+
+
+class EligibilityEngine:
+    """복지 데이터 전체의 조건 술어를 미리 변환해두고 사용자 사실과 매칭"""
+
+    def __init__(self, welfare_data, predicate_cache=None):
+        """predicate_cache({혜택 지문: 술어})를 주면 바뀌지 않은 혜택은 다시 변환하지 않음"""
+        self.welfare_data = welfare_data
+        if predicate_cache is None:
+            self.predicates = [parse_target(b) for b in welfare_data]
+        else:
+            self.predicates = []
+            for benefit in welfare_data:
+                key = benefit_fingerprint(benefit)
+                if key not in predicate_cache:
+                    predicate_cache[key] = parse_target(benefit)
+                self.predicates.append(predicate_cache[key])
+
+    def _score(self, benefit, pred, facts):
+        """(점수, 추천 이유 목록) 반환, 자격이 명백히 없으면 None"""
+        # 명백한 불충족은 제외
+        if facts.age is not None and pred.min_age and facts.age < pred.min_age and pred.age_required:
+            return None
+        if pred.requires_alone and facts.alone is False:
+            return None
+        if pred.region and facts.region and pred.region != facts.region:
+            return None
+        if (pred.requires_recipient or pred.requires_low_income) and facts.low_income is False:
+            return None
+
+        score = 60
+        reasons = []
+
+        if facts.age is not None and pred.min_age and facts.age >= pred.min_age:
+            score += 5
+            reasons.append(f"만 {facts.age}세로 연령 조건(만 {pred.min_age}세 이상)을 충족하십니다")
+
+        if pred.requires_alone:
+            if facts.alone:
+                score += 10
+                reasons.append("혼자 생활하고 계십니다")
+            else:
+                score -= 10
+
+        if pred.requires_recipient:
+            if facts.recipient:
+                score += 10
+                reasons.append("기초생활수급자·차상위계층 대상 혜택입니다")
+            else:
+                score -= 10
+        elif pred.requires_low_income:
+            if facts.low_income:
+                score += 10
+                reasons.append("소득 기준을 충족하실 가능성이 높습니다")
+            else:
+                score -= 5
+
+        matched_needs = sorted(pred.tags & facts.needs)
+        if matched_needs:
+            score += 25
+            reasons.append(f"말씀하신 {', '.join(matched_needs)} 관련 도움을 받을 수 있습니다")
+
+        missing_conditions = pred.conditions - facts.needs
+        if pred.conditions and not missing_conditions:
+            score += 5
+        elif missing_conditions:
+            score -= 10
+
+        return min(score, 100), reasons
+
+    def evaluate(self, text, positions=None):
+        """
+        사용자 텍스트에 대한 추천 결과와 신뢰도(0~1)를 반환
+        결과는 Gemini 응답과 같은 JSON 구조입니다.
+        positions(혜택 번호 집합)를 주면 그 후보만 평가 (프로그램 DB로 미리 걸러낸 경우)
+        """
+        facts = extract_facts(text)
+        if positions is None:
+            positions = range(len(self.welfare_data))
+
+        scored = []
+        for i in positions:
+            benefit, pred = self.welfare_data[i], self.predicates[i]
+            result = self._score(benefit, pred, facts)
+            if result and result[0] >= MIN_RECOMMEND_SCORE:
+                scored.append((result[0], i, benefit, result[1], pred))
+        # 같은 점수는 데이터 순서 (positions가 순서 없는 집합이어도 결과가 같도록)
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        scored = [(score, benefit, reasons, pred) for score, _, benefit, reasons, pred in scored[:MAX_RECOMMENDATIONS]]
+
+        benefits = [
+            {
+                "name": benefit["name"],
+                "relevance_score": score,
+                "relevance_reason": ". ".join(reasons) if reasons else "연령 조건에 해당하는 기본 혜택입니다",
+                "target": benefit["target"],
+                "amount": benefit["amount"],
+                "description": benefit.get("benefits", ""),
+                "next_action": benefit.get("how_to_apply", "가까운 주민센터(☎ 129)에 문의하세요"),
+                "documents": benefit.get("documents", []),
+                "contact": benefit.get("contact", "보건복지상담센터 129"),
+            }
+            for score, benefit, reasons, _ in scored
+        ]
+
+        data = {
+            "greeting": "어르신 안녕하세요. 말씀해주신 상황을 바탕으로 받으실 수 있는 복지 혜택을 찾아보았습니다.",
+            "benefits": benefits,
+            "encouragement": "어르신께서 받으실 수 있는 혜택이 있습니다. 가까운 주민센터(☎ 129)에 방문하시면 자세히 안내받으실 수 있습니다.",
+        }
+        return data, self.confidence(facts, scored)
+
+    @staticmethod
+    def confidence(facts, scored):
+        """
+        규칙 결과의 신뢰도
+        - 나이를 알 수 있음: 0.3
+        - 말씀하신 필요가 모두 추천 결과로 설명됨: 최대 0.5 (필요를 못 찾으면 0)
+        - 독거/수급/저소득 중 하나라도 확인됨: 0.2
+        추천 결과가 없으면 0
+        """
+        if not scored:
+            return 0.0
+
+        confidence = 0.3 if facts.age is not None else 0.0
+        if facts.needs:
+            covered = set()
+            for _, _, _, pred in scored:
+                covered |= pred.tags & facts.needs
+            confidence += 0.5 * len(covered) / len(facts.needs)
+        if facts.alone is not None or facts.recipient or facts.low_income is not None:
+            confidence += 0.2
+        return round(confidence, 2)
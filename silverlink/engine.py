@@ -0,0 +1,814 @@
+"""
+상담 엔진 (Streamlit 없이 import 가능한 추천 핵심)
+
+app.py 화면, 일괄 처리 CLI(scripts/batch_consult.py), HTTP API(silverlink/api.py)가 같은 코드로
+캐시 확인 → 규칙 판정 → 프롬프트 생성(토큰 예산, 컨텍스트 캐시) → Gemini 호출(입장 제어/재시도/헤지)
+→ 혜택 검증 → 캐시 저장을 수행합니다.
+
+- 설정은 EngineConfig 하나로 모으고, 환경 변수에서 읽음 (EngineConfig.from_env)
+- Gemini SDK는 생성자에서 받음 (google.generativeai 모듈 또는 같은 인터페이스의 대역)
+- 화면 표시는 호출하는 쪽 책임: 엔진은 결과 데이터와 제외한 혜택 이름만 돌려줌
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+from silverlink.audio_io import upload_audio
+from silverlink.audio_preprocess import AudioPreprocessor
+from silverlink.budget import BudgetExceeded, TokenBudget, TokenCounter, TokenLedger, fit_prompt
+from silverlink.context_cache import ContextCache, PrefixCachedModel
+from silverlink.datastore import WelfareDataStore
+from silverlink.eligibility import RULES_VERSION, extract_facts
+from silverlink.hedging import HedgedCaller, LatencyTracker
+from silverlink.orchestrator import Orchestrator
+from silverlink.program_db import DEFAULT_DB_PATH
+from silverlink.prompts import (
+    PROMPT_VERSION,
+    StaticPrefix,
+    render_audio_prompt,
+    render_text_prefix,
+    render_text_prompt,
+    render_text_suffix,
+    response_schema,
+)
+from silverlink.ratelimit import PRIORITY_AUDIO, PRIORITY_TEXT, GeminiGate
+from silverlink.resilience import CircuitBreaker, ResilientModel, UpstreamUnavailable
+from silverlink.response_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL_SECONDS,
+    ResponseCache,
+    content_digest,
+    make_cache_key,
+    normalize_text,
+)
+from silverlink.streaming import IncrementalResponseParser, extract_json_text
+from silverlink.telemetry import (
+    BUDGET_REJECTED,
+    METRICS,
+    record_audio_bytes,
+    record_prompt_tokens,
+    record_queue_wait,
+    record_usage,
+    span,
+    traced,
+)
+from silverlink.tts import SpeechPipeline, create_tts_executor, synthesize
+
+# 결과 출처
+SOURCE_CACHE = "cache"              # 캐시된 검증 결과
+SOURCE_RULES = "rules"              # 규칙 엔진 (신뢰도 충분)
+SOURCE_GEMINI = "gemini"            # 주 모델
+SOURCE_FALLBACK = "fallback_model"  # 대체 모델 (캐시하지 않음)
+SOURCE_RULES_FALLBACK = "rules_fallback"  # Gemini 장애로 규칙 결과로 대신 안내
+SOURCE_UNPARSED = "unparsed"        # JSON으로 해석할 수 없는 응답 (raw_text만 있음)
+
+# 추천 혜택이 없을 경우 기본 메시지
+NO_MATCH_TTS_TEXT = "정확히 매칭되는 복지 혜택을 찾지 못했습니다. 가까운 주민센터 129번에 문의해주세요."
+
+
+def _env_flag(name, default):
+    return os.getenv(name, "true" if default else "false") == "true"
+
+
+def create_client(stub=False):
+    """
+    Gemini SDK 준비, GEMINI_API_KEY가 없으면 None
+    stub이면 지연 없는 로컬 대역, SILVERLINK_FAKE_GEMINI=true면 FAKE_GEMINI_* 설정의 로컬 대역
+    """
+    if stub or _env_flag("SILVERLINK_FAKE_GEMINI", False):
+        from silverlink.fake_gemini import FakeGenAI
+        return FakeGenAI() if stub else FakeGenAI.from_env()
+
+    import google.generativeai as genai
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    genai.configure(api_key=api_key)
+    return genai
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """엔진 설정 (기본값은 .env.example과 같음)"""
+    model_name: str = "gemini-2.5-pro"
+    fallback_model_name: str = "gemini-2.5-flash"   # 비우면 대체 모델 사용 안 함
+    hedge_model_name: str = None                    # None이면 주 모델로 헤지
+    hedged_requests: bool = False
+    streaming_responses: bool = True
+    structured_output: bool = True
+    prompt_top_k: int = 12
+    token_budget_per_request: int = 0               # 0이면 제한 없음
+    token_budget_per_day: int = 0                   # 0이면 제한 없음
+    budget_min_candidates: int = 5                  # 예산에 맞추느라 줄여도 남길 후보 수
+    exact_token_count: bool = False                 # count_tokens API로 정확히 셈 (결과 캐시)
+    context_cache: bool = True                      # 정적 프롬프트 앞부분을 Gemini 캐시로 등록
+    context_cache_ttl: int = 3600
+    audio_preprocess: bool = True                   # 업로드 전 침묵 제거/모노/16kHz/Opus (ffmpeg 필요)
+    audio_bitrate: str = "24k"
+    audio_silence_db: float = -45
+    rule_fastpath: bool = True
+    rule_min_confidence: float = 0.8
+    fuzzy_min_confidence: float = 0.8
+    data_path: str = "welfare_data.json"
+    latest_path: str = "welfare_latest_2025.json"
+    data_reload_interval: float = 2.0
+    program_db_path: str = DEFAULT_DB_PATH          # None이면 프로그램 DB 사용 안 함
+    cache_path: str = DEFAULT_CACHE_PATH
+    cache_ttl: int = DEFAULT_TTL_SECONDS
+    cache_max_entries: int = DEFAULT_MAX_ENTRIES
+    audio_cache_max_entries: int = 2000
+    requests_per_minute: float = 15
+    burst: int = 1
+    breaker_threshold: int = 5
+    breaker_reset: float = 30.0
+    retries: int = 2
+    hedge_quantile: float = 0.95
+    hedge_default_threshold: float = 8.0
+    orchestrator_workers: int = 8
+    tts_workers: int = 4
+    stage_timeouts: dict = field(default_factory=lambda: {
+        "upload": 30.0,
+        "gemini": 60.0,
+        # 재시도/대체 모델을 쓸 시간이 남도록 호출 한 번의 제한은 더 짧게
+        "gemini_attempt": 25.0,
+        "tts": 30.0,
+        "queue": 120.0,
+    })
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """환경 변수에서 설정 읽기 (overrides가 우선)"""
+        hedged = _env_flag("HEDGED_REQUESTS", False)
+        values = dict(
+            fallback_model_name=os.getenv("GEMINI_FALLBACK_MODEL", "gemini-2.5-flash") or None,
+            hedge_model_name=os.getenv("GEMINI_HEDGE_MODEL") or None,
+            hedged_requests=hedged,
+            # 헤지 요청은 전체 응답을 검증해 고르므로 스트리밍과 함께 쓰지 않음
+            streaming_responses=_env_flag("STREAMING_RESPONSES", True) and not hedged,
+            structured_output=_env_flag("STRUCTURED_OUTPUT", True),
+            prompt_top_k=int(os.getenv("PROMPT_TOP_K", "12")),
+            token_budget_per_request=int(os.getenv("TOKEN_BUDGET_PER_REQUEST", "0")),
+            token_budget_per_day=int(os.getenv("TOKEN_BUDGET_PER_DAY", "0")),
+            budget_min_candidates=int(os.getenv("BUDGET_MIN_CANDIDATES", "5")),
+            exact_token_count=_env_flag("EXACT_TOKEN_COUNT", False),
+            context_cache=_env_flag("CONTEXT_CACHE", True),
+            context_cache_ttl=int(os.getenv("CONTEXT_CACHE_TTL", "3600")),
+            audio_preprocess=_env_flag("AUDIO_PREPROCESS", True),
+            audio_bitrate=os.getenv("AUDIO_BITRATE", "24k"),
+            audio_silence_db=float(os.getenv("AUDIO_SILENCE_DB", "-45")),
+            rule_fastpath=_env_flag("RULE_FASTPATH", True),
+            rule_min_confidence=float(os.getenv("RULE_MIN_CONFIDENCE", "0.8")),
+            fuzzy_min_confidence=float(os.getenv("FUZZY_MIN_CONFIDENCE", "0.8")),
+            data_path=os.getenv("WELFARE_DATA_PATH", "welfare_data.json"),
+            latest_path=os.getenv("WELFARE_LATEST_PATH", "welfare_latest_2025.json"),
+            data_reload_interval=float(os.getenv("DATA_RELOAD_INTERVAL", "2")),
+            program_db_path=os.getenv("PROGRAM_DB_PATH", DEFAULT_DB_PATH) or None,
+            cache_path=os.getenv("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+            cache_ttl=int(os.getenv("RESPONSE_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+            cache_max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+            audio_cache_max_entries=int(os.getenv("AUDIO_CACHE_MAX_ENTRIES", "2000")),
+            requests_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+            burst=int(os.getenv("GEMINI_BURST", "1")),
+            breaker_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+            breaker_reset=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+            retries=int(os.getenv("GEMINI_RETRIES", "2")),
+            hedge_quantile=float(os.getenv("HEDGE_QUANTILE", "0.95")),
+            hedge_default_threshold=float(os.getenv("HEDGE_DEFAULT_THRESHOLD", "8")),
+            orchestrator_workers=int(os.getenv("ORCHESTRATOR_WORKERS", "8")),
+            tts_workers=int(os.getenv("TTS_WORKERS", "4")),
+            stage_timeouts={
+                "upload": float(os.getenv("UPLOAD_TIMEOUT", "30")),
+                "gemini": float(os.getenv("GEMINI_TIMEOUT", "60")),
+                "gemini_attempt": float(os.getenv("GEMINI_ATTEMPT_TIMEOUT", "25")),
+                "tts": float(os.getenv("TTS_TIMEOUT", "30")),
+                "queue": float(os.getenv("QUEUE_TIMEOUT", "120")),
+            },
+        )
+        values.update(overrides)
+        return cls(**values)
+
+
+@dataclass
+class Consultation:
+    """상담 한 건의 결과"""
+    data: dict                  # 검증된 응답 (greeting, benefits, encouragement[, transcript])
+    source: str                 # SOURCE_* 중 하나
+    model_name: str = None
+    cache_key: str = None
+    dropped: list = field(default_factory=list)   # 카탈로그에 없어 제외한 혜택 이름
+    raw_text: str = None        # SOURCE_UNPARSED일 때 원본 응답
+
+    @property
+    def cacheable(self):
+        """캐시해도 되는 결과인지 (주 모델/규칙 결과이고 추천이 있을 때)"""
+        return self.source in (SOURCE_GEMINI, SOURCE_RULES) and bool(self.data and self.data.get("benefits"))
+
+
+# ---- 검증 ----
+
+def fix_benefit(benefit, catalog):
+    """혜택명이 실제 데이터에 있으면 원본 값으로 보정한 혜택을, 없으면 None을 반환"""
+    # 혜택명이 실제 데이터에 있는지 확인 (띄어쓰기/오타/꼬리말 차이는 근사 매칭으로 인정)
+    original = catalog.get(benefit.get("name", ""))
+    if original is None:
+        return None
+
+    # 이름을 데이터와 같은 표기로 통일
+    benefit["name"] = original["name"]
+
+    # 금액과 대상을 원본 데이터로 강제 보정 (AI가 변경했을 수 있음)
+    benefit["amount"] = original["amount"]
+    benefit["target"] = original["target"]
+
+    # documents와 contact도 원본으로 보정
+    if "documents" not in benefit or not benefit["documents"]:
+        benefit["documents"] = original["documents"]
+    if "contact" not in benefit or not benefit["contact"]:
+        benefit["contact"] = original["contact"]
+
+    return benefit
+
+
+@traced("validate")
+def validate_benefits(data, catalog):
+    """
+    AI가 추천한 혜택을 카탈로그로 검증/보정 (data["benefits"]를 바꿈)
+    제외한 혜택 이름 목록을 반환하고, benefits 항목 자체가 없으면 None
+    """
+    if "benefits" not in data or not isinstance(data["benefits"], list):
+        data["benefits"] = []
+        return None
+
+    validated, dropped = [], []
+    for benefit in data["benefits"]:
+        fixed = fix_benefit(benefit, catalog) if isinstance(benefit, dict) else None
+        if fixed is not None:
+            validated.append(fixed)
+        else:
+            dropped.append(benefit.get("name", "") if isinstance(benefit, dict) else str(benefit))
+    data["benefits"] = validated
+    return dropped
+
+
+def is_acceptable_response(response, catalog):
+    """응답이 검증을 통과하는지 (화면 표시 없이 확인, 헤지 요청 승자 선택용)"""
+    try:
+        data = json.loads(extract_json_text(response.text))
+    except (ValueError, AttributeError):
+        return False
+    benefits = data.get("benefits") if isinstance(data, dict) else None
+    if not isinstance(benefits, list):
+        return False
+    # 추천이 없는 응답은 그대로 인정, 있으면 실제 혜택이 하나 이상 있어야 함
+    return not benefits or any(isinstance(b, dict) and b.get("name") in catalog for b in benefits)
+
+
+# ---- 음성 안내 텍스트 ----
+
+def benefit_tts_text(idx, benefit):
+    """TTS용 혜택 설명 (혜택 하나)"""
+    text = f"{idx}번. {benefit.get('name', '')}. "
+    text += f"{benefit.get('description', '')} "
+    text += f"금액은 {benefit.get('amount', '')}입니다. "
+    if "next_action" in benefit:
+        text += f"{benefit['next_action']} "
+    return text.strip()
+
+
+def build_tts_sections(data):
+    """TTS용 섹션 목록 (인사말 → 혜택별 설명 → 격려 메시지)"""
+    sections = []
+    if "greeting" in data:
+        sections.append(data["greeting"])
+
+    if "benefits" in data and len(data["benefits"]) > 0:
+        for idx, benefit in enumerate(data["benefits"], 1):
+            sections.append(benefit_tts_text(idx, benefit))
+    else:
+        sections.append(NO_MATCH_TTS_TEXT)
+
+    if "encouragement" in data:
+        sections.append(data["encouragement"])
+
+    return sections
+
+
+def build_tts_text(data):
+    """TTS용 전체 텍스트 (섹션 사이는 빈 줄 → 섹션 단위로 병렬 음성 합성)"""
+    full_text = "\n\n".join(build_tts_sections(data))
+
+    # 빈 텍스트 방지: 최소 메시지 보장
+    if not full_text or len(full_text.strip()) < 10:
+        full_text = "복지 혜택 분석이 완료되었습니다. 자세한 내용은 주민센터에 문의해주세요."
+
+    return full_text.strip()
+
+
+class ConsultationEngine:
+    """데이터 저장소, Gemini 호출 경로, 캐시를 묶은 상담 엔진 (프로세스당 하나)"""
+
+    def __init__(self, config, client, store=None):
+        """
+        client: google.generativeai 모듈 (GenerativeModel, GenerationConfig, upload_file)
+        client가 synthesize(text)를 제공하면(로컬 대역) gTTS 대신 사용합니다.
+        """
+        self.config = config
+        self.client = client
+        self.synthesize_fn = getattr(client, "synthesize", synthesize)
+        self.store = store or WelfareDataStore(
+            config.data_path,
+            latest_path=config.latest_path,
+            check_interval=config.data_reload_interval,
+            fuzzy_min_confidence=config.fuzzy_min_confidence,
+            program_db_path=config.program_db_path,
+        )
+
+        # 업로드/Gemini/최신 정보 조회를 공유 스레드 풀에서 겹쳐 실행
+        self.orchestrator = Orchestrator(
+            max_workers=config.orchestrator_workers,
+            default_timeouts=config.stage_timeouts,
+        )
+        # Gemini 호출 입장 제어 (분당 할당량 안에서 순서대로)
+        self.gate = GeminiGate(requests_per_minute=config.requests_per_minute, burst=config.burst)
+
+        # 정적 프롬프트 앞부분 컨텍스트 캐시 (주 모델만, SDK가 지원하지 않으면 아무것도 하지 않음)
+        self.context_cache = ContextCache(
+            client,
+            config.model_name,
+            ttl_seconds=config.context_cache_ttl,
+            enabled=config.context_cache,
+        )
+
+        # 장애 대응 Gemini 클라이언트 (재시도 + 서킷 브레이커 + 대체 모델)
+        self.primary_model = PrefixCachedModel(client.GenerativeModel(config.model_name), self.context_cache)
+        fallback_name = config.fallback_model_name
+        self.model = ResilientModel(
+            self.primary_model,
+            config.model_name,
+            fallback=client.GenerativeModel(fallback_name) if fallback_name else None,
+            fallback_name=fallback_name or None,
+            breaker=CircuitBreaker(
+                failure_threshold=config.breaker_threshold,
+                reset_timeout=config.breaker_reset,
+            ),
+            retries=config.retries,
+            gate=self.gate,
+        )
+
+        # 헤지 요청 (지연 기록/통계는 엔진 전체 공유)
+        self.hedge_model_name = config.hedge_model_name or config.model_name
+        if self.hedge_model_name == config.model_name:
+            self.hedge_model = self.primary_model
+        else:
+            self.hedge_model = client.GenerativeModel(self.hedge_model_name)
+        self.hedged_caller = HedgedCaller(
+            self.orchestrator,
+            tracker=LatencyTracker(
+                quantile=config.hedge_quantile,
+                default_threshold=config.hedge_default_threshold,
+            ),
+        )
+
+        # 업로드 전 음성 전처리 (ffmpeg가 없으면 원본 그대로)
+        self.audio_preprocessor = AudioPreprocessor(
+            enabled=config.audio_preprocess,
+            bitrate=config.audio_bitrate,
+            silence_db=config.audio_silence_db,
+        )
+
+        # 음성 합성 작업 풀 (섹션 단위 병렬 변환)
+        self.tts_executor = create_tts_executor(max_workers=config.tts_workers)
+
+        # 응답 캐시 (모든 세션/프로세스가 같은 SQLite 파일 공유)
+        self.response_cache = ResponseCache(
+            path=config.cache_path,
+            ttl_seconds=config.cache_ttl,
+            max_entries=config.cache_max_entries,
+        )
+        # 오디오 분석 캐시 (오디오 내용 주소 → 전사/추천 결과 + TTS 음성)
+        self.audio_cache = ResponseCache(
+            path=config.cache_path,
+            ttl_seconds=config.cache_ttl,
+            max_entries=config.audio_cache_max_entries,
+            table="audio_analysis_cache",
+        )
+
+        # 토큰 계정 (보내기 전 프롬프트 크기, 날짜별 실제 사용량, 요청당/하루 예산)
+        self.token_counter = TokenCounter(self.primary_model.model, exact=config.exact_token_count)
+        self.budget = TokenBudget(
+            TokenLedger(config.cache_path),
+            per_request=config.token_budget_per_request,
+            per_day=config.token_budget_per_day,
+        )
+
+        # 조회 시점 지표 (Prometheus 게이지)
+        METRICS.gauge("silverlink_gate_waiting", lambda: self.gate.snapshot()["waiting"])
+        METRICS.gauge("silverlink_breaker_open", lambda: int(self.model.breaker.state != CircuitBreaker.CLOSED))
+
+    # ---- 데이터 ----
+
+    def current_data(self):
+        """현재 데이터 버전의 스냅샷 (한 요청 안에서는 같은 스냅샷을 계속 사용)"""
+        return self.store.current()
+
+    def eligible_positions(self, user_text, data):
+        """프로그램 DB 색인으로 명백히 자격이 없는 혜택(나이/독거/지역)을 뺀 후보 번호 (None이면 전체)"""
+        return data.eligible_positions(extract_facts(user_text))
+
+    def evaluate_rules(self, user_text):
+        """규칙 엔진 판정 (DB로 거른 후보만 평가), (결과, 신뢰도)"""
+        data = self.current_data()
+        return data.engine.evaluate(user_text, self.eligible_positions(user_text, data))
+
+    # ---- 캐시 키 ----
+
+    def prompt_variant(self):
+        """프롬프트 버전 + 응답 형식 (구조화 출력 여부에 따라 응답 내용이 달라짐)"""
+        return f"{PROMPT_VERSION}/schema" if self.config.structured_output else PROMPT_VERSION
+
+    def text_cache_key(self, user_text):
+        """정규화된 입력 + 데이터 해시 + 모델 + 프롬프트/규칙 버전으로 캐시 키 생성"""
+        config = self.config
+        data = self.current_data()
+        return make_cache_key(
+            normalize_text(user_text),
+            data.data_version,
+            config.model_name,
+            f"{self.prompt_variant()}/k{config.prompt_top_k}{'+db' if data.program_db else ''}"
+            f"/rules-{RULES_VERSION if config.rule_fastpath else 'off'}",
+        )
+
+    def audio_cache_key(self, audio_bytes):
+        """오디오 내용 해시 + 데이터 해시 + 모델 + 프롬프트 버전으로 캐시 키 생성"""
+        return make_cache_key(
+            "audio",
+            content_digest(audio_bytes),
+            self.current_data().data_version,
+            self.config.model_name,
+            self.prompt_variant(),
+        )
+
+    # ---- 프롬프트 ----
+
+    @traced("prompt")
+    def text_prompt(self, user_text):
+        """
+        (프롬프트, 응답 스키마) 반환, 구조화 출력을 쓰지 않으면 스키마는 None
+        프롬프트는 문자열, 또는 컨텍스트 캐시를 쓸 때 [정적 앞부분, 사용자 부분] 목록
+        """
+        # 로컬 검색으로 고른 상위 K개 후보 (색인과 표는 같은 데이터 버전에서)
+        data = self.current_data()
+        structured = self.config.structured_output
+        candidates = data.retriever.top_k(
+            user_text, self.config.prompt_top_k, allowed=self.eligible_positions(user_text, data)
+        )
+        catalog = data.prompt_catalog.subset(candidates)
+
+        # 지시문 앞부분이 캐시되어 있으면 후보 표와 어르신 상황만 더 보냄 (후보 표는 항상 요청별 부분)
+        # 요청당 예산을 넘으면 예시 → 순위가 낮은 후보 순서로 뺌 (캐시된 앞부분의 예시는 그대로)
+        prefix = self.cached_text_prefix(data)
+        if prefix is not None:
+            render = lambda catalog, examples: [prefix, render_text_suffix(catalog, user_text)]
+        else:
+            render = lambda catalog, examples: render_text_prompt(
+                catalog, user_text, structured=structured, examples=examples
+            )
+        fit = self.fit_budget(render, catalog, min_rows=self.config.budget_min_candidates)
+        schema = response_schema(fit.catalog) if structured else None
+        return fit.prompt, schema
+
+    def cached_text_prefix(self, data):
+        """컨텍스트 캐시에 등록된 텍스트 지시문 앞부분 (쓸 수 없으면 None)"""
+        cache = self.context_cache
+        if not cache.available:
+            return None
+        cache.sync(data.data_version)
+        prefix = StaticPrefix(render_text_prefix(structured=self.config.structured_output))
+        return prefix if cache.model_for(prefix) is not None else None
+
+    @traced("prompt")
+    def audio_prompt(self):
+        """
+        (프롬프트, 응답 스키마) 반환, 구조화 출력을 쓰지 않으면 스키마는 None
+        음성 프롬프트는 전체가 정적 앞부분 (컨텍스트 캐시가 있으면 오디오만 보냄)
+        """
+        data = self.current_data()
+        structured = self.config.structured_output
+        self.context_cache.sync(data.data_version)
+        # 전사 전이라 후보 순위가 없으므로 예시만 뺄 수 있음 (오디오 토큰은 실제 사용량으로만 집계)
+        fit = self.fit_budget(
+            lambda catalog, examples: render_audio_prompt(catalog, structured=structured, examples=examples),
+            data.prompt_catalog,
+        )
+        schema = response_schema(fit.catalog, transcript=True) if structured else None
+        return StaticPrefix(fit.prompt), schema
+
+    def fit_budget(self, render, catalog, min_rows=None):
+        """프롬프트를 요청당 예산에 맞추고 하루 예산을 확인, 넘으면 BudgetExceeded"""
+        fit = fit_prompt(
+            render,
+            catalog,
+            self.token_counter,
+            max_tokens=self.config.token_budget_per_request,
+            min_rows=min_rows,
+        )
+        self.admit_prompt(fit.tokens, fit.trimmed, fit.examples)
+        return fit
+
+    def admit_prompt(self, tokens, trimmed=0, examples=True):
+        """보낼 프롬프트 크기 기록 + 예산 확인, 넘으면 BudgetExceeded"""
+        record_prompt_tokens(tokens, trimmed, examples)
+        try:
+            self.budget.check(tokens)
+        except BudgetExceeded as e:
+            METRICS.inc(BUDGET_REJECTED, scope=e.scope)
+            raise
+
+    # ---- Gemini 호출 ----
+
+    def generation_config(self, schema=None):
+        """생성 설정 (구조화 출력이면 JSON MIME 타입 + 응답 스키마)"""
+        if schema is None:
+            return self.client.GenerationConfig(temperature=0.2)
+        return self.client.GenerationConfig(
+            temperature=0.2,
+            response_mime_type="application/json",
+            response_schema=schema,
+        )
+
+    def generate(self, contents, priority=PRIORITY_TEXT, coalesce_key=None, stream=False, schema=None,
+                 on_wait=None):
+        """
+        대기열에서 차례를 기다린 뒤 Gemini 호출 (on_wait(순번, 예상 대기 초)로 대기 상황 전달)
+        같은 요청(coalesce_key)이 처리 중이면 그 결과를 함께 사용합니다.
+        스트리밍 응답은 한 호출자만 읽을 수 있어 합치지 않습니다.
+        schema가 있으면 응답을 해당 JSON 스키마로 받습니다. (구조화 출력)
+        (응답, 실제 사용한 모델 이름)을 반환하고, 모두 실패하면 UpstreamUnavailable
+        """
+        timeouts = self.config.stage_timeouts
+        request_kwargs = {
+            "generation_config": self.generation_config(schema),
+            "request_options": {"timeout": timeouts["gemini_attempt"]},
+        }
+        # 재시도/대체 모델도 같은 우선순위/대기 시간 제한으로 다시 입장하고,
+        # gemini 단계 시간 제한이 지나면 (호출한 쪽이 포기했으므로) 더 호출하지 않음
+        retry_kwargs = {
+            "priority": priority,
+            "queue_timeout": timeouts["queue"],
+            "total_timeout": timeouts["gemini"],
+            **request_kwargs,
+        }
+        queued_at = time.perf_counter()
+        if stream:
+            self.gate.acquire(priority, on_wait=on_wait, timeout=timeouts["queue"])
+            record_queue_wait(time.perf_counter() - queued_at)
+            # 스트림이 열릴 때까지 (조각을 읽는 시간은 호출한 쪽에서 측정)
+            with span("gemini"):
+                return self.model.generate(contents, stream=True, **retry_kwargs)
+
+        def call():
+            # 입장한 호출만 실행됨 (합쳐진 요청은 대기 시간/토큰을 중복 집계하지 않음)
+            record_queue_wait(time.perf_counter() - queued_at)
+            with span("gemini"):
+                if self.config.hedged_requests:
+                    response, model_name = self.generate_hedged(contents, request_kwargs, retry_kwargs)
+                else:
+                    response, model_name = self.orchestrator.call(
+                        "gemini", self.model.generate, contents, **retry_kwargs
+                    )
+            self.account_usage(getattr(response, "usage_metadata", None), model_name)
+            return response, model_name
+
+        return self.gate.run(call, key=coalesce_key, priority=priority, on_wait=on_wait, timeout=timeouts["queue"])
+
+    def generate_hedged(self, contents, request_kwargs, retry_kwargs):
+        """
+        주 호출(재시도/대체 모델 포함)이 p95 안에 끝나지 않으면 헤지 호출을 보냄
+        헤지는 남는 할당량이 있을 때만 보냅니다. (응답, 모델 이름) 반환
+        """
+        catalog = self.current_data().catalog
+        result, _ = self.hedged_caller.call(
+            lambda: self.model.generate(contents, **retry_kwargs),
+            lambda: (self.hedge_model.generate_content(contents, **request_kwargs), self.hedge_model_name),
+            accept=lambda result: is_acceptable_response(result[0], catalog),
+            can_hedge=self.gate.try_acquire,
+            timeout=self.config.stage_timeouts["gemini"],
+        )
+        return result
+
+    def account_usage(self, usage_metadata, model_name):
+        """응답의 실제 토큰 사용량 → 지표 + 날짜별 장부 (하루 예산)"""
+        record_usage(usage_metadata, model_name)
+        self.budget.record(usage_metadata, model_name)
+
+    def upload_audio(self, audio_bytes, mime_type, suffix):
+        """Gemini에 오디오 업로드 시작 (백그라운드, 전처리 포함, Future 반환)"""
+        return self.orchestrator.submit(self._upload, audio_bytes, mime_type, suffix)
+
+    def _upload(self, audio_bytes, mime_type, suffix):
+        # 침묵 제거/모노/16kHz/Opus로 줄인 뒤 업로드 (업로드 시간과 오디오 토큰 감소)
+        with span("preprocess"):
+            audio = self.audio_preprocessor.prepare(audio_bytes, mime_type, suffix)
+        record_audio_bytes(audio.original_bytes, len(audio.data))
+        with span("upload"):
+            return upload_audio(self.client, audio.data, mime_type=audio.mime_type, suffix=audio.suffix)
+
+    # ---- 응답 처리 ----
+
+    @traced("parse")
+    def parse_response(self, response_text):
+        """응답 JSON 파싱 + 혜택 검증, (데이터, 제외한 이름 또는 None), JSON이 아니면 ValueError"""
+        data = json.loads(extract_json_text(response_text))
+        if not isinstance(data, dict):
+            raise ValueError("응답이 JSON 객체가 아닙니다")
+        return data, validate_benefits(data, self.current_data().catalog)
+
+    def _finish(self, response_text, model_name, cache, cache_key):
+        try:
+            data, dropped = self.parse_response(response_text)
+        except ValueError:
+            return Consultation(None, SOURCE_UNPARSED, model_name=model_name, cache_key=cache_key,
+                                raw_text=response_text)
+        primary = model_name == self.config.model_name
+        result = Consultation(
+            data,
+            SOURCE_GEMINI if primary else SOURCE_FALLBACK,
+            model_name=model_name,
+            cache_key=cache_key,
+            dropped=dropped or [],
+        )
+        # 주 모델의 추천 결과가 있는 응답만 캐시 (빈 결과가 TTL 동안 굳지 않도록)
+        if cache is not None and result.cacheable:
+            cache.set(cache_key, data)
+        return result
+
+    # ---- 상담 한 건 (화면 없이) ----
+
+    def consult_text(self, user_text, on_wait=None, use_cache=True):
+        """텍스트 상담: 캐시 → 규칙 판정 → Gemini, Gemini를 쓸 수 없거나 토큰 예산을 넘으면 규칙 결과로 대신"""
+        config = self.config
+        cache = self.response_cache if use_cache else None
+        cache_key = self.text_cache_key(user_text)
+
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            return Consultation(cached, SOURCE_CACHE, cache_key=cache_key)
+
+        # 나이/독거/수급 등으로 바로 판정되는 경우 규칙 엔진 결과 사용
+        if config.rule_fastpath:
+            rule_data, rule_confidence = self.evaluate_rules(user_text)
+            if rule_confidence >= config.rule_min_confidence:
+                if cache is not None:
+                    cache.set(cache_key, rule_data)
+                return Consultation(rule_data, SOURCE_RULES, cache_key=cache_key)
+
+        try:
+            prompt, schema = self.text_prompt(user_text)
+            response, model_name = self.generate(prompt, coalesce_key=cache_key, schema=schema, on_wait=on_wait)
+        except UpstreamUnavailable:
+            return Consultation(self.evaluate_rules(user_text)[0], SOURCE_RULES_FALLBACK, cache_key=cache_key)
+        return self._finish(response.text, model_name, cache, cache_key)
+
+    def consult_audio(self, audio_bytes, mime_type, suffix, on_wait=None, use_cache=True):
+        """음성 상담: 업로드와 프롬프트 준비를 겹쳐 실행하고 Gemini로 전사 + 분석 (음성 요청 우선)"""
+        cache = self.audio_cache if use_cache else None
+        cache_key = self.audio_cache_key(audio_bytes)
+
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            return Consultation(cached, SOURCE_CACHE, cache_key=cache_key)
+
+        upload_future = self.upload_audio(audio_bytes, mime_type, suffix)
+        prompt, schema = self.audio_prompt()
+        audio_file = self.orchestrator.wait("upload", upload_future)
+
+        response, model_name = self.generate(
+            [prompt, audio_file], priority=PRIORITY_AUDIO, coalesce_key=cache_key, schema=schema, on_wait=on_wait
+        )
+        return self._finish(response.text, model_name, cache, cache_key)
+
+    def stream_text(self, user_text, on_wait=None, use_cache=True):
+        """
+        텍스트 상담을 이벤트로 전달 (Gemini 스트리밍 응답을 도착하는 대로 검증)
+        ("greeting", 인사말) → ("benefit", 검증된 혜택)... → ("result", Consultation)
+        캐시/규칙 결과는 같은 순서의 이벤트를 한꺼번에 보냅니다.
+        """
+        config = self.config
+        cache = self.response_cache if use_cache else None
+        cache_key = self.text_cache_key(user_text)
+
+        result = None
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            result = Consultation(cached, SOURCE_CACHE, cache_key=cache_key)
+        elif config.rule_fastpath:
+            rule_data, rule_confidence = self.evaluate_rules(user_text)
+            if rule_confidence >= config.rule_min_confidence:
+                if cache is not None:
+                    cache.set(cache_key, rule_data)
+                result = Consultation(rule_data, SOURCE_RULES, cache_key=cache_key)
+
+        if result is None:
+            try:
+                prompt, schema = self.text_prompt(user_text)
+                response, model_name = self.generate(prompt, stream=True, schema=schema, on_wait=on_wait)
+            except UpstreamUnavailable:
+                result = Consultation(self.evaluate_rules(user_text)[0], SOURCE_RULES_FALLBACK, cache_key=cache_key)
+
+        if result is not None:
+            if result.data.get("greeting"):
+                yield "greeting", result.data["greeting"]
+            for benefit in result.data.get("benefits", []):
+                yield "benefit", benefit
+            yield "result", result
+            return
+
+        yield from self.stream_events(response, model_name, cache, cache_key)
+
+    def stream_events(self, response, model_name, cache=None, cache_key=None):
+        """
+        Gemini 스트리밍 응답 → 이벤트 (조각을 이어 붙이며 항목 하나가 완성되는 대로 검증)
+        ("greeting", 인사말) → ("benefit", 검증된 혜택)... → ("result", Consultation)
+        주 모델의 추천이 있는 결과만 cache에 저장합니다.
+        """
+        config = self.config
+        parser = IncrementalResponseParser()
+        catalog = self.current_data().catalog
+        validated, dropped = [], []
+        usage = None
+        for chunk in response:
+            # 사용량은 마지막 조각에 누적값으로 옴
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            try:
+                chunk_text = chunk.text
+            except ValueError:
+                continue  # 텍스트가 없는 조각 (종료 신호 등)
+            for kind, value in parser.feed(chunk_text):
+                if kind == "greeting":
+                    yield "greeting", value
+                    continue
+                fixed = fix_benefit(value, catalog)
+                if fixed is None:
+                    dropped.append(value.get("name", ""))
+                    continue
+                validated.append(fixed)
+                yield "benefit", fixed
+        self.account_usage(usage, model_name)
+
+        # 스트림 종료 후 나머지 필드(격려 메시지 등) 확인
+        try:
+            data = parser.result()
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            if parser.greeting is None and not validated:
+                yield "result", Consultation(None, SOURCE_UNPARSED, model_name=model_name, cache_key=cache_key,
+                                             raw_text=parser.text)
+                return
+            data = {"greeting": parser.greeting} if parser.greeting is not None else {}
+
+        data["benefits"] = validated
+        result = Consultation(
+            data,
+            SOURCE_GEMINI if model_name == config.model_name else SOURCE_FALLBACK,
+            model_name=model_name,
+            cache_key=cache_key,
+            dropped=dropped,
+        )
+        if cache is not None and result.cacheable:
+            cache.set(cache_key, data)
+        yield "result", result
+
+    def status(self):
+        """운영 상태 요약 (데이터 버전, Gemini 서킷 상태, 대기열)"""
+        snapshot = self.current_data()
+        return {
+            "data_version": snapshot.version,
+            "programs": len(snapshot.catalog),
+            "model": self.config.model_name,
+            "breaker": self.model.breaker.state,
+            "gate": self.gate.snapshot(),
+            "tokens": self.budget.snapshot(),
+            "context_cache": self.context_cache.snapshot(),
+            "audio_preprocess": {
+                "available": self.audio_preprocessor.available,
+                "last_error": self.audio_preprocessor.last_error,
+            },
+        }
+
+    def speech_pipeline(self):
+        """공유 TTS 작업 풀을 쓰는 새 음성 합성 파이프라인"""
+        return SpeechPipeline(self.tts_executor, self.synthesize_fn)
+
+    def synthesize_speech(self, data, timeout=None):
+        """검증된 결과 → 음성 안내 MP3 바이트 (섹션 단위 병렬 변환)"""
+        speech = self.speech_pipeline()
+        speech.submit(build_tts_text(data))
+        return speech.audio_bytes(timeout=timeout or self.config.stage_timeouts["tts"])
+
+    def shutdown(self):
+        self.orchestrator.shutdown()
+        self.tts_executor.shutdown(wait=False)
@@ -0,0 +1,329 @@
+"""
+로컬 Gemini/gTTS 대역 (API 키/네트워크 없이 엔진 전체 경로 실행)
+
+google.generativeai 모듈과 같은 이름(GenerativeModel, GenerationConfig, upload_file)을
+가진 객체로, ConsultationEngine(config, FakeGenAI())처럼 그대로 바꿔 끼웁니다.
+synthesize(text)도 제공해 gTTS 음성 합성까지 대신합니다.
+일괄 처리 CLI의 --stub 모드, 부하 테스트(scripts/benchmark.py),
+SILVERLINK_FAKE_GEMINI=true로 실행한 앱에서 사용합니다.
+
+- 응답: 응답 스키마(구조화 출력)의 후보 이름 중 앞쪽 몇 개를 추천하는 결정적인 JSON
+- 지연: 첫 토큰까지 latency(± jitter)초, 이후 출력 토큰을 tokens_per_second 속도로 전달
+- 장애 주입: error_rate 확률로 서버 오류/할당량 초과/시간 초과 예외
+- 토큰: 요청/응답 크기로 추정한 usage_metadata, 누적 통계는 stats()
+- 컨텍스트 캐시: caching.CachedContent.create / GenerativeModel.from_cached_content
+  (캐시한 앞부분은 cached_content_token_count로 집계, min_cache_tokens 미만이면 등록 실패,
+   삭제된 캐시를 참조하면 NotFound)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+# 응답 하나에 추천할 후보 수
+STUB_RECOMMENDATIONS = 3
+
+# 스트리밍 조각 크기 (글자)
+STREAM_CHUNK_CHARS = 16
+
+# 합성 음성 크기 (gTTS MP3는 한국어 한 글자에 대략 1KB 안팎)
+FAKE_MP3_BYTES_PER_CHAR = 1000
+
+
+class ServiceUnavailable(Exception):
+    """주입된 서버 오류 (503)"""
+    code = 503
+
+
+class ResourceExhausted(Exception):
+    """주입된 할당량 초과 (429)"""
+    code = 429
+
+
+class DeadlineExceeded(Exception):
+    """주입된 시간 초과"""
+
+
+INJECTED_ERRORS = {
+    "server": ServiceUnavailable,
+    "quota": ResourceExhausted,
+    "timeout": DeadlineExceeded,
+}
+
+
+def estimate_tokens(contents):
+    """대략적인 토큰 수 (UTF-8 4바이트당 1토큰, 오디오 등 문자열이 아닌 항목은 제외)"""
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    if not isinstance(contents, str):
+        return 0
+    return max(1, len(contents.encode("utf-8")) // 4)
+
+
+class NotFound(Exception):
+    """없는 리소스 (404, 만료/삭제된 캐시 콘텐츠 등)"""
+    code = 404
+
+
+class InvalidArgument(Exception):
+    """잘못된 요청 (400)"""
+    code = 400
+
+
+class GenerationConfig(dict):
+    """genai.GenerationConfig 대역 (키워드 인자를 그대로 보관)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+
+def _usage(prompt_tokens, output_tokens, cached_tokens=0):
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        cached_content_token_count=cached_tokens,
+        total_token_count=prompt_tokens + output_tokens,
+    )
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None, chunk_delay=0.0):
+        self.text = text
+        self.usage_metadata = usage_metadata
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self):
+        # 스트리밍 응답: 몇 글자씩 나눠서 전달 (마지막 조각에 사용량)
+        starts = range(0, len(self.text), STREAM_CHUNK_CHARS)
+        for i in starts:
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            last = i + STREAM_CHUNK_CHARS >= len(self.text)
+            yield FakeResponse(self.text[i:i + STREAM_CHUNK_CHARS], self.usage_metadata if last else None)
+
+
+def _candidate_names(generation_config):
+    """응답 스키마의 혜택 이름 enum (구조화 출력이 아니면 빈 목록)"""
+    schema = (generation_config or {}).get("response_schema") or {}
+    try:
+        name = schema["properties"]["benefits"]["items"]["properties"]["name"]
+    except (KeyError, TypeError):
+        return []
+    return list(name.get("enum", []))
+
+
+def stub_response(generation_config=None, audio=False):
+    """요청 설정으로 결정되는 응답 JSON 문자열"""
+    benefits = [
+        {
+            "name": name,
+            "relevance_score": 90 - 5 * i,
+            "relevance_reason": "상황에 맞는 혜택입니다",
+            "description": f"{name} 안내",
+            "next_action": "가까운 주민센터(☎ 129)에 문의하세요",
+        }
+        for i, name in enumerate(_candidate_names(generation_config)[:STUB_RECOMMENDATIONS])
+    ]
+    data = {
+        "greeting": "어르신 안녕하세요. 말씀하신 상황에 맞는 혜택을 찾아보았습니다.",
+        "benefits": benefits,
+        "encouragement": "가까운 주민센터에 방문하시면 자세히 안내받으실 수 있습니다.",
+    }
+    if audio:
+        data = {"transcript": "(녹음 내용)", **data}
+    return json.dumps(data, ensure_ascii=False)
+
+
+class GenerativeModel:
+    def __init__(self, model_name, client=None, cached_content=None, **kwargs):
+        self.model_name = model_name
+        self._client = client or FakeGenAI()
+        self._cached_content = cached_content
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        client = self._client
+        client.before_call(self.model_name)
+        if self._cached_content is not None and not client.has_cache(self._cached_content.name):
+            raise NotFound(f"CachedContent not found: {self._cached_content.name} (fake)")
+
+        # 업로드한 파일(문자열이 아닌 항목)이 있으면 음성 요청
+        audio = isinstance(contents, (list, tuple)) and any(not isinstance(part, str) for part in contents)
+        text = stub_response(generation_config, audio=audio)
+        cached_tokens = self._cached_content.tokens if self._cached_content is not None else 0
+        prompt_tokens = estimate_tokens(contents) + cached_tokens
+        output_tokens = estimate_tokens(text)
+        client.record(self.model_name, prompt_tokens, output_tokens, cached_tokens)
+        usage = _usage(prompt_tokens, output_tokens, cached_tokens)
+
+        # 출력 토큰 전달 시간 (스트리밍이면 조각마다 나눠서)
+        output_seconds = output_tokens / client.tokens_per_second if client.tokens_per_second > 0 else 0.0
+        if stream:
+            chunks = max(1, -(-len(text) // STREAM_CHUNK_CHARS))
+            return FakeResponse(text, usage, chunk_delay=output_seconds / chunks)
+        if output_seconds:
+            time.sleep(output_seconds)
+        return FakeResponse(text, usage)
+
+
+class CachedContent:
+    """caching.CachedContent 대역 (등록한 앞부분의 토큰 수만 기억)"""
+
+    def __init__(self, client, name, model, tokens):
+        self._client = client
+        self.name = name
+        self.model = model
+        self.tokens = tokens
+
+    def delete(self):
+        self._client.delete_cache(self.name)
+
+
+class _Caching:
+    """google.generativeai.caching 대역"""
+
+    def __init__(self, client):
+        self.CachedContent = SimpleNamespace(create=client.create_cache)
+
+
+class _ModelFactory:
+    """genai.GenerativeModel 대역 (생성자 + from_cached_content)"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __call__(self, model_name, **kwargs):
+        return GenerativeModel(model_name, client=self._client, **kwargs)
+
+    def from_cached_content(self, cached_content, **kwargs):
+        return GenerativeModel(cached_content.model, client=self._client, cached_content=cached_content)
+
+
+class FakeGenAI:
+    """google.generativeai 모듈 + gTTS 대역 (스레드 안전)"""
+
+    GenerationConfig = GenerationConfig
+
+    def __init__(self, latency=0.0, jitter=0.0, tokens_per_second=0.0, error_rate=0.0, error="server",
+                 upload_latency=0.0, tts_latency=0.0, seed=None, min_cache_tokens=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second    # 0이면 출력 지연 없음
+        self.error_rate = error_rate
+        self.error = INJECTED_ERRORS[error]
+        self.upload_latency = upload_latency
+        self.tts_latency = tts_latency
+        self.min_cache_tokens = min_cache_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.GenerativeModel = _ModelFactory(self)
+        self.caching = _Caching(self)
+        self.caches = {}
+        self.cache_creates = 0
+        self.calls = {}
+        self.errors = 0
+        self.uploads = 0
+        self.upload_bytes = 0
+        self.tts_calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+
+    @classmethod
+    def from_env(cls):
+        """FAKE_GEMINI_* 환경 변수로 지연/장애 설정"""
+        seed = os.getenv("FAKE_GEMINI_SEED")
+        return cls(
+            latency=float(os.getenv("FAKE_GEMINI_LATENCY", "0.5")),
+            jitter=float(os.getenv("FAKE_GEMINI_JITTER", "0.1")),
+            tokens_per_second=float(os.getenv("FAKE_GEMINI_TOKENS_PER_SECOND", "200")),
+            error_rate=float(os.getenv("FAKE_GEMINI_ERROR_RATE", "0")),
+            error=os.getenv("FAKE_GEMINI_ERROR", "server"),
+            upload_latency=float(os.getenv("FAKE_UPLOAD_LATENCY", "0.2")),
+            tts_latency=float(os.getenv("FAKE_TTS_LATENCY", "0.2")),
+            seed=int(seed) if seed else None,
+            min_cache_tokens=int(os.getenv("FAKE_GEMINI_MIN_CACHE_TOKENS", "0")),
+        )
+
+    def configure(self, **kwargs):
+        pass
+
+    def _delay(self, base):
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        delay = max(0.0, base + jitter)
+        if delay:
+            time.sleep(delay)
+
+    def before_call(self, model_name):
+        """첫 토큰까지의 지연 + 장애 주입"""
+        self._delay(self.latency)
+        with self._lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            raise self.error(f"{model_name}: injected {self.error.__name__} (fake)")
+
+    def create_cache(self, model=None, contents=None, display_name=None, ttl=None, **kwargs):
+        tokens = estimate_tokens(list(contents or []))
+        if tokens < self.min_cache_tokens:
+            raise InvalidArgument(f"Cached content is too small: {tokens} < {self.min_cache_tokens} (fake)")
+        with self._lock:
+            self.cache_creates += 1
+            name = f"cachedContents/fake-{self.cache_creates}"
+            cached = self.caches[name] = CachedContent(self, name, model, tokens)
+        return cached
+
+    def delete_cache(self, name):
+        with self._lock:
+            self.caches.pop(name, None)
+
+    def has_cache(self, name):
+        with self._lock:
+            return name in self.caches
+
+    def upload_file(self, path=None, mime_type=None, **kwargs):
+        # 실제 SDK처럼 경로와 파일 객체(BytesIO 등) 모두 받음
+        if hasattr(path, "read"):
+            size = len(path.read())
+        else:
+            size = os.path.getsize(path) if path and os.path.exists(path) else 0
+        self._delay(self.upload_latency)
+        with self._lock:
+            self.uploads += 1
+            self.upload_bytes += size
+            number = self.uploads
+        return {"uri": f"fake://upload/{number}", "mime_type": mime_type}
+
+    def synthesize(self, text, lang="ko"):
+        """gTTS 대역: 글자 수에 비례하는 가짜 MP3 바이트"""
+        self._delay(self.tts_latency)
+        with self._lock:
+            self.tts_calls += 1
+        return b"ID3" + b"\0" * (len(text) * FAKE_MP3_BYTES_PER_CHAR)
+
+    def record(self, model_name, prompt_tokens=0, output_tokens=0, cached_tokens=0):
+        with self._lock:
+            self.calls[model_name] = self.calls.get(model_name, 0) + 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self.cached_tokens += cached_tokens
+
+    def stats(self):
+        """누적 호출/토큰 통계"""
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "errors": self.errors,
+                "uploads": self.uploads,
+                "upload_bytes": self.upload_bytes,
+                "tts_calls": self.tts_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "cached_tokens": self.cached_tokens,
+                "caches": len(self.caches),
+                "cache_creates": self.cache_creates,
+            }
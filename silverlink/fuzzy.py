@@ -0,0 +1,133 @@
+"""
+혜택 이름 근사 매칭 (자모 단위 편집 거리)
+
+LLM이 "노인장기요양보험", "노인 장기 요양 보험", "노인 장기요양 보헙"처럼
+조금 다르게 쓴 이름도 카탈로그의 정확한 이름으로 되돌리고, 정말 없는 혜택만
+버리기 위한 매처입니다.
+
+- 한글 음절을 초성/중성/종성 자모로 나눠 비교 (받침 하나 틀린 오타도 작은 거리)
+- 자모 2-gram 역색인으로 후보를 먼저 좁히고, 후보에만 편집 거리 계산
+- "지원", "서비스"처럼 흔한 꼬리말을 뗀 핵심어끼리도 비교
+  ("노인 틀니" ↔ "노인 틀니 지원", "에너지 바우처 지원" ↔ "에너지바우처")
+- 신뢰도 = 1 - 편집 거리 / 긴 쪽 길이 (1.0 = 정규화 후 완전 일치)
+- 1등과 2등이 너무 비슷하면 어느 쪽인지 알 수 없으므로 매칭하지 않음
+"""
+
+from collections import Counter
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+# 후보로 편집 거리를 계산할 최대 개수
+MAX_CANDIDATES = 5
+
+# 혜택 이름 끝에 흔히 붙거나 빠지는 말 (긴 것부터)
+GENERIC_SUFFIXES = ("지원금", "지원", "서비스", "사업", "제도")
+
+# 핵심어만 일치할 때의 신뢰도 할인
+CORE_MATCH_WEIGHT = 0.95
+
+
+def decompose_jamo(text):
+    """한글 음절을 초성/중성/종성 자모로 분해 (그 외 문자는 그대로)"""
+    jamo = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            index = code - _HANGUL_BASE
+            jamo.append(chr(0x1100 + index // 588))
+            jamo.append(chr(0x1161 + (index % 588) // 28))
+            if index % 28:
+                jamo.append(chr(0x11A7 + index % 28))
+        else:
+            jamo.append(ch)
+    return "".join(jamo)
+
+
+def strip_generic(key):
+    """정규화된 이름에서 흔한 꼬리말 제거 (핵심어가 남을 때만)"""
+    for suffix in GENERIC_SUFFIXES:
+        if key.endswith(suffix) and len(key) > len(suffix) + 1:
+            return key[:-len(suffix)]
+    return key
+
+
+def similarity(a, b):
+    """자모 문자열 유사도 (1 - 편집 거리 / 긴 쪽 길이)"""
+    if not a or not b:
+        return 0.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
+
+
+def jamo_ngrams(jamo, n=2):
+    if len(jamo) < n:
+        return [jamo] if jamo else []
+    return [jamo[i:i + n] for i in range(len(jamo) - n + 1)]
+
+
+def edit_distance(a, b):
+    """레벤슈타인 거리 (삽입/삭제/치환 1)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyNameMatcher:
+    """정규화된 이름 목록에 대한 자모 편집 거리 매처"""
+
+    def __init__(self, keys, min_confidence=0.8, min_margin=0.05):
+        """keys: {정규화된 이름: 카탈로그 이름}"""
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self._entries = []  # (자모, 핵심어 자모, 카탈로그 이름)
+        self._index = {}    # 자모 2-gram → 항목 번호 목록
+        for key, name in keys.items():
+            jamo = decompose_jamo(key)
+            entry_id = len(self._entries)
+            self._entries.append((jamo, decompose_jamo(strip_generic(key)), name))
+            for gram in set(jamo_ngrams(jamo)):
+                self._index.setdefault(gram, []).append(entry_id)
+
+    def _candidates(self, jamo):
+        """2-gram을 가장 많이 공유하는 항목부터"""
+        shared = Counter()
+        for gram in set(jamo_ngrams(jamo)):
+            for entry_id in self._index.get(gram, ()):
+                shared[entry_id] += 1
+        return [entry_id for entry_id, _ in shared.most_common(MAX_CANDIDATES)]
+
+    def scores(self, key):
+        """[(신뢰도, 카탈로그 이름)] 높은 순, key는 정규화된 이름"""
+        jamo = decompose_jamo(key)
+        if not jamo:
+            return []
+        core = decompose_jamo(strip_generic(key))
+        scored = []
+        for entry_id in self._candidates(jamo):
+            target, target_core, name = self._entries[entry_id]
+            confidence = max(similarity(jamo, target), CORE_MATCH_WEIGHT * similarity(core, target_core))
+            scored.append((confidence, name))
+        scored.sort(key=lambda item: -item[0])
+        return scored
+
+    def match(self, key):
+        """(카탈로그 이름 또는 None, 신뢰도)"""
+        scored = self.scores(key)
+        if not scored:
+            return None, 0.0
+        confidence, name = scored[0]
+        if confidence < self.min_confidence:
+            return None, round(confidence, 3)
+        if len(scored) > 1 and confidence - scored[1][0] < self.min_margin:
+            return None, round(confidence, 3)
+        return name, round(confidence, 3)
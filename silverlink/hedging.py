@@ -0,0 +1,157 @@
+"""
+헤지 요청 (Gemini 꼬리 지연 줄이기)
+
+요청 하나에 Gemini 호출이 하나뿐이면, 가끔 느린 응답 하나가 그대로 사용자
+대기 시간이 됩니다. 주 호출이 평소의 p95 지연 안에 끝나지 않으면 두 번째 호출
+(헤지)을 보내고, 검증을 통과한 응답 중 먼저 도착한 것을 사용합니다.
+
+- 기준 시간: 최근 주 호출이 끝날 때까지(완료) 걸린 시간의 p95 (표본이 적으면 기본값)
+  첫 토큰까지의 시간(TTFT)이 아닙니다. 헤지는 두 응답을 끝까지 받아 검증한 뒤 고르므로
+  스트리밍 없이 호출하고, 그래서 EngineConfig.from_env는 헤지를 켜면 스트리밍 응답을 끕니다.
+  (STREAMING_RESPONSES 무시, 화면에는 응답이 다 온 뒤 한 번에 표시)
+- 헤지를 보낼지 여부는 can_hedge()로 결정 (예: 남는 할당량이 있을 때만)
+- 진 쪽은 취소 (아직 시작 전이면 실행하지 않고, 이미 보낸 HTTP 요청은
+  끊을 수 없으므로 결과만 버림)
+- 헤지 비율/승률 통계로 비용 대비 p99 개선을 조정
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from silverlink.orchestrator import StageTimeout
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+class LatencyTracker:
+    """최근 주 호출 완료 지연(초)을 보관하고 분위수로 헤지 기준 시간 계산"""
+
+    def __init__(self, window=200, min_samples=20, quantile=0.95,
+                 default_threshold=8.0, min_threshold=1.0, max_threshold=30.0):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.default_threshold = default_threshold
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def threshold(self):
+        """헤지를 보내기 전에 주 호출을 기다릴 시간"""
+        with self._lock:
+            enough = len(self._samples) >= self.min_samples
+        value = self.percentile(self.quantile) if enough else self.default_threshold
+        return min(self.max_threshold, max(self.min_threshold, value))
+
+
+class HedgeStats:
+    """헤지 통계 (요청 수, 헤지 비율, 헤지 승률)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+        self.failures = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "primary_wins": self.primary_wins,
+                "hedge_wins": self.hedge_wins,
+                "failures": self.failures,
+                "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+                "hedge_win_rate": round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0,
+            }
+
+
+class HedgedCaller:
+    """주 호출이 늦으면 헤지 호출을 보내고, 먼저 도착한 유효한 결과를 사용"""
+
+    def __init__(self, executor, tracker=None, stats=None, clock=time.monotonic):
+        self._executor = executor
+        self.tracker = tracker or LatencyTracker()
+        self.stats = stats or HedgeStats()
+        self._clock = clock
+
+    def call(self, primary_fn, hedge_fn, accept=lambda result: True, can_hedge=lambda: True, timeout=None):
+        """
+        (결과, PRIMARY 또는 HEDGE)를 반환
+        accept(result)가 False인 결과는 버리고 다른 쪽을 기다립니다.
+        둘 다 실패하면 마지막 오류, timeout 초과 시 StageTimeout("gemini")
+        """
+        start = self._clock()
+        deadline = None if timeout is None else start + timeout
+        self.stats.add(calls=1)
+
+        primary = self._executor.submit(primary_fn)
+        # 진 경우에도 끝까지 실행된 주 호출 지연은 기준 시간 계산에 사용
+        primary.add_done_callback(self._record_latency(start))
+        pending = {primary: PRIMARY}
+
+        threshold = self.tracker.threshold()
+        if deadline is not None:
+            threshold = min(threshold, max(0.0, deadline - start))
+        wait([primary], timeout=threshold)
+        if not primary.done() and can_hedge():
+            pending[self._executor.submit(hedge_fn)] = HEDGE
+            self.stats.add(hedged=1)
+
+        last_error = None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - self._clock())
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                self._cancel(pending)
+                self.stats.add(failures=1)
+                raise StageTimeout("gemini", timeout)
+
+            for future in done:
+                role = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if not accept(result):
+                    last_error = ValueError(f"{role} 응답이 검증을 통과하지 못했습니다")
+                    continue
+                self._cancel(pending)
+                self.stats.add(**{"primary_wins" if role == PRIMARY else "hedge_wins": 1})
+                return result, role
+
+        self.stats.add(failures=1)
+        raise last_error
+
+    def _record_latency(self, start):
+        def callback(future):
+            if not future.cancelled() and future.exception() is None:
+                self.tracker.record(self._clock() - start)
+        return callback
+
+    @staticmethod
+    def _cancel(pending):
+        for future in pending:
+            future.cancel()
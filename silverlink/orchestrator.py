@@ -0,0 +1,61 @@
+"""
+요청 처리 오케스트레이션 (스레드 풀 기반)
+
+Streamlit 스크립트 스레드에서 업로드 → Gemini 호출 → TTS를 하나씩 기다리면
+느린 외부 호출 하나가 전체 요청을 붙잡습니다. 이 모듈은 서로 독립적인 작업을
+공유 스레드 풀에서 동시에 실행하고, 단계별 시간 제한과 취소를 적용합니다.
+
+- submit(): 백그라운드에서 시작 (예: 오디오 업로드를 먼저 시작)
+- call(): 시간 제한을 두고 실행 결과를 기다림, 초과 시 StageTimeout
+- 이미 실행 중인 외부 호출은 강제로 멈출 수 없으므로, 시간 초과 시
+  결과를 버리고(취소 표시) 호출 측은 바로 다음 처리로 넘어갑니다.
+
+Streamlit 화면 코드(st.*)는 반드시 스크립트 스레드에서만 호출해야 하므로
+풀에는 네트워크/CPU 작업만 넘깁니다. 작업은 호출한 쪽의 컨텍스트(요청 기록 등)를
+복사해 실행하므로 풀에서 측정한 단계도 같은 요청에 기록됩니다.
+"""
+
+import concurrent.futures
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StageTimeout(TimeoutError):
+    """단계별 시간 제한 초과"""
+
+    def __init__(self, stage, timeout):
+        super().__init__(f"{stage} 단계가 {timeout:g}초 안에 끝나지 않았습니다 (timeout)")
+        self.stage = stage
+        self.timeout = timeout
+
+
+class Orchestrator:
+    """공유 스레드 풀에서 독립 작업을 겹쳐 실행하고 시간 제한을 적용"""
+
+    def __init__(self, max_workers=8, default_timeouts=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orchestrator")
+        self.default_timeouts = dict(default_timeouts or {})
+
+    def submit(self, fn, *args, **kwargs):
+        """작업을 백그라운드에서 시작하고 Future를 반환"""
+        return self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def wait(self, stage, future, timeout=None):
+        """
+        Future 결과를 시간 제한 안에서 기다림
+        시간 초과 시 아직 시작 전이면 취소하고 StageTimeout을 발생시킵니다.
+        """
+        if timeout is None:
+            timeout = self.default_timeouts.get(stage)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise StageTimeout(stage, timeout)
+
+    def call(self, stage, fn, *args, timeout=None, **kwargs):
+        """작업을 실행하고 시간 제한 안에서 결과를 기다림"""
+        return self.wait(stage, self.submit(fn, *args, **kwargs), timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
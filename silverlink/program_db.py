@@ -0,0 +1,308 @@
+"""
+복지 프로그램 데이터베이스 (SQLite, 조건별 색인)
+
+전국·지자체 복지 사업은 수천 개이고 지역/나이/소득/가구 조건이 제각각입니다.
+JSON 목록 전체를 매 요청마다 훑는 대신, 대상 조건(target)과 금액(amount)을
+타입이 있는 열로 변환해 SQLite에 저장하고 색인으로 후보만 꺼냅니다.
+
+- 열: 최소 나이(age_floor), 지역(region), 소득 구간(income_tier), 독거 조건,
+  최대 금액(원)과 지급 주기, 필요(관심사) 태그
+- 색인: 나이 기준, 지역 + 소득 구간, 소득 구간, 태그
+- sync(): JSON 데이터와 내용 지문을 비교해 바뀐 행만 다시 씀
+  (welfare_data.json이 원본이고 DB는 파생 저장소, 또는 DB 파일 자체를 원본으로 사용)
+- eligible_names(): 사용자 사실(Facts)로 명백히 자격이 없는 사업을 뺀 후보 이름
+  프롬프트 후보 선정과 규칙 엔진이 같은 결과를 사용합니다.
+- filter_key(): 결과를 바꾸는 사실만 모은 키 (나이는 데이터에 있는 나이 기준 단위로)
+  같은 키의 결과는 같으므로 호출하는 쪽에서 캐시할 수 있습니다. (DataSnapshot)
+
+DB 오류는 상담을 막지 않도록 "거르지 않음"(None)으로 처리합니다.
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+
+from silverlink.amounts import parse_amount
+from silverlink.eligibility import NATIONWIDE, parse_target
+from silverlink.response_cache import benefit_fingerprint
+
+DEFAULT_DB_PATH = os.path.join(".cache", "welfare_programs.sqlite3")
+
+# 소득 구간 (조건이 엄격할수록 큼)
+INCOME_ANY = 0          # 소득 조건 없음
+INCOME_LOW = 1          # 소득 하위/중위소득/기초연금 수급 등
+INCOME_RECIPIENT = 2    # 기초생활수급자·차상위계층
+
+# 파생 열 계산 규칙이 바뀌면 올림 (기존 DB 파일의 행을 원본 JSON에서 다시 계산)
+SCHEMA_VERSION = 2
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS programs (
+           id INTEGER PRIMARY KEY,
+           position INTEGER NOT NULL,
+           name TEXT NOT NULL UNIQUE,
+           fingerprint TEXT NOT NULL,
+           min_age INTEGER,
+           age_floor INTEGER NOT NULL,
+           region TEXT NOT NULL,
+           income_tier INTEGER NOT NULL,
+           requires_alone INTEGER NOT NULL,
+           amount_max INTEGER,
+           amount_period TEXT
+       )""",
+    # 원본 JSON은 따로 두어 조건 조회 시 좁은 행만 읽음
+    """CREATE TABLE IF NOT EXISTS program_payloads (
+           program_id INTEGER PRIMARY KEY,
+           payload TEXT NOT NULL
+       )""",
+    """CREATE TABLE IF NOT EXISTS program_tags (
+           tag TEXT NOT NULL,
+           program_id INTEGER NOT NULL,
+           PRIMARY KEY (tag, program_id)
+       ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_programs_age ON programs(age_floor, position, name)",
+    # 지역 + 나이 + 독거 조건을 색인만으로 판정 (테이블을 읽지 않음)
+    "CREATE INDEX IF NOT EXISTS idx_programs_region "
+    "ON programs(region, age_floor, requires_alone, income_tier, position, name)",
+    "CREATE INDEX IF NOT EXISTS idx_programs_income ON programs(income_tier)",
+    "CREATE INDEX IF NOT EXISTS idx_programs_position ON programs(position)",
+    "CREATE INDEX IF NOT EXISTS idx_program_tags_program ON program_tags(program_id)",
+)
+
+
+def program_row(benefit, position):
+    """혜택 하나 → programs 행 값과 태그"""
+    pred = parse_target(benefit)
+    if pred.requires_recipient:
+        income_tier = INCOME_RECIPIENT
+    elif pred.requires_low_income:
+        income_tier = INCOME_LOW
+    else:
+        income_tier = INCOME_ANY
+    amount = parse_amount(benefit.get("amount", ""))
+    row = {
+        "position": position,
+        "name": benefit["name"],
+        "fingerprint": benefit_fingerprint(benefit),
+        "min_age": pred.min_age,
+        # "또는" 조건이면 나이만으로 제외할 수 없으므로 0
+        "age_floor": pred.min_age if pred.min_age and pred.age_required else 0,
+        "region": pred.region or NATIONWIDE,
+        "income_tier": income_tier,
+        "requires_alone": int(pred.requires_alone),
+        "amount_max": amount.max_won,
+        "amount_period": amount.period,
+    }
+    return row, sorted(pred.tags)
+
+
+class ProgramDatabase:
+    """조건 열과 색인이 있는 SQLite 복지 프로그램 저장소"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # 내용이 바뀔 때마다 증가 (filter_key 결과 캐시 무효화용)
+        self.generation = 0
+        self._age_floors = None
+
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        # 여러 세션 스레드가 같은 연결을 쓰므로 check_same_thread=False + 락
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._migrate()
+
+    def _migrate(self):
+        """이전 규칙으로 계산된 파생 열을 저장된 원본 JSON으로 다시 계산"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        rows = self._conn.execute(
+            "SELECT p.id, p.position, d.payload FROM programs p "
+            "JOIN program_payloads d ON d.program_id = p.id"
+        ).fetchall()
+        with self._conn:
+            for program_id, position, payload in rows:
+                row, tags = program_row(json.loads(payload), position)
+                self._update(program_id, row)
+                self._conn.executemany(
+                    "INSERT INTO program_tags (tag, program_id) VALUES (?, ?)",
+                    [(tag, program_id) for tag in tags],
+                )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # ---- 저장 ----
+
+    def sync(self, welfare_data):
+        """
+        데이터 목록과 같아지도록 바뀐 행만 추가/수정/삭제
+        (추가, 수정, 삭제) 개수를 반환합니다.
+        """
+        with self._lock:
+            existing = {
+                name: (program_id, fingerprint, position)
+                for program_id, name, fingerprint, position in self._conn.execute(
+                    "SELECT id, name, fingerprint, position FROM programs"
+                )
+            }
+            added = updated = 0
+            with self._conn:
+                for position, benefit in enumerate(welfare_data):
+                    current = existing.pop(benefit["name"], None)
+                    if current is not None and current[1] == benefit_fingerprint(benefit):
+                        if current[2] != position:
+                            self._conn.execute(
+                                "UPDATE programs SET position = ? WHERE id = ?", (position, current[0])
+                            )
+                        continue
+
+                    row, tags = program_row(benefit, position)
+                    if current is None:
+                        program_id = self._insert(row)
+                        added += 1
+                    else:
+                        program_id = current[0]
+                        self._update(program_id, row)
+                        updated += 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO program_payloads (program_id, payload) VALUES (?, ?)",
+                        (program_id, json.dumps(benefit, ensure_ascii=False)),
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO program_tags (tag, program_id) VALUES (?, ?)",
+                        [(tag, program_id) for tag in tags],
+                    )
+
+                # 데이터에서 사라진 사업
+                removed = [(program_id,) for program_id, _, _ in existing.values()]
+                self._conn.executemany("DELETE FROM program_tags WHERE program_id = ?", removed)
+                self._conn.executemany("DELETE FROM program_payloads WHERE program_id = ?", removed)
+                self._conn.executemany("DELETE FROM programs WHERE id = ?", removed)
+            if added or updated or removed:
+                self.generation += 1
+                self._age_floors = None
+        return added, updated, len(removed)
+
+    def _insert(self, row):
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        cursor = self._conn.execute(
+            f"INSERT INTO programs ({columns}) VALUES ({placeholders})", tuple(row.values())
+        )
+        return cursor.lastrowid
+
+    def _update(self, program_id, row):
+        assignments = ", ".join(f"{column} = ?" for column in row)
+        self._conn.execute(
+            f"UPDATE programs SET {assignments} WHERE id = ?", tuple(row.values()) + (program_id,)
+        )
+        self._conn.execute("DELETE FROM program_tags WHERE program_id = ?", (program_id,))
+
+    # ---- 조회 ----
+
+    def load_all(self):
+        """저장된 순서대로 원본 혜택 목록 (DB 파일을 원본 데이터로 쓸 때)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.payload FROM programs p JOIN program_payloads d ON d.program_id = p.id "
+                "ORDER BY p.position"
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def query(self, age=None, alone=None, region=None, max_income_tier=None, needs=None,
+              limit=None, ordered=True):
+        """
+        조건에 맞는 사업 이름 목록 (ordered=False면 순서 없이, 정렬 비용 생략)
+        - age: 나이 기준(age_floor)이 이보다 높은 사업 제외
+        - alone: False면 독거 조건 사업 제외
+        - region: 전국 사업 + 해당 지역 사업만
+        - max_income_tier: 소득 구간이 이보다 엄격한 사업 제외
+        - needs: 필요 태그가 많이 겹치는 사업부터 (없으면 데이터 순서)
+        """
+        clauses, params = [], []
+        if age is not None:
+            clauses.append("p.age_floor <= ?")
+            params.append(age)
+        if alone is False:
+            clauses.append("p.requires_alone = 0")
+        if region is not None:
+            clauses.append("p.region IN (?, ?)")
+            params.extend((NATIONWIDE, region))
+        if max_income_tier is not None:
+            clauses.append("p.income_tier <= ?")
+            params.append(max_income_tier)
+
+        needs = sorted(needs or ())
+        if needs:
+            placeholders = ", ".join("?" for _ in needs)
+            sql = (
+                "SELECT p.name FROM programs p LEFT JOIN ("
+                f"SELECT program_id, COUNT(*) AS hits FROM program_tags WHERE tag IN ({placeholders}) "
+                "GROUP BY program_id) t ON t.program_id = p.id"
+            )
+            order = " ORDER BY COALESCE(t.hits, 0) DESC, p.position"
+            params = needs + params
+        else:
+            sql = "SELECT p.name FROM programs p"
+            order = " ORDER BY p.position" if ordered else ""
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += order
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return [name for (name,) in self._conn.execute(sql, params)]
+
+    def filter_key(self, facts):
+        """
+        eligible_names 결과를 결정하는 값만 모은 키
+        나이는 "이 나이 이하인 가장 큰 나이 기준"으로 바꿔 같은 결과끼리 묶습니다. (예: 70세, 72세 → 66)
+        """
+        age = facts.age
+        if age is not None:
+            floors = self._load_age_floors()
+            index = bisect.bisect_right(floors, age)
+            age = floors[index - 1] if index else -1
+        return age, facts.alone is False, facts.region, facts.low_income is False
+
+    def _load_age_floors(self):
+        floors = self._age_floors
+        if floors is None:
+            with self._lock:
+                floors = [age for (age,) in self._conn.execute(
+                    "SELECT DISTINCT age_floor FROM programs ORDER BY age_floor"
+                )]
+            self._age_floors = floors
+        return floors
+
+    def eligible_names(self, facts):
+        """
+        사용자 사실로 명백히 자격이 없는 사업을 뺀 이름 집합 (규칙 엔진의 제외 조건과 동일)
+        DB를 쓸 수 없으면 None (거르지 않음)
+        """
+        try:
+            age, not_alone, region, not_low_income = self.filter_key(facts)
+            # 소득이 기준을 넘는다고 확인된 경우만 소득 조건 사업 제외
+            # (저소득이어도 수급자 여부는 텍스트로 확정할 수 없어 수급자 대상 사업은 남김)
+            return set(self.query(
+                age=age, alone=False if not_alone else None, region=region,
+                max_income_tier=INCOME_ANY if not_low_income else None, ordered=False,
+            ))
+        except sqlite3.Error:
+            return None
+
+    def count(self):
+        """저장된 사업 수"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM programs").fetchone()[0]
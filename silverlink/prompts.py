@@ -0,0 +1,342 @@
+"""
+Gemini 프롬프트 컴파일러
+
+복지 데이터(welfare_data.json)를 요청마다 json.dumps(indent=2)로 다시 펼치지 않고,
+데이터를 불러올 때 한 번만 압축된 표 형식으로 변환해 재사용합니다.
+
+- 표 형식: 열 이름을 한 번만 쓰고 각 혜택을 `|`로 구분된 한 줄로 표현
+  → 들여쓰기/키 반복이 사라져 입력 토큰과 첫 토큰까지의 시간(TTFT) 감소
+- 바이트 수와 토큰 추정치를 함께 제공해 프롬프트 크기를 확인할 수 있음
+- 정적 앞부분 + 사용자 뒷부분: 지시문/예시/응답 형식을 앞에, 후보 표와 어르신 상황을 맨 뒤에 두어
+  앞부분이 요청마다 같은 바이트가 되도록 함 → Gemini 컨텍스트 캐시로 한 번만 처리 (context_cache.py)
+  텍스트 앞부분에는 데이터 표를 넣지 않으므로 카탈로그가 커져도 프롬프트는 후보 K개 크기로 유지
+- 구조화 출력 모드: 응답 형식을 프롬프트 예시 대신 JSON 스키마(response_schema)로 전달
+  혜택 이름은 후보 이름 enum으로 제한하고, 대상/금액/서류/문의처는 원본 데이터로
+  채우므로 모델이 다시 쓰지 않음 → 파싱 실패와 출력 토큰 감소
+"""
+
+from dataclasses import dataclass
+
+from silverlink.response_cache import benefit_fingerprint
+
+# 프롬프트 내용이 바뀌면 버전을 올려 이전 응답 캐시를 무효화합니다
+PROMPT_VERSION = "2025-12-01-instructions"
+
+# 표에 들어가는 열 (순서 = 출력 순서)
+CATALOG_COLUMNS = [
+    ("id", "번호"),
+    ("name", "이름"),
+    ("target", "대상"),
+    ("benefits", "혜택"),
+    ("amount", "금액"),
+    ("how_to_apply", "신청방법"),
+    ("documents", "서류"),
+    ("contact", "문의"),
+]
+
+
+def estimate_tokens(text):
+    """
+    토큰 수 추정 (로컬 휴리스틱)
+    한글·한자 등 비ASCII 문자는 글자당 약 1토큰, ASCII는 4글자당 약 1토큰으로 계산합니다.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_chars = len(text) - non_ascii
+    return non_ascii + (ascii_chars + 3) // 4
+
+
+def _cell(value):
+    """표 한 칸: 리스트는 쉼표로 잇고 구분자/줄바꿈은 제거"""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+
+def _cached(cache, benefit, build):
+    key = benefit_fingerprint(benefit)
+    if key not in cache:
+        cache[key] = build(benefit)
+    return cache[key]
+
+
+def compile_row(benefit):
+    """복지 혜택 하나를 표의 한 줄로 변환"""
+    return "|".join(_cell(benefit.get(key, "")) for key, _ in CATALOG_COLUMNS)
+
+
+@dataclass(frozen=True)
+class PromptCatalog:
+    """프롬프트에 넣을 복지 데이터의 사전 계산 결과"""
+    names: tuple
+    rows: tuple
+    header: str
+    table_text: str
+    names_text: str
+
+    @property
+    def count(self):
+        return len(self.rows)
+
+    @property
+    def byte_size(self):
+        return len(self.table_text.encode("utf-8"))
+
+    @property
+    def token_estimate(self):
+        return estimate_tokens(self.table_text)
+
+    def subset(self, indices):
+        """미리 변환된 줄을 재사용해 일부 혜택(사전 순위화 후보)만 담은 카탈로그 생성"""
+        names = tuple(self.names[i] for i in indices)
+        rows = tuple(self.rows[i] for i in indices)
+        return PromptCatalog(
+            names=names,
+            rows=rows,
+            header=self.header,
+            table_text="\n".join((self.header,) + rows),
+            names_text=", ".join(names),
+        )
+
+
+def compile_catalog(welfare_data, row_cache=None):
+    """
+    복지 데이터 전체를 한 번에 컴파일 (데이터를 불러올 때 1회 호출)
+    row_cache({혜택 지문: 표 한 줄})를 주면 바뀌지 않은 혜택은 다시 변환하지 않음
+    """
+    names = tuple(b["name"] for b in welfare_data)
+    if row_cache is None:
+        rows = tuple(compile_row(b) for b in welfare_data)
+    else:
+        rows = tuple(_cached(row_cache, b, compile_row) for b in welfare_data)
+    header = "|".join(label for _, label in CATALOG_COLUMNS)
+    return PromptCatalog(
+        names=names,
+        rows=rows,
+        header=header,
+        table_text="\n".join((header,) + rows),
+        names_text=", ".join(names),
+    )
+
+
+def _string(description):
+    return {"type": "STRING", "description": description}
+
+
+def response_schema(catalog, transcript=False):
+    """
+    구조화 출력용 응답 스키마 (GenerationConfig.response_schema)
+    혜택 이름은 catalog에 들어 있는 혜택 중 하나로 제한됩니다.
+    """
+    benefit = {
+        "type": "OBJECT",
+        "properties": {
+            "name": {"type": "STRING", "format": "enum", "enum": list(catalog.names)},
+            "relevance_score": {"type": "INTEGER", "description": "적합도 70-100"},
+            "relevance_reason": _string("왜 적합한지 구체적으로"),
+            "description": _string("혜택 내용 1-2문장"),
+            "next_action": _string("구체적 행동 지침"),
+        },
+        "required": ["name", "relevance_score", "relevance_reason", "description", "next_action"],
+    }
+    properties = {
+        "greeting": _string("2-3문장, 존댓말"),
+        "benefits": {"type": "ARRAY", "items": benefit},
+        "encouragement": _string("2-3문장, 따뜻하게"),
+    }
+    required = ["greeting", "benefits", "encouragement"]
+    if transcript:
+        properties = {"transcript": _string("어르신이 말씀하신 내용 그대로"), **properties}
+        required = ["transcript"] + required
+    return {"type": "OBJECT", "properties": properties, "required": required}
+
+
+# 구조화 출력 모드의 응답 형식 안내 (예시/형식 설명 대신)
+STRUCTURED_FORMAT_NOTE = (
+    "**응답 형식:** 지정된 JSON 스키마로만 응답하세요. "
+    "대상·금액·서류·문의처는 시스템이 원본 데이터로 채우므로 쓰지 않습니다."
+)
+
+
+# 추천 예시 (토큰 예산이 부족하면 가장 먼저 빼는 부분)
+_TEXT_EXAMPLES = """**좋은 추천 예시:**
+
+예시 1:
+입력: "72살 독거노인, 다리 불편, 소득 월 80만원"
+분석: 나이(72) → 노인복지 O, 독거 → 돌봄필요 O, 다리불편 → 장기요양 가능, 저소득 → 기초연금 O
+추천: 기초연금(95점), 독거노인 돌봄 서비스(92점), 노인 장기요양보험(85점)
+
+예시 2:
+입력: "68살, 치아 안 좋음, 건강검진 받고 싶어요"
+분석: 나이(68) → 노인건강 O, 치아 → 틀니/임플란트 O, 검진 → 무료검진 O
+추천: 노인 틀니 지원(98점), 노인 건강진단(95점), 임플란트 지원(90점)
+
+예시 3:
+입력: "75살, 일자리 찾습니다"
+분석: 나이(75) → 노인일자리 O, 일 의욕 O
+추천: 노인 일자리 지원(100점), 기초연금(80점 - 일자리 병행 가능)
+
+"""
+
+_AUDIO_EXAMPLES = """**좋은 추천 예시:**
+
+예시 1:
+음성: "72살 독거노인, 다리 불편, 소득 월 80만원"
+분석: 나이(72) → 노인복지, 독거 → 돌봄, 다리불편 → 장기요양, 저소득 → 기초연금
+추천: 기초연금(95점), 독거노인 돌봄 서비스(92점), 노인 장기요양보험(85점)
+
+예시 2:
+음성: "68살, 치아 안 좋음, 건강검진 받고 싶어요"
+분석: 나이(68) → 노인건강, 치아 → 틀니/임플란트, 검진 → 무료검진
+추천: 노인 틀니 지원(98점), 노인 건강진단(95점), 임플란트 지원(90점)
+
+"""
+
+
+class StaticPrefix(str):
+    """요청마다 같은 프롬프트 앞부분 (contents 첫 항목이면 컨텍스트 캐시 대상)"""
+
+
+def render_text_prompt(catalog, user_text, structured=False, examples=True):
+    """텍스트 상담용 프롬프트 (structured=True면 응답 형식은 스키마로 전달, examples=False면 추천 예시 생략)"""
+    return render_text_prefix(structured=structured, examples=examples) + "\n\n" + render_text_suffix(catalog, user_text)
+
+
+def render_text_suffix(catalog, user_text):
+    """텍스트 프롬프트의 요청별 부분 (맨 뒤): 로컬 검색으로 고른 후보 표 + 어르신 상황"""
+    return f"""복지 혜택 후보 ({catalog.count}개, 관련도 순, 한 줄에 하나, 열은 | 로 구분):
+허용된 혜택: {catalog.names_text}
+{catalog.table_text}
+
+어르신 상황: {user_text}"""
+
+
+def render_text_prefix(structured=False, examples=True):
+    """텍스트 프롬프트의 정적 앞부분 (지시문, 예시, 응답 형식), 데이터와 무관하게 같은 바이트"""
+    example_section = _TEXT_EXAMPLES if examples else ""
+    format_section = STRUCTURED_FORMAT_NOTE if structured else _TEXT_FORMAT_SECTION
+    return f"""당신은 대한민국 복지 전문가 AI입니다.
+
+**절대 준수 사항** (위반 시 잘못된 응답):
+1. 오직 맨 아래 "복지 혜택 후보" 표에 있는 혜택만 추천하세요
+   ⚠️ 후보 표에 없는 다른 혜택은 절대 언급 금지
+
+2. 금액과 대상 조건은 후보 표 데이터와 정확히 일치해야 합니다
+   ❌ 추측 금지 | ❌ 변경 금지 | ✅ 원본 그대로 복사
+
+3. 각 혜택의 적합도를 0-100점으로 평가하세요 (relevance_score)
+   - 90-100점: 완벽히 부합
+   - 75-89점: 대부분 부합
+   - 70-74점: 일부 부합
+   - 70점 미만: 추천하지 마세요
+
+4. 확실하지 않은 정보는 "가까운 주민센터(☎ 129)에 문의가 필요합니다"라고 명시
+
+**분석 방법 (단계별):**
+1단계: 사용자 정보 추출 (나이, 거주 형태, 건강 상태, 경제 상황)
+2단계: 각 복지 혜택의 대상 조건과 매칭
+3단계: 적합도 점수 산정 (조건 충족률 기반)
+4단계: 상위 3-5개 혜택 추천
+
+{example_section}{format_section}"""
+
+
+_TEXT_FORMAT_SECTION = """**응답 예시** (반드시 이 형식을 따르세요):
+{
+  "greeting": "어르신 안녕하세요. 혼자 생활하시면서 거동이 불편하신 상황이 정말 힘드실 것 같습니다. 받으실 수 있는 복지 혜택을 찾아보겠습니다.",
+  "benefits": [
+    {
+      "name": "독거노인 돌봄 서비스",
+      "relevance_score": 95,
+      "relevance_reason": "혼자 사시는 만 65세 이상 어르신을 위한 서비스",
+      "target": "만 65세 이상 독거노인",
+      "amount": "무료",
+      "description": "정기적으로 안전을 확인하고 필요한 서비스를 연계해드립니다",
+      "next_action": "주민센터를 방문하거나 국번없이 129에 전화하여 신청하세요",
+      "documents": ["신분증"],
+      "contact": "보건복지상담센터 129"
+    }
+  ],
+  "encouragement": "어르신께서 받으실 수 있는 혜택이 많습니다. 주민센터에 방문하시면 자세히 안내받으실 수 있습니다."
+}
+
+**JSON 형식** (다른 설명 없이 JSON만 출력):
+{
+  "greeting": "string (2-3문장, 존댓말)",
+  "benefits": [
+    {
+      "name": "string (후보 표 중 정확히 하나)",
+      "relevance_score": number (70-100),
+      "relevance_reason": "string (왜 적합한지 구체적으로)",
+      "target": "string (원본 데이터 그대로)",
+      "amount": "string (원본 데이터 그대로)",
+      "description": "string (1-2문장)",
+      "next_action": "string (구체적 행동 지침)",
+      "documents": ["string"],
+      "contact": "string"
+    }
+  ],
+  "encouragement": "string (2-3문장, 따뜻하게)"
+}"""
+
+
+def render_audio_prompt(catalog, structured=False, examples=True):
+    """
+    음성 상담용 프롬프트 (오디오 파일과 함께 전송, structured=True면 응답 형식은 스키마로 전달)
+    examples=False면 추천 예시 생략
+    """
+    example_section = _AUDIO_EXAMPLES if examples else ""
+    if structured:
+        format_section = STRUCTURED_FORMAT_NOTE
+    else:
+        format_section = _AUDIO_FORMAT_SECTION.format(count=catalog.count)
+    return f"""이 오디오에서 어르신의 말씀을 듣고 다음을 수행해주세요:
+
+**절대 준수 사항** (위반 시 잘못된 응답):
+1. 먼저 어르신이 말씀하신 내용을 텍스트로 정확하게 정리하세요 (transcript 필드)
+
+2. 오직 아래 제공된 {catalog.count}개 복지 혜택만 추천하세요
+   허용된 혜택: {catalog.names_text}
+   ⚠️ 위 목록에 없는 다른 혜택은 절대 언급 금지
+
+3. 금액과 대상 조건은 아래 데이터와 정확히 일치해야 합니다
+   ❌ 추측 금지 | ❌ 변경 금지 | ✅ 원본 그대로 복사
+
+4. 각 혜택의 적합도를 0-100점으로 평가하세요 (relevance_score)
+   - 90-100점: 완벽히 부합
+   - 75-89점: 대부분 부합
+   - 70-74점: 일부 부합
+   - 70점 미만: 추천하지 마세요
+
+5. 확실하지 않은 정보는 "가까운 주민센터(☎ 129)에 문의가 필요합니다"라고 명시
+
+**분석 방법 (단계별):**
+1단계: 음성 텍스트 변환 (transcript)
+2단계: 사용자 정보 추출 (나이, 거주, 건강, 경제)
+3단계: 조건 매칭 및 적합도 점수 산정
+4단계: 상위 3-5개 혜택 추천
+
+{example_section}복지 혜택 데이터베이스 ({catalog.count}개, 한 줄에 하나, 열은 | 로 구분):
+{catalog.table_text}
+
+{format_section}"""
+
+
+_AUDIO_FORMAT_SECTION = """**JSON 형식** (다른 설명 없이 JSON만 출력):
+{{
+  "transcript": "string (어르신이 말씀하신 내용 텍스트로)",
+  "greeting": "string (2-3문장, 존댓말)",
+  "benefits": [
+    {{
+      "name": "string (위 {count}개 중 정확히 하나)",
+      "relevance_score": number (70-100),
+      "relevance_reason": "string (왜 적합한지 구체적으로)",
+      "target": "string (원본 데이터 그대로)",
+      "amount": "string (원본 데이터 그대로)",
+      "description": "string (1-2문장)",
+      "next_action": "string (구체적 행동 지침)",
+      "documents": ["string"],
+      "contact": "string"
+    }}
+  ],
+  "encouragement": "string (2-3문장, 따뜻하게)"
+}}"""
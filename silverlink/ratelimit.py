@@ -0,0 +1,166 @@
+"""
+Gemini 호출 입장 제어 (토큰 버킷 + 공정 대기열 + 동일 요청 합치기)
+
+Gemini API 무료 할당량은 분당 15회입니다. 여러 세션이 동시에 호출하면
+429(할당량 초과) 오류가 연달아 나고, 사용자는 오류를 본 뒤에야 기다리게 됩니다.
+이 모듈은 모든 generate_content 호출 앞에서 미리 순서를 정합니다.
+
+- 토큰 버킷: 분당 요청 수(rpm)만큼 일정하게 토큰을 채우고, 호출마다 하나 사용
+- 공정 대기열: 토큰은 대기열 맨 앞 요청만 가져감 (먼저 온 순서, 음성 우선)
+  오래 기다린 요청은 우선순위가 점점 올라가 텍스트 요청도 밀려나지 않음
+- 동일 요청 합치기: 같은 키(캐시 키)의 요청이 이미 처리 중이면 새로 호출하지 않고
+  그 결과를 함께 받음
+- 대기 중에는 on_wait(순번, 예상 대기 초)를 호출해 화면에 순서를 표시
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+from silverlink.orchestrator import StageTimeout
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_AUDIO = 0
+PRIORITY_TEXT = 1
+
+# 대기 상태 확인 주기 (초)
+_POLL_SECONDS = 1.0
+
+
+class GeminiGate:
+    """모든 세션이 공유하는 Gemini 호출 입장 제어"""
+
+    def __init__(self, requests_per_minute=15, burst=1, aging_seconds=30.0, clock=time.monotonic):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, int(burst))
+        # 이만큼 기다리면 우선순위가 한 단계 올라감
+        self.aging_seconds = aging_seconds
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiters = {}    # 순번 → (우선순위, 대기 시작 시각)
+        self._inflight = {}   # 요청 키 → Future
+        self.admitted = 0
+        self.coalesced = 0
+
+    # ---- 토큰 버킷 ----
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _seconds_until_token(self):
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        """서버가 할당량 초과(429)를 알려오면 그동안 새 호출을 멈춤"""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    # ---- 공정 대기열 ----
+
+    def _sort_key(self, seq, now):
+        priority, enqueued_at = self._waiters[seq]
+        return (priority - (now - enqueued_at) / self.aging_seconds, seq)
+
+    def _order(self):
+        now = self._clock()
+        return sorted(self._waiters, key=lambda seq: self._sort_key(seq, now))
+
+    def acquire(self, priority=PRIORITY_TEXT, on_wait=None, timeout=None):
+        """
+        차례가 오고 토큰이 생길 때까지 기다림
+        on_wait(position, eta_seconds)는 호출한 스레드에서 불리므로 화면 갱신에 사용 가능
+        timeout 안에 차례가 오지 않으면 StageTimeout("queue")
+        """
+        with self._cond:
+            seq = next(self._seq)
+            self._waiters[seq] = (priority, self._clock())
+        deadline = None if timeout is None else self._clock() + timeout
+
+        try:
+            while True:
+                with self._cond:
+                    self._refill()
+                    order = self._order()
+                    if order[0] == seq and self._tokens >= 1:
+                        self._tokens -= 1
+                        self.admitted += 1
+                        return
+                    position = order.index(seq) + 1
+                    eta = self._seconds_until_token() + (position - 1) / self.rate
+
+                if deadline is not None and self._clock() >= deadline:
+                    raise StageTimeout("queue", timeout)
+                if on_wait:
+                    on_wait(position, eta)
+
+                with self._cond:
+                    self._cond.wait(timeout=min(_POLL_SECONDS, max(0.05, self._seconds_until_token())))
+        finally:
+            with self._cond:
+                self._waiters.pop(seq, None)
+                self._cond.notify_all()
+
+    def try_acquire(self):
+        """기다리는 요청이 없고 토큰이 남아 있을 때만 바로 사용 (헤지 요청 등 선택적 호출용)"""
+        with self._cond:
+            self._refill()
+            if self._waiters or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.admitted += 1
+            return True
+
+    # ---- 동일 요청 합치기 ----
+
+    def run(self, fn, key=None, priority=PRIORITY_TEXT, on_wait=None, timeout=None):
+        """
+        차례를 기다린 뒤 fn()을 실행하고 결과를 반환
+        같은 key의 요청이 이미 처리 중이면 fn을 호출하지 않고 그 결과를 공유합니다.
+        """
+        if key is None:
+            self.acquire(priority, on_wait=on_wait, timeout=timeout)
+            return fn()
+
+        with self._cond:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            self.acquire(priority, on_wait=on_wait, timeout=timeout)
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+    def snapshot(self):
+        """현재 상태 (운영 모니터링용)"""
+        with self._cond:
+            self._refill()
+            return {
+                "waiting": len(self._waiters),
+                "inflight": len(self._inflight),
+                "tokens": round(self._tokens, 2),
+                "admitted": self.admitted,
+                "coalesced": self.coalesced,
+            }
@@ -0,0 +1,277 @@
+"""
+Gemini 호출 장애 대응 (재시도 + 서킷 브레이커 + 모델 대체)
+
+일시적인 네트워크 끊김이나 서버 오류(5xx) 한 번에 상담 전체가 실패하지 않도록
+- 일시적 오류는 지터를 넣은 지수 백오프로 몇 번 다시 시도
+- 연속 실패가 쌓이면 서킷 브레이커를 열어 한동안 주 모델(gemini-2.5-pro) 호출을 건너뜀
+- 주 모델을 쓸 수 없으면 더 빠르고 저렴한 대체 모델(gemini-2.5-flash)로 응답
+- 대체 모델도 실패하면 UpstreamUnavailable → 앱에서 규칙 기반 답변으로 대체
+- 재시도와 대체 모델 호출은 입장 제어(GeminiGate)를 다시 거치고, 한 마감 시각을 함께 씀
+
+API 키 오류처럼 다시 시도해도 소용없는 오류는 바로 올려보냅니다.
+"""
+
+import random
+import threading
+import time
+
+from silverlink.orchestrator import StageTimeout
+from silverlink.ratelimit import PRIORITY_TEXT
+
+# 오류 종류
+AUTH = "auth"
+QUOTA = "quota"
+TIMEOUT = "timeout"
+NETWORK = "network"
+SERVER = "server"
+OTHER = "other"
+
+# 다시 시도할 가치가 있는 오류
+TRANSIENT_ERRORS = {QUOTA, TIMEOUT, NETWORK, SERVER}
+
+_ERROR_TYPES = {
+    "Unauthenticated": AUTH,
+    "PermissionDenied": AUTH,
+    "ResourceExhausted": QUOTA,
+    "TooManyRequests": QUOTA,
+    "DeadlineExceeded": TIMEOUT,
+    "TimeoutError": TIMEOUT,
+    "StageTimeout": TIMEOUT,
+    "ServiceUnavailable": SERVER,
+    "InternalServerError": SERVER,
+    "BadGateway": SERVER,
+    "GatewayTimeout": SERVER,
+    "ConnectionError": NETWORK,
+    "RetryError": NETWORK,
+}
+
+
+def classify_error(error):
+    """예외를 오류 종류(AUTH/QUOTA/TIMEOUT/NETWORK/SERVER/OTHER)로 분류"""
+    for cls in type(error).__mro__:
+        if cls.__name__ in _ERROR_TYPES:
+            return _ERROR_TYPES[cls.__name__]
+
+    code = getattr(error, "code", None)
+    if code == 429:
+        return QUOTA
+    if isinstance(code, int) and code >= 500:
+        return SERVER
+
+    message = str(error).lower()
+    if "api key" in message:
+        return AUTH
+    if "quota" in message or "429" in message or "rate limit" in message:
+        return QUOTA
+    if "timeout" in message or "deadline" in message:
+        return TIMEOUT
+    if "network" in message or "connection" in message:
+        return NETWORK
+    if "503" in message or "500" in message or "unavailable" in message:
+        return SERVER
+    return OTHER
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=8.0):
+    """지터를 넣은 지수 백오프 (attempt=0부터, 0 ~ base*2^attempt 사이 무작위)"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class UpstreamUnavailable(Exception):
+    """주 모델과 대체 모델 모두 사용할 수 없음 (규칙 기반 답변으로 대체)"""
+
+    def __init__(self, cause=None):
+        super().__init__(f"Gemini를 사용할 수 없습니다: {cause}")
+        self.cause = cause
+
+
+class CircuitBreaker:
+    """
+    연속 실패 failure_threshold번이면 열림 → reset_timeout초 동안 호출 차단
+    → 한 번 시험 호출(반열림) → 성공하면 닫힘, 실패하면 다시 열림
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """지금 주 모델을 호출해도 되는지 (반열림 상태에서는 한 요청만 시험)"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """상태는 그대로 두고 반열림 시험 호출만 끝냄 (주 모델 상태를 알 수 없는 오류)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class Deadline:
+    """재시도와 대체 모델 호출 전체가 함께 쓰는 마감 시각 (seconds=None이면 제한 없음)"""
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self._at = None if seconds is None else clock() + seconds
+
+    def remaining(self):
+        return None if self._at is None else self._at - self._clock()
+
+    def expired(self):
+        return self._at is not None and self.remaining() <= 0
+
+    def cap(self, seconds):
+        """seconds와 남은 시간 중 짧은 쪽 (둘 다 없으면 None)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        return remaining if seconds is None else max(0.0, min(seconds, remaining))
+
+    def check(self):
+        if self.expired():
+            raise StageTimeout("gemini", self.seconds)
+
+
+def is_queue_timeout(error):
+    """입장 제어 대기 시간 초과 (로컬 혼잡이라 주 모델 장애로 세지 않음)"""
+    return isinstance(error, StageTimeout) and error.stage == "queue"
+
+
+class ResilientModel:
+    """
+    genai.GenerativeModel을 감싸 재시도/서킷 브레이커/대체 모델을 적용
+
+    generate()는 (응답, 실제 사용한 모델 이름)을 반환합니다.
+    대체 모델 응답은 품질이 다를 수 있어 앱에서 캐시하지 않습니다.
+    total_timeout을 주면 재시도와 대체 모델 호출이 한 마감 시각을 함께 쓰고,
+    지나면 더 호출하지 않습니다. (호출한 쪽이 포기한 뒤 할당량을 쓰지 않도록)
+    """
+
+    def __init__(self, primary, primary_name, fallback=None, fallback_name=None,
+                 breaker=None, retries=2, base_delay=1.0, max_delay=8.0, gate=None, sleep=time.sleep,
+                 clock=time.monotonic):
+        self.primary = primary
+        self.primary_name = primary_name
+        self.fallback = fallback
+        self.fallback_name = fallback_name
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # 재시도와 대체 모델 호출도 분당 할당량을 쓰므로 입장 제어(GeminiGate)를 다시 거침
+        self.gate = gate
+        self._sleep = sleep
+        self._clock = clock
+
+    def _admit(self, priority, queue_timeout, deadline):
+        """입장 제어 통과 (처음 입장과 같은 우선순위, 대기는 마감 시각까지만)"""
+        deadline.check()
+        if self.gate is not None:
+            self.gate.acquire(priority, timeout=deadline.cap(queue_timeout))
+            deadline.check()
+
+    @staticmethod
+    def _attempt_kwargs(kwargs, deadline):
+        """호출 한 번의 시간 제한(request_options.timeout)을 남은 시간 안으로 줄임"""
+        options = kwargs.get("request_options")
+        if deadline.remaining() is None or not isinstance(options, dict):
+            return kwargs
+        return {**kwargs, "request_options": {**options, "timeout": deadline.cap(options.get("timeout"))}}
+
+    def _call_with_retry(self, model, contents, retries, priority=PRIORITY_TEXT, queue_timeout=None,
+                         deadline=None, admit=False, **kwargs):
+        """admit=True면 첫 호출도 입장 제어를 거침 (대체 모델)"""
+        deadline = deadline or Deadline()
+        for attempt in range(retries + 1):
+            if attempt or admit:
+                self._admit(priority, queue_timeout, deadline)
+            try:
+                return model.generate_content(contents, **self._attempt_kwargs(kwargs, deadline))
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in TRANSIENT_ERRORS or attempt == retries:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= delay:
+                    raise  # 기다렸다 다시 시도할 시간이 남지 않음
+                if kind == QUOTA and self.gate is not None:
+                    self.gate.pause(delay)
+                self._sleep(delay)
+
+    def generate(self, contents, priority=PRIORITY_TEXT, queue_timeout=None, total_timeout=None, **kwargs):
+        """
+        주 모델 → (실패/차단 시) 대체 모델 → (실패 시) UpstreamUnavailable
+        priority/queue_timeout은 재시도/대체 모델 호출 때 입장 제어(GeminiGate)에 그대로 전달
+        total_timeout(초)이 지나면 재시도/대체 모델 호출 없이 UpstreamUnavailable
+        """
+        deadline = Deadline(total_timeout, self._clock)
+        retry_kwargs = {"priority": priority, "queue_timeout": queue_timeout, "deadline": deadline, **kwargs}
+        cause = "서킷 브레이커 열림"
+        if self.breaker.allow():
+            try:
+                response = self._call_with_retry(self.primary, contents, self.retries, **retry_kwargs)
+            except Exception as e:
+                if is_queue_timeout(e) or classify_error(e) not in TRANSIENT_ERRORS:
+                    # 잘못된 요청/API 키 오류, 입장 대기 초과는 주 모델 장애도 정상 확인도 아님
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                cause = e
+            else:
+                self.breaker.record_success()
+                return response, self.primary_name
+
+        if self.fallback is None or deadline.expired():
+            raise UpstreamUnavailable(cause)
+        try:
+            response = self._call_with_retry(self.fallback, contents, 1, admit=True, **retry_kwargs)
+            return response, self.fallback_name
+        except Exception as e:
+            if classify_error(e) not in TRANSIENT_ERRORS:
+                raise
+            raise UpstreamUnavailable(e) from e
+
+    def generate_content(self, contents, **kwargs):
+        """genai.GenerativeModel과 같은 인터페이스 (응답만 반환)"""
+        return self.generate(contents, **kwargs)[0]
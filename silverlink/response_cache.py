@@ -0,0 +1,192 @@
+"""
+세션·프로세스 간 공유 응답 캐시 (SQLite 기반)
+
+같은 상황을 같은 말로 설명하는 요청마다 Gemini를 다시 호출하지 않도록
+검증(validate_and_fix_benefits)까지 끝난 JSON 결과를 저장합니다.
+
+- 키: 정규화된 입력 텍스트 + 복지 데이터 해시 + 모델명 + 프롬프트 버전
+- 만료: TTL (기본 7일)
+- 용량: 최대 항목 수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 음성: 결과와 함께 생성된 TTS MP3도 같은 행에 저장 (blob)
+
+SQLite 파일 하나를 여러 Streamlit 세션/프로세스가 함께 사용합니다.
+캐시 오류는 절대 상담을 막지 않도록 "캐시 없음"으로 처리합니다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from silverlink.telemetry import count_cache
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "silverlink_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+
+_TABLE_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+_PUNCTUATION = re.compile(r"[.,!?~…·\"'`()\[\]{}]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """
+    캐시 키용 입력 정규화
+    예: "저는 72살이고,  혼자 살아요!" → "저는 72살이고 혼자 살아요"
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def data_hash(data):
+    """복지 데이터 내용 해시 (데이터가 바뀌면 캐시 키도 바뀜)"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def benefit_fingerprint(benefit):
+    """혜택 하나의 내용 지문 (데이터 갱신 시 바뀐 혜택만 다시 계산하는 데 사용)"""
+    return json.dumps(benefit, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def make_cache_key(*parts):
+    """키 구성 요소를 하나의 SHA-256 문자열로 합칩니다."""
+    joined = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def content_digest(payload):
+    """바이트 내용 주소 (오디오 파일 등, 같은 내용이면 같은 값)"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """TTL/LRU 제한이 있는 SQLite 키-값 캐시 (값은 JSON, 선택적으로 MP3 blob)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, table="response_cache"):
+        if not _TABLE_NAME.match(table):
+            raise ValueError(f"잘못된 캐시 테이블 이름: {table}")
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 여러 세션 스레드가 같은 연결을 쓰므로 check_same_thread=False + 락
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   blob BLOB,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """캐시된 값을 반환합니다. 없거나 만료되었으면 None."""
+        value = self._get(key)
+        count_cache(self.table, value is not None)
+        return value
+
+    def _get(self, key):
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+
+                self._conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            return json.loads(value)
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def set(self, key, value):
+        """값을 저장하고 만료/초과 항목을 정리합니다."""
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            with self._lock:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now),
+                )
+                self._evict(now)
+                self._conn.commit()
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def get_blob(self, key):
+        """값과 함께 저장된 바이너리(MP3 등)를 반환합니다. 없으면 None."""
+        blob = self._get_blob(key)
+        count_cache(f"{self.table}_blob", blob is not None)
+        return blob
+
+    def _get_blob(self, key):
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT blob, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None or row[0] is None or time.time() - row[1] > self.ttl_seconds:
+                return None
+            return bytes(row[0])
+        except sqlite3.Error:
+            return None
+
+    def set_blob(self, key, blob):
+        """이미 저장된 항목에 바이너리를 붙입니다. (항목이 없으면 무시)"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET blob = ? WHERE key = ?", (sqlite3.Binary(blob), key)
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, now):
+        # 1. TTL 만료 항목 삭제
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        # 2. 최대 항목 수 초과분을 최근 사용 순으로 잘라냄 (LRU)
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def count(self):
+        """저장된 항목 수"""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
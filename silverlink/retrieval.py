@@ -0,0 +1,111 @@
+"""
+복지 혜택 사전 순위화 (로컬 검색 단계)
+
+사용자 상황 텍스트와 각 혜택의 name / target / benefits 필드를
+한글 글자 n-gram(2·3글자) 단위로 비교해 BM25 점수를 매깁니다.
+상위 K개 후보만 프롬프트에 넣어, 데이터가 수천 개로 늘어나도
+프롬프트 크기와 응답 지연이 일정하게 유지되도록 합니다.
+
+- 역색인(n-gram → 문서 목록)으로 질의에 등장한 n-gram의 문서만 계산
+- 필드 가중치: 이름 > 대상 조건 = 혜택 내용
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import islice
+
+# 필드별 가중치 (이름이 가장 강한 신호)
+FIELD_WEIGHTS = {
+    "name": 2.0,
+    "target": 1.0,
+    "benefits": 1.0,
+}
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+def tokenize(text, ngram_sizes=(2, 3)):
+    """
+    텍스트를 글자 n-gram 목록으로 변환
+    예: "다리가 아파요" → ["다리", "리가", "다리가", "아파", "파요", "아파요"]
+    한 글자 단어는 그대로 사용합니다. (예: "눈")
+    """
+    grams = []
+    for word in _WORD.findall((text or "").lower()):
+        if len(word) == 1:
+            grams.append(word)
+            continue
+        for n in ngram_sizes:
+            grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+class CatalogRetriever:
+    """복지 데이터에 대한 BM25 역색인 (데이터 로드 시 1회 생성)"""
+
+    def __init__(self, welfare_data, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(welfare_data)
+
+        # 문서별 가중 단어 빈도 (필드 가중치 반영)
+        doc_freqs = []
+        doc_lengths = []
+        for benefit in welfare_data:
+            freqs = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for gram in tokenize(benefit.get(field, "")):
+                    freqs[gram] += weight
+            doc_freqs.append(freqs)
+            doc_lengths.append(sum(freqs.values()))
+
+        self.avg_length = (sum(doc_lengths) / self.size) if self.size else 0.0
+
+        # 역색인: n-gram → [(문서 번호, BM25 단어 가중치)]
+        # 단어 가중치는 질의와 무관하므로 미리 계산해둡니다
+        postings = defaultdict(list)
+        for doc_id, freqs in enumerate(doc_freqs):
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_id] / (self.avg_length or 1.0))
+            for gram, tf in freqs.items():
+                postings[gram].append((doc_id, tf * (self.k1 + 1) / (tf + norm)))
+
+        self.postings = {}
+        for gram, docs in postings.items():
+            df = len(docs)
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            self.postings[gram] = [(doc_id, idf * weight) for doc_id, weight in docs]
+
+    def scores(self, query):
+        """질의에 대해 점수가 0보다 큰 문서만 {문서 번호: 점수}로 반환"""
+        scores = defaultdict(float)
+        for gram, qtf in Counter(tokenize(query)).items():
+            for doc_id, weight in self.postings.get(gram, ()):
+                scores[doc_id] += qtf * weight
+        return scores
+
+    def top_k(self, query, k, allowed=None):
+        """
+        상위 k개 문서 번호 (점수 높은 순)
+        점수가 있는 후보가 k개보다 적으면 원래 데이터 순서로 채워서
+        나이 조건만으로 받을 수 있는 기본 혜택(기초연금 등)이 빠지지 않게 합니다.
+        allowed(문서 번호 frozenset)를 주면 그 안에서만 고릅니다. (프로그램 DB로 거른 후보)
+        """
+        if allowed is not None and not isinstance(allowed, (set, frozenset)):
+            allowed = frozenset(allowed)
+        if k >= (self.size if allowed is None else len(allowed)):
+            return list(range(self.size)) if allowed is None else sorted(allowed)
+
+        scores = self.scores(query)
+        docs = scores if allowed is None else (doc_id for doc_id in scores if doc_id in allowed)
+        ranked = heapq.nsmallest(k, docs, key=lambda doc_id: (-scores[doc_id], doc_id))
+        if len(ranked) < k:
+            # 채울 때만 데이터 순서로 훑음 (k개가 차면 멈춤)
+            chosen = set(ranked)
+            pool = (
+                i for i in range(self.size)
+                if i not in chosen and (allowed is None or i in allowed)
+            )
+            ranked.extend(islice(pool, k - len(ranked)))
+        return ranked
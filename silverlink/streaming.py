@@ -0,0 +1,93 @@
+"""
+Gemini 스트리밍 응답용 점진적 JSON 파서
+
+generate_content(..., stream=True)로 받은 조각을 이어 붙이면서
+- "greeting" 문자열이 완성되는 즉시
+- "benefits" 배열의 각 항목(객체)이 닫히는 즉시
+이벤트로 돌려줍니다. 전체 응답을 기다리지 않고 화면에 먼저 그릴 수 있어
+체감 지연이 첫 토큰 도착 시간 수준으로 줄어듭니다.
+"""
+
+import json
+import re
+
+_GREETING_KEY = re.compile(r'"greeting"\s*:\s*')
+_BENEFITS_KEY = re.compile(r'"benefits"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+def extract_json_text(response_text):
+    """응답에서 JSON 본문만 추출 (```json ... ``` 형태로 올 수 있음)"""
+    response_text = response_text.strip()
+    if "```json" in response_text:
+        start = response_text.find("```json") + 7
+        end = response_text.find("```", start)
+        response_text = response_text[start:end if end != -1 else None].strip()
+    elif "```" in response_text:
+        start = response_text.find("```") + 3
+        end = response_text.find("```", start)
+        response_text = response_text[start:end if end != -1 else None].strip()
+    return response_text
+
+
+class IncrementalResponseParser:
+    """조각(chunk)을 받을 때마다 새로 완성된 greeting/benefit을 반환하는 파서"""
+
+    def __init__(self):
+        self.text = ""
+        self.greeting = None
+        self.benefits = []
+        self.benefits_done = False
+        self._decoder = json.JSONDecoder()
+        self._cursor = 0
+        self._benefit_pos = None
+
+    def feed(self, chunk):
+        """
+        조각을 추가하고 새로 완성된 이벤트 목록을 반환
+        예: [("greeting", "어르신 안녕하세요..."), ("benefit", {...})]
+        """
+        self.text += chunk or ""
+        events = []
+
+        if self.greeting is None:
+            match = _GREETING_KEY.search(self.text)
+            if match:
+                try:
+                    value, end = self._decoder.raw_decode(self.text, match.end())
+                except json.JSONDecodeError:
+                    return events  # 인사말이 아직 완성되지 않음
+                self.greeting = value if isinstance(value, str) else str(value)
+                self._cursor = end
+                events.append(("greeting", self.greeting))
+
+        if self._benefit_pos is None:
+            match = _BENEFITS_KEY.search(self.text, self._cursor)
+            if not match:
+                return events
+            self._benefit_pos = match.end()
+
+        while not self.benefits_done:
+            pos = self._benefit_pos
+            while pos < len(self.text) and self.text[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(self.text):
+                break
+            if self.text[pos] == "]":
+                self.benefits_done = True
+                self._benefit_pos = pos + 1
+                break
+            try:
+                value, end = self._decoder.raw_decode(self.text, pos)
+            except json.JSONDecodeError:
+                break  # 항목이 아직 완성되지 않음
+            self._benefit_pos = end
+            if isinstance(value, dict):
+                self.benefits.append(value)
+                events.append(("benefit", value))
+
+        return events
+
+    def result(self):
+        """스트림이 끝난 뒤 전체 JSON 파싱 (실패 시 JSONDecodeError)"""
+        return json.loads(extract_json_text(self.text))
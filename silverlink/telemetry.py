@@ -0,0 +1,321 @@
+"""
+단계별 처리 시간 추적과 운영 지표 (Prometheus 텍스트 형식)
+
+상담이 느릴 때 어느 단계(프롬프트 생성, 음성 전처리, 업로드, 대기열, Gemini 호출, 응답 표시,
+혜택 검증, 음성 합성, 다운로드 준비)에서 시간이 걸렸는지 확인하기 위한 가벼운 추적 계층입니다.
+
+- span("gemini"): 단계 하나의 시간 → 프로세스 전체 히스토그램 + 현재 요청 기록
+- start_trace("text") / finish_trace(): 요청 하나의 단계 목록 (운영자 타이밍 패널)
+- 현재 요청은 contextvars로 전달하므로 공유 스레드 풀 작업도 같은 요청에 기록됨
+  (Orchestrator/SpeechPipeline이 작업을 넘길 때 컨텍스트를 복사)
+- 지표: 단계/요청 시간, 단계 오류, 캐시 적중/실패, Gemini 토큰(usage_metadata), 대기열 대기 시간,
+  프롬프트 토큰 수와 예산 때문에 줄이거나 거절한 요청
+- 내보내기: render_prometheus() (API의 /metrics, 또는 METRICS_PORT로 연 작은 HTTP 서버)
+
+외부 라이브러리 없이 동작하며, 지표 기록 실패가 상담을 막지 않도록 단순한 메모리 집계만 합니다.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 단계 시간 히스토그램 구간 (초)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 프롬프트 토큰 수 히스토그램 구간
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+STAGE_SECONDS = "silverlink_stage_seconds"
+STAGE_ERRORS = "silverlink_stage_errors_total"
+REQUEST_SECONDS = "silverlink_request_seconds"
+CACHE_REQUESTS = "silverlink_cache_requests_total"
+GEMINI_TOKENS = "silverlink_gemini_tokens_total"
+QUEUE_WAIT_SECONDS = "silverlink_queue_wait_seconds"
+PROMPT_TOKENS = "silverlink_prompt_tokens"
+PROMPT_TRIMMED = "silverlink_prompt_trimmed_total"
+BUDGET_REJECTED = "silverlink_budget_rejected_total"
+AUDIO_BYTES = "silverlink_audio_bytes_total"
+
+METRIC_HELP = {
+    STAGE_SECONDS: "단계별 처리 시간",
+    STAGE_ERRORS: "예외로 끝난 단계 수",
+    REQUEST_SECONDS: "상담 요청 전체 처리 시간",
+    CACHE_REQUESTS: "캐시 조회 수 (result=hit|miss)",
+    GEMINI_TOKENS: "Gemini 토큰 사용량 (type=prompt|output|cached, cached는 prompt 중 컨텍스트 캐시에서 읽은 양)",
+    QUEUE_WAIT_SECONDS: "Gemini 입장 제어 대기 시간",
+    PROMPT_TOKENS: "보내기 전 센 프롬프트 토큰 수",
+    PROMPT_TRIMMED: "토큰 예산에 맞춰 줄인 프롬프트 수 (part=examples|candidates)",
+    BUDGET_REJECTED: "토큰 예산 초과로 Gemini를 호출하지 않은 요청 수 (scope=request|day)",
+    AUDIO_BYTES: "음성 업로드 크기 (kind=original|uploaded, 차이가 전처리로 줄인 양)",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """프로세스 전체 지표 저장소 (카운터, 히스토그램, 조회 시점 게이지)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}      # 이름 → {라벨: 값}
+        self._histograms = {}    # 이름 → (구간, {라벨: [구간별 개수..., 합계, 개수]})
+        self._gauges = {}        # 이름 → 값을 돌려주는 함수
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=STAGE_BUCKETS, **labels):
+        with self._lock:
+            bounds, series = self._histograms.setdefault(name, (buckets, {}))
+            key = _label_key(labels)
+            row = series.get(key)
+            if row is None:
+                row = series[key] = [0] * (len(bounds) + 2)
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def gauge(self, name, fn):
+        """조회할 때마다 fn()으로 값을 읽는 게이지 등록 (같은 이름이면 교체)"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def stage_summary(self):
+        """단계별 (호출 수, 평균 초) - 운영 통계 표시용"""
+        with self._lock:
+            _, series = self._histograms.get(STAGE_SECONDS, ((), {}))
+            summary = {}
+            for key, row in series.items():
+                stage = dict(key).get("stage", "")
+                summary[stage] = {"count": row[-1], "avg_ms": round(row[-2] / row[-1] * 1000, 1) if row[-1] else 0}
+            return dict(sorted(summary.items()))
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 노출 형식 (0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, (bounds, series) in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, row in sorted(series.items()):
+                    for bound, count in zip(bounds, row):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {row[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(row[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {row[-1]}")
+            gauges = sorted(self._gauges.items())
+
+        for name, fn in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue  # 지표 조회 실패는 무시
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class RequestTrace:
+    """상담 요청 하나의 단계 기록 (여러 스레드에서 추가될 수 있음)"""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.started = time.perf_counter()
+        self.duration = None
+        self.attributes = {}
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, duration, error=None):
+        with self._lock:
+            self._spans.append((stage, start - self.started, duration, error))
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def add_tokens(self, prompt_tokens, output_tokens, cached_tokens=0):
+        with self._lock:
+            self.attributes["prompt_tokens"] = self.attributes.get("prompt_tokens", 0) + prompt_tokens
+            self.attributes["output_tokens"] = self.attributes.get("output_tokens", 0) + output_tokens
+            if cached_tokens:
+                self.attributes["cached_tokens"] = self.attributes.get("cached_tokens", 0) + cached_tokens
+
+    def spans(self):
+        """시작 순서대로 [{"stage", "start_ms", "duration_ms", "error"}]"""
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s[1])
+        return [
+            {
+                "stage": stage,
+                "start_ms": round(offset * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+                "error": error,
+            }
+            for stage, offset, duration, error in spans
+        ]
+
+
+_current = contextvars.ContextVar("silverlink_trace", default=None)
+
+
+def start_trace(flow):
+    """새 요청 기록 시작 (현재 컨텍스트의 요청으로 설정)"""
+    trace = RequestTrace(flow)
+    _current.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    """요청 기록 종료: 전체 시간 집계"""
+    if trace is None or trace.duration is not None:
+        return trace
+    trace.duration = time.perf_counter() - trace.started
+    METRICS.observe(REQUEST_SECONDS, trace.duration, flow=trace.flow)
+    if _current.get() is trace:
+        _current.set(None)
+    return trace
+
+
+@contextmanager
+def span(stage):
+    """단계 하나의 시간 측정 (예외가 나도 기록하고 그대로 올려보냄)"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        METRICS.observe(STAGE_SECONDS, duration, stage=stage)
+        if error is not None:
+            METRICS.inc(STAGE_ERRORS, stage=stage, error=error)
+        trace = _current.get()
+        if trace is not None:
+            trace.add(stage, start, duration, error)
+
+
+def traced(stage):
+    """함수 전체를 단계 하나로 측정하는 데코레이터"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_cache(cache, hit):
+    METRICS.inc(CACHE_REQUESTS, cache=cache, result="hit" if hit else "miss")
+
+
+def record_queue_wait(seconds):
+    METRICS.observe(QUEUE_WAIT_SECONDS, seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.set(queue_wait_ms=round(seconds * 1000, 1))
+
+
+def record_prompt_tokens(tokens, trimmed=0, examples=True):
+    """보내기 전 프롬프트 토큰 수와 예산 때문에 줄인 내용"""
+    METRICS.observe(PROMPT_TOKENS, tokens, buckets=TOKEN_BUCKETS)
+    if not examples:
+        METRICS.inc(PROMPT_TRIMMED, part="examples")
+    if trimmed:
+        METRICS.inc(PROMPT_TRIMMED, part="candidates")
+    trace = _current.get()
+    if trace is not None:
+        trace.set(prompt_tokens_estimate=tokens)
+        if trimmed or not examples:
+            trace.set(trimmed_candidates=trimmed, examples=examples)
+
+
+def record_audio_bytes(original_bytes, uploaded_bytes):
+    """음성 전처리 전후 크기 (요청마다 줄인 바이트)"""
+    METRICS.inc(AUDIO_BYTES, original_bytes, kind="original")
+    METRICS.inc(AUDIO_BYTES, uploaded_bytes, kind="uploaded")
+    trace = _current.get()
+    if trace is not None:
+        trace.set(audio_original_bytes=original_bytes, audio_upload_bytes=uploaded_bytes)
+
+
+def record_usage(usage_metadata, model_name):
+    """응답의 usage_metadata → 토큰 지표 (없으면 무시)"""
+    if usage_metadata is None:
+        return
+    prompt_tokens = getattr(usage_metadata, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage_metadata, "candidates_token_count", 0) or 0
+    if not prompt_tokens and not output_tokens:
+        return
+    cached_tokens = getattr(usage_metadata, "cached_content_token_count", 0) or 0
+    METRICS.inc(GEMINI_TOKENS, prompt_tokens, model=model_name, type="prompt")
+    METRICS.inc(GEMINI_TOKENS, output_tokens, model=model_name, type="output")
+    if cached_tokens:
+        METRICS.inc(GEMINI_TOKENS, cached_tokens, model=model_name, type="cached")
+    trace = _current.get()
+    if trace is not None:
+        trace.add_tokens(prompt_tokens, output_tokens, cached_tokens)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 수집기 요청마다 로그를 남기지 않음
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """/metrics를 제공하는 백그라운드 HTTP 서버 시작 (Streamlit 앱용)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,129 @@
+"""
+문장/섹션 단위 음성 합성 파이프라인 (gTTS)
+
+응답 전체를 한 번에 gTTS로 변환하면 가장 긴 단계가 끝날 때까지 아무 소리도
+들을 수 없습니다. 응답을 인사말 → 혜택별 설명 → 격려 메시지 섹션으로 나누고
+(긴 섹션은 문장 단위로 다시 나눔) 작업 스레드 풀에서 동시에 변환합니다.
+
+- 스트리밍 응답에서는 인사말이 도착하자마자 변환을 시작할 수 있음
+- 조각(MP3)은 제출 순서대로 이어 붙여 하나의 파일로 제공
+  (MP3 프레임은 그대로 이어 붙여도 재생 가능)
+"""
+
+import contextvars
+import io
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from gtts import gTTS
+
+from silverlink.telemetry import span
+
+# TTS를 위한 텍스트 정리 (이모지 제거)
+_TTS_UNSAFE = re.compile(r'[^\w\s가-힣.,!?。、\n]')
+_SENTENCE_END = re.compile(r'(?<=[.!?。])\s+')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+
+# 섹션이 이보다 길면 문장 단위로 나눠 병렬 변환
+MAX_CHUNK_CHARS = 200
+
+
+def clean_for_tts(text):
+    return _TTS_UNSAFE.sub('', text or '')
+
+
+def split_sections(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    빈 줄 기준으로 섹션을 나누고, 긴 섹션은 문장 단위로 max_chars 이하로 묶음
+    예: "인사말\\n\\n1번. 기초연금. ..." → ["인사말", "1번. 기초연금. ..."]
+    """
+    chunks = []
+    for section in _BLANK_LINES.split(text or ''):
+        section = section.strip()
+        if not section:
+            continue
+        if len(section) <= max_chars:
+            chunks.append(section)
+            continue
+
+        current = ""
+        for sentence in _SENTENCE_END.split(section):
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def synthesize(text, lang='ko'):
+    """텍스트 한 조각을 MP3 바이트로 변환"""
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def create_tts_executor(max_workers=4):
+    """모든 세션이 공유하는 TTS 작업 풀 (gTTS 외부 호출 동시 실행 수 제한)"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+
+class SpeechPipeline:
+    """
+    텍스트 섹션을 제출하는 즉시 백그라운드에서 합성하고, 순서대로 결과를 제공
+
+    사용 예:
+        speech = SpeechPipeline(executor)
+        speech.submit(greeting)          # 인사말 도착 즉시
+        speech.submit(benefit_text)      # 혜택 하나 완성될 때마다
+        first = speech.first_chunk()     # 인사말 먼저 재생
+        mp3 = speech.audio_bytes()       # 전체 음성
+    """
+
+    def __init__(self, executor, synthesize_fn=synthesize):
+        self._executor = executor
+        self._synthesize = synthesize_fn
+        self._futures = []
+
+    def submit(self, text):
+        """섹션을 정리/분할해 합성 작업으로 제출 (너무 짧은 조각은 건너뜀)"""
+        for chunk in split_sections(clean_for_tts(text)):
+            if len(chunk.strip()) < 2:
+                continue
+            # 요청 기록(컨텍스트)을 가지고 작업 풀에서 실행
+            self._futures.append(self._executor.submit(contextvars.copy_context().run, self._run, chunk))
+
+    def _run(self, chunk):
+        with span("tts"):
+            return self._synthesize(chunk)
+
+    @property
+    def chunk_count(self):
+        return len(self._futures)
+
+    def first_chunk(self, timeout=None):
+        """첫 조각(보통 인사말)만 기다려서 반환"""
+        if not self._futures:
+            return None
+        return self._futures[0].result(timeout=timeout)
+
+    def chunks(self, timeout=None):
+        """제출 순서대로 MP3 조각을 반환 (각 조각이 끝나는 대로)"""
+        for future in self._futures:
+            yield future.result(timeout=timeout)
+
+    def audio_bytes(self, timeout=None):
+        """모든 조각을 이어 붙인 전체 MP3"""
+        return b"".join(self.chunks(timeout=timeout))
+
+    def cancel(self):
+        """아직 시작하지 않은 합성 작업 취소"""
+        for future in self._futures:
+            future.cancel()
+
+    def reset(self):
+        """제출한 작업을 취소하고 비움 (처음부터 다시 제출할 때)"""
+        self.cancel()
+        self._futures = []